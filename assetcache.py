@@ -0,0 +1,196 @@
+"""Content-addressed cache of preprocessed assets.
+
+Images are stored decoded, scaled and in the display's byte order, sounds
+decoded and resampled to the mixer's format.  Entries are named by the
+SHA-256 of the source file's bytes plus the recipe (size and pixel order,
+or mixer rate and channels), so identical files share one entry however
+many names they have.  A cached entry is memory-mapped and wrapped with
+pygame.image.frombuffer or np.frombuffer, with no decode step.
+
+A small index maps each source path's (mtime, size) to its hash, so an
+unchanged file is not even re-read to be hashed.
+
+    python assetcache.py            # list assets, duplicates and the cache
+    python assetcache.py --clear
+"""
+import argparse
+import glob
+import hashlib
+import json
+import mmap
+import os
+import struct
+import sys
+import threading
+
+import numpy as np
+import pygame
+
+CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "reverse_snake", "assets")
+HEADER = struct.Struct("<4sII4s")  # magic, width or channels, height or frames, pixel order
+IMAGE, SOUND = b"RSI1", b"RSS2"
+
+_lock = threading.Lock()
+_index = None
+_maps = {}  # path -> mmap, kept open for the surfaces and arrays that view them
+stats = {"hits": 0, "misses": 0, "errors": 0}
+
+
+# ---------- HASHING ----------
+def _index_path():
+    return os.path.join(CACHE_DIR, "index.json")
+
+
+def content_hash(path):
+    """SHA-256 of path's bytes, remembered against its mtime and size."""
+    global _index
+    st = os.stat(path)
+    key = os.path.abspath(path)
+    with _lock:
+        if _index is None:
+            try:
+                with open(_index_path()) as f:
+                    _index = json.load(f)
+            except (OSError, ValueError):
+                _index = {}
+        entry = _index.get(key)
+        if entry and entry[0] == st.st_mtime_ns and entry[1] == st.st_size:
+            return entry[2]
+    with open(path, "rb") as f:
+        digest = hashlib.sha256(f.read()).hexdigest()
+    with _lock:
+        _index[key] = [st.st_mtime_ns, st.st_size, digest]
+        _write(_index_path(), json.dumps(_index).encode())
+    return digest
+
+
+def _write(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def _map(path):
+    """Copy-on-write map of a cache entry: its header and its payload."""
+    with _lock:
+        mm = _maps.get(path)
+        if mm is None:
+            with open(path, "rb") as f:
+                mm = _maps[path] = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+    return HEADER.unpack_from(mm), memoryview(mm)[HEADER.size:]
+
+
+def _drop(path):
+    with _lock:
+        mm = _maps.pop(path, None)
+        if mm is not None:
+            mm.close()
+    os.remove(path)
+
+
+def _entry(path, recipe, build, whole):
+    """Map the entry for (content of path, recipe), building it with build()
+    -> (header fields, payload bytes) on a miss.  whole(header fields,
+    payload length) tells whether a cached entry is complete."""
+    try:
+        name = os.path.join(CACHE_DIR, f"{content_hash(path)}-{recipe}.bin")
+        if os.path.exists(name):
+            try:
+                fields, payload = _map(name)
+                if whole(fields, len(payload)):
+                    stats["hits"] += 1
+                    return fields, payload
+                payload.release()  # or _drop cannot close the map
+                raise ValueError("payload does not match its header")
+            except (ValueError, struct.error) as e:
+                # an empty or truncated entry, left by a crash or a full disk: rebuild it
+                stats["errors"] += 1
+                print(f"Warning: rebuilding bad cache entry for {path}: {e}")
+                _drop(name)
+        stats["misses"] += 1
+        fields, payload = build()
+        _write(name, HEADER.pack(*fields) + payload)
+        return _map(name)
+    except OSError as e:
+        # a read-only or full disk must not stop the game: decode directly
+        stats["errors"] += 1
+        print(f"Warning: asset cache unavailable for {path}: {e}")
+        fields, payload = build()
+        return fields, memoryview(payload)
+
+
+# ---------- IMAGES ----------
+def native_order():
+    """Byte order of 32-bit pixels on the current display, for frombuffer."""
+    display = pygame.display.get_surface() if pygame.display.get_init() else None
+    if display is not None and display.get_bitsize() == 32:
+        r, g, b, _ = display.get_masks()
+        if (r, g, b) == (0xFF0000, 0xFF00, 0xFF) and sys.byteorder == "little":
+            return "BGRA"
+    return "RGBA"
+
+
+def image(path, size):
+    """path decoded and scaled to size, as a Surface over the mapped cache entry."""
+    order = native_order()
+
+    def build():
+        surf = pygame.transform.scale(pygame.image.load(path), size)
+        return (IMAGE, size[0], size[1], order.encode()), pygame.image.tobytes(surf, order)
+
+    def whole(fields, length):
+        magic, w, h, _ = fields
+        return magic == IMAGE and length == w * h * 4
+
+    (_, w, h, stored), pixels = _entry(path, f"{size[0]}x{size[1]}-{order}", build, whole)
+    return pygame.image.frombuffer(pixels, (w, h), stored.decode())
+
+
+# ---------- SOUNDS ----------
+def samples(path, convert):
+    """path's samples as int16 (frames, channels) in the mixer's format, over
+    the mapped cache entry. convert(path) builds them on a miss."""
+    rate, _, channels = pygame.mixer.get_init()
+
+    def build():
+        data = convert(path)
+        return (SOUND, data.shape[1], data.shape[0], b"s16 "), data.tobytes()
+
+    def whole(fields, length):
+        magic, stored_channels, frames, _ = fields
+        return magic == SOUND and length == frames * stored_channels * 2
+
+    (_, stored_channels, _, _), raw = _entry(path, f"{rate}hz-{channels}ch-s16", build, whole)
+    return np.frombuffer(raw, np.int16).reshape(-1, stored_channels)
+
+
+# ---------- REPORT ----------
+def main():
+    parser = argparse.ArgumentParser(description="Inspect the preprocessed asset cache")
+    parser.add_argument("--clear", action="store_true", help="delete every cached entry")
+    args = parser.parse_args()
+    if args.clear:
+        removed = 0
+        for name in glob.glob(os.path.join(CACHE_DIR, "*")):
+            os.remove(name)
+            removed += 1
+        print(f"removed {removed} files from {CACHE_DIR}")
+        return
+
+    here = os.path.dirname(os.path.abspath(__file__))
+    by_hash = {}
+    for path in sorted(glob.glob(os.path.join(here, "*.png")) + glob.glob(os.path.join(here, "*.wav"))):
+        by_hash.setdefault(content_hash(path), []).append(os.path.basename(path))
+    for digest, names in by_hash.items():
+        note = f"  <- {len(names)} identical files" if len(names) > 1 else ""
+        print(f"{digest[:12]}  {', '.join(names)}{note}")
+    entries = glob.glob(os.path.join(CACHE_DIR, "*.bin"))
+    total = sum(os.path.getsize(e) for e in entries)
+    print(f"{len(by_hash)} distinct assets in {sum(map(len, by_hash.values()))} files; "
+          f"cache: {len(entries)} entries, {total / 1024:.0f} KB in {CACHE_DIR}")
+
+
+if __name__ == "__main__":
+    main()
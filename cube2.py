@@ -0,0 +1,372 @@
+"""2x2x2 cube for rubix2 --size 2: ranked states, a distance table, optimal solving.
+
+With the down-back-left corner held still (any position can be turned to
+put it home), a 2x2x2 state is the permutation of the other seven corners
+and the twists of six of them, the seventh twist being implied: 7! * 3^6 =
+3,674,160 states, ranked as perm_rank * 729 + twist code.  Only U, R and F
+quarter turns are needed to reach them all.
+
+A breadth-first search over the ranks fills in every state's distance from
+solved in quarter turns.  It is vectorized with NumPy, a whole frontier
+per step: early levels expand the frontier through the move tables, late
+levels (when fewer states are unvisited than in the frontier) check each
+unvisited state for a neighbour in the frontier instead.  The distances
+(at most 14) are packed two per byte, 1.8 MB, written to the cache once
+and memory-mapped afterwards.  Solving a position is then a descent:
+from its rank, take any move to a state one closer, until the distance is 0.
+
+    python cube2.py              # build or load, check and time the solver
+    python cube2.py --rebuild
+"""
+import argparse
+import mmap
+import os
+import random
+import struct
+import time
+import zlib
+from itertools import permutations
+
+import numpy as np
+
+import cube_core
+from cube_core import NORMALS, WHITE, YELLOW, ORANGE, BLUE, colors_list, quarter_turn
+
+# The 12 face turns of the 2x2x2, as cube_core.MOVES: (axis, layer, clockwise)
+MOVES = {
+    'U': ('y', 1, True), 'u': ('y', 1, False),
+    'D': ('y', 0, True), 'd': ('y', 0, False),
+    'L': ('x', 0, True), 'l': ('x', 0, False),
+    'R': ('x', 1, True), 'r': ('x', 1, False),
+    'F': ('z', 1, True), 'f': ('z', 1, False),
+    'B': ('z', 0, True), 'b': ('z', 0, False),
+}
+GENERATORS = ['U', 'u', 'R', 'r', 'F', 'f']  # the turns that leave the down-back-left corner alone
+AXES = "xyz"
+
+PERMS, TWISTS = 5040, 729
+STATES = PERMS * TWISTS
+UNSEEN = 15
+
+CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "reverse_snake")
+TABLE_PATH = os.path.join(CACHE_DIR, "cube2_distances.bin")
+HEADER = struct.Struct("<4sIII")  # magic, states, deepest distance, crc of the move tables
+MAGIC = b"RS2D"
+
+
+# ---------- CORNERS ----------
+# Corner k = x*4 + y*2 + z at (2x-1, 2y-1, 2z-1); corner 0 is down-back-left.
+CORNERS = [(2 * x - 1, 2 * y - 1, 2 * z - 1) for x in (0, 1) for y in (0, 1) for z in (0, 1)]
+
+
+def _faces(p):
+    """The corner's three outward normals, starting from its U/D face, in the
+    same (right-handed) cyclic order at every corner, so a turn carries the
+    i-th face of one corner to the (i + twist)-th face of another."""
+    sx, sy, sz = p
+    x, y, z = (sx, 0, 0), (0, sy, 0), (0, 0, sz)
+    return (y, z, x) if sx * sy * sz > 0 else (y, x, z)
+
+
+FACES = [_faces(p) for p in CORNERS]
+HOME_COLOR = {n: colors_list[f] for f, n in enumerate(NORMALS)}
+PIECE = {frozenset(HOME_COLOR[n] for n in FACES[k]): k for k in range(8)}
+
+
+def _matvec(m, v):
+    return tuple(int(m[i][0] * v[0] + m[i][1] * v[1] + m[i][2] * v[2]) for i in range(3))
+
+
+def corner_move(axis, layer, clockwise):
+    """(dest, twist): the corner at k goes to dest[k], its twist grows by twist[k]."""
+    r = quarter_turn(axis, clockwise)
+    a, side = AXES.index(axis), 2 * layer - 1
+    dest, twist = list(range(8)), [0] * 8
+    for k, p in enumerate(CORNERS):
+        if p[a] != side:
+            continue
+        dest[k] = CORNERS.index(_matvec(r, p))
+        twist[k] = FACES[dest[k]].index(_matvec(r, FACES[k][0]))
+    return dest, twist
+
+
+# ---------- RANKS ----------
+def _move_tables():
+    perm_list = list(permutations(range(7)))
+    perm_rank = {p: i for i, p in enumerate(perm_list)}
+    moves = [corner_move(*MOVES[name]) for name in GENERATORS]
+    perm_table = np.zeros((PERMS, len(moves)), np.int32)
+    twist_table = np.zeros((TWISTS, len(moves)), np.int32)
+    for i, p in enumerate(perm_list):
+        full = (0,) + tuple(c + 1 for c in p)
+        for m, (dest, _) in enumerate(moves):
+            moved = [0] * 8
+            for k in range(8):
+                moved[dest[k]] = full[k]
+            perm_table[i, m] = perm_rank[tuple(c - 1 for c in moved[1:])]
+    for code in range(TWISTS):
+        t = decode_twists(code)
+        for m, (dest, twist) in enumerate(moves):
+            moved = [0] * 8
+            for k in range(8):
+                moved[dest[k]] = (t[k] + twist[k]) % 3
+            twist_table[code, m] = encode_twists(moved)
+    return perm_rank, perm_table, twist_table
+
+
+def encode_twists(t):
+    """Base-3 code of the twists of corners 1..6 (corner 7's follows from them)."""
+    code = 0
+    for k in range(6, 0, -1):
+        code = 3 * code + t[k]
+    return code
+
+
+def decode_twists(code):
+    t = [0] * 8
+    for k in range(1, 7):
+        code, t[k] = divmod(code, 3)
+    t[7] = -sum(t) % 3
+    return t
+
+
+PERM_RANK, PERM_TABLE, TWIST_TABLE = _move_tables()
+_PERM_ROWS, _TWIST_ROWS = PERM_TABLE.tolist(), TWIST_TABLE.tolist()
+
+
+def rank(perm, twist):
+    """State index of corners holding pieces perm with twists twist (corner 0 home)."""
+    return PERM_RANK[tuple(c - 1 for c in perm[1:])] * TWISTS + encode_twists(twist)
+
+
+# ---------- READING A CUBE ----------
+def stickers(cube):
+    """{(corner position, outward normal): color} of a 2x2x2 cube_core cube."""
+    out = {}
+    for x in (0, 1):
+        for y in (0, 1):
+            for z in (0, 1):
+                colors = cube.cube[x][y][z].colors
+                p = (2 * x - 1, 2 * y - 1, 2 * z - 1)
+                for f, n in enumerate(NORMALS):
+                    if n[0] * p[0] + n[1] * p[1] + n[2] * p[2] > 0:
+                        out[p, n] = colors[f]
+    return out
+
+
+def read(cube):
+    """(state index, frame) of a 2x2x2 cube, or None if its stickers are not
+    a reachable position. frame is the rotation taking the cube to the one
+    whose down-back-left corner is home; the state is of that cube."""
+    s = stickers(cube)
+    home = {YELLOW, ORANGE, BLUE}
+    p0 = next((p for p in CORNERS if {s[p, n] for n in FACES[CORNERS.index(p)]} == home), None)
+    if p0 is None:
+        return None
+    normal = {s[p0, n]: n for n in FACES[CORNERS.index(p0)]}
+    # the frame sends the corner's blue, yellow and orange normals to -x, -y and -z
+    frame = tuple(tuple(-c for c in normal[color]) for color in (BLUE, YELLOW, ORANGE))
+    if round(np.linalg.det(frame)) != 1:
+        return None
+    seen = {(_matvec(frame, p), _matvec(frame, n)): c for (p, n), c in s.items()}
+    perm, twist = [0] * 8, [0] * 8
+    for k, p in enumerate(CORNERS):
+        colors = [seen[p, n] for n in FACES[k]]
+        piece = PIECE.get(frozenset(colors))
+        ud = [i for i, c in enumerate(colors) if c in (WHITE, YELLOW)]
+        if piece is None or len(ud) != 1:
+            return None
+        perm[k], twist[k] = piece, ud[0]
+    if sorted(perm) != list(range(8)) or sum(twist) % 3 or perm[0] or twist[0]:
+        return None
+    return rank(perm, twist), frame
+
+
+def unframe(name, frame):
+    """The turn, in the cube's own orientation, that is GENERATORS' name in frame."""
+    axis, layer, clockwise = MOVES[name]
+    v = frame[AXES.index(axis)]  # frame^T e_axis
+    b = next(i for i in range(3) if v[i])
+    sign = v[b]
+    turn = (AXES[b], layer if sign > 0 else 1 - layer, clockwise if sign > 0 else not clockwise)
+    return next(n for n, t in MOVES.items() if t == turn)
+
+
+# ---------- DISTANCE TABLE ----------
+def build():
+    """Distance of every state from solved, one uint8 per state."""
+    dist = np.full(STATES, UNSEEN, np.uint8)
+    dist[0] = 0
+    frontier = np.array([0], np.int64)
+    unseen = STATES - 1
+    depth = 0
+    while len(frontier) and unseen:
+        if len(frontier) <= unseen:
+            p, t = np.divmod(frontier, TWISTS)
+            nxt = (PERM_TABLE[p] * TWISTS + TWIST_TABLE[t]).ravel()
+            dist[nxt[dist[nxt] == UNSEEN]] = depth + 1
+        else:
+            todo = np.flatnonzero(dist == UNSEEN)
+            p, t = np.divmod(todo, TWISTS)
+            near = PERM_TABLE[p] * TWISTS + TWIST_TABLE[t]
+            dist[todo[(dist[near] == depth).any(axis=1)]] = depth + 1
+        depth += 1
+        frontier = np.flatnonzero(dist == depth)
+        unseen -= len(frontier)
+    return dist
+
+
+def pack(dist):
+    return dist[0::2] | (dist[1::2] << 4)
+
+
+def tables_crc():
+    return zlib.crc32(PERM_TABLE.tobytes() + TWIST_TABLE.tobytes())
+
+
+class Solver:
+    """Optimal quarter-turn solutions from the memory-mapped distance table,
+    built and saved on first use."""
+
+    def __init__(self, path=TABLE_PATH, rebuild=False):
+        self.path = path
+        self.build_seconds = None
+        t = time.perf_counter()
+        self.table = None if rebuild else self._map()
+        if self.table is None:
+            self._build()
+            self.table = self._map() or self.table
+        self.load_seconds = time.perf_counter() - t
+
+    def _map(self):
+        try:
+            with open(self.path, "rb") as f:
+                mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            return None
+        try:
+            magic, states, deepest, crc = HEADER.unpack_from(mm)
+        except struct.error:
+            return None  # shorter than its header
+        if (magic, states, crc) != (MAGIC, STATES, tables_crc()) or len(mm) != HEADER.size + STATES // 2:
+            return None
+        self.deepest = deepest
+        return memoryview(mm)[HEADER.size:]
+
+    def _build(self):
+        t = time.perf_counter()
+        dist = build()
+        self.build_seconds = time.perf_counter() - t
+        self.deepest = int(dist.max())
+        packed = pack(dist).tobytes()
+        print(f"cube2: distance table built in {self.build_seconds:.2f} s, "
+              f"{STATES:,} states, {len(packed) / 1e6:.2f} MB packed, deepest {self.deepest} quarter turns")
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            tmp = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp, "wb") as f:
+                f.write(HEADER.pack(MAGIC, STATES, self.deepest, tables_crc()) + packed)
+            os.replace(tmp, self.path)
+        except OSError as e:
+            print(f"Warning: could not save {self.path}: {e}")
+        self.table = memoryview(packed)
+
+    def distance(self, index):
+        return (self.table[index >> 1] >> ((index & 1) << 2)) & 15
+
+    def histogram(self):
+        packed = np.frombuffer(self.table, np.uint8)
+        return np.bincount(np.concatenate([packed & 15, packed >> 4]), minlength=16)[:self.deepest + 1]
+
+    def solve_index(self, index):
+        """Indices into GENERATORS of an optimal solution of state index."""
+        table, perm_rows, twist_rows = self.table, _PERM_ROWS, _TWIST_ROWS
+        d = (table[index >> 1] >> ((index & 1) << 2)) & 15
+        path = []
+        while d:
+            p, t = divmod(index, TWISTS)
+            prow, trow = perm_rows[p], twist_rows[t]
+            for m in range(6):
+                nxt = prow[m] * TWISTS + trow[m]
+                if (table[nxt >> 1] >> ((nxt & 1) << 2)) & 15 == d - 1:
+                    break
+            path.append(m)
+            index, d = nxt, d - 1
+        return path
+
+    def solve(self, cube):
+        """Names in MOVES of an optimal solution of a 2x2x2 cube_core cube,
+        or None if its stickers are not a reachable position."""
+        found = read(cube)
+        if found is None:
+            return None
+        index, frame = found
+        return [unframe(GENERATORS[m], frame) for m in self.solve_index(index)]
+
+
+# ---------- SELF-CHECK ----------
+def is_solved(cube):
+    faces = {}
+    for (p, n), c in stickers(cube).items():
+        faces.setdefault(n, set()).add(c)
+    return all(len(colors) == 1 for colors in faces.values())
+
+
+def check(solver, scrambles=500, seed=0):
+    """Scramble engine cubes with all 12 turns, solve them, and replay the
+    solutions on the engine."""
+    rng = random.Random(seed)
+    names = list(MOVES)
+    failures = 0
+    for i in range(scrambles):
+        cube = cube_core.RubiksCube(2)
+        length = i % 30
+        for name in rng.choices(names, k=length):
+            cube.apply_move(*MOVES[name])
+        solution = solver.solve(cube)
+        if solution is None:
+            failures += 1
+            continue
+        for name in solution:
+            cube.apply_move(*MOVES[name])
+        if not is_solved(cube) or len(solution) > length:
+            failures += 1
+    print(f"{scrambles} scrambles of 0-29 turns solved on the engine, {failures} failed")
+    return failures
+
+
+def bench(solver, n=20000, seed=0):
+    rng = np.random.default_rng(seed)
+    states = rng.integers(0, STATES, n).tolist()
+    t = time.perf_counter()
+    moves = sum(len(solver.solve_index(s)) for s in states)
+    per = (time.perf_counter() - t) / n
+    cube = cube_core.RubiksCube(2)
+    for name in random.Random(seed).choices(list(MOVES), k=25):
+        cube.apply_move(*MOVES[name])
+    t = time.perf_counter()
+    for _ in range(1000):
+        solver.solve(cube)
+    print(f"descent {1e6 * per:.1f} us per random state ({moves / n:.2f} turns on average); "
+          f"reading a cube and solving it {1000 * (time.perf_counter() - t):.0f} us")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="2x2x2 distance table and optimal solver")
+    parser.add_argument("--rebuild", action="store_true", help="rebuild the distance table")
+    parser.add_argument("--scrambles", type=int, default=500)
+    args = parser.parse_args()
+    solver = Solver(rebuild=args.rebuild)
+    if solver.build_seconds is None:
+        print(f"cube2: distance table mapped from {solver.path} in {1000 * solver.load_seconds:.1f} ms, "
+              f"{os.path.getsize(solver.path) / 1e6:.2f} MB")
+    hist = solver.histogram()
+    print("states by distance: " + ", ".join(f"{d}:{n}" for d, n in enumerate(hist)))
+    print(f"{hist.sum():,} states, mean distance {(np.arange(len(hist)) * hist).sum() / hist.sum():.2f}")
+    failures = check(solver, args.scrambles)
+    bench(solver)
+    raise SystemExit(1 if failures or hist.sum() != STATES else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,213 @@
+"""Benchmarks and a correctness oracle for the rubix2 cube engine (no OpenGL).
+
+The oracle is an independent permutation model of the 27 cubies x 6 faces
+in cube_core's state() layout: a turn of (axis, layer, clockwise) rotates
+every cubie in the layer, its position and its face normals, by +90
+degrees about the axis when clockwise (-90 otherwise) - the same rotation
+rubix2 animates with glRotatef.  Labelling every face with its own slot
+number lets the engine's turns be read back as exact permutations.
+
+Millions of random sequences are composed in batches twice, from the
+turns read back from the engine and from the model, and compared.  A
+sample of them is also played through RubiksCube itself, checking its
+colors against the model and the cubies' grid indices against where
+they sit.
+
+    python cube_bench.py
+    python cube_bench.py --sequences 5000000 --length 25 --engine-sequences 50000
+"""
+import argparse
+import sys
+import time
+
+import numpy as np
+
+import cube_core
+from cube_core import MOVES, NORMALS
+
+NAMES = list(MOVES)
+AXES = {'x': 0, 'y': 1, 'z': 2}
+SLOTS = 27 * 6
+
+
+def slot(x, y, z, face):
+    return ((x * 3 + y) * 3 + z) * 6 + face
+
+
+def model_permutation(axis, layer, clockwise):
+    """src such that new_state = state[src] for one turn."""
+    r = np.array(cube_core.quarter_turn(axis, clockwise))
+    normal_index = {n: i for i, n in enumerate(NORMALS)}
+    dest = np.arange(SLOTS)
+    for x in range(3):
+        for y in range(3):
+            for z in range(3):
+                if (x, y, z)[AXES[axis]] != layer:
+                    continue
+                p = r @ np.array([x - 1, y - 1, z - 1]) + 1
+                for f, n in enumerate(NORMALS):
+                    nf = normal_index[tuple(r @ np.array(n))]
+                    dest[slot(x, y, z, f)] = slot(*p, nf)
+    src = np.empty(SLOTS, int)
+    src[dest] = np.arange(SLOTS)
+    return src
+
+
+def labelled_cube():
+    """An engine cube whose every face holds its own slot number."""
+    cube = cube_core.RubiksCube()
+    for x in range(3):
+        for y in range(3):
+            for z in range(3):
+                cube.cube[x][y][z].colors = [slot(x, y, z, f) for f in range(6)]
+    return cube
+
+
+def engine_permutation(name):
+    cube = labelled_cube()
+    cube.apply_move(*MOVES[name])
+    return np.array(cube.state())
+
+
+def inverse_name(name):
+    return name.swapcase()
+
+
+# ---------- ORACLE ----------
+def block_tables(turns, longest=3):
+    """Slot permutations of every run of 1..longest turns, keyed by run length
+    and indexed by the moves as base-18 digits, first move highest."""
+    tables = {1: turns.astype(np.uint8)}
+    for k in range(2, longest + 1):
+        # run c followed by move m: state[run[c]][turns[m]] == state[run[c][turns[m]]]
+        tables[k] = tables[k - 1][:, turns].reshape(-1, SLOTS)
+    return tables
+
+
+def compose(tables, seqs):
+    """Each row of move indices as one slot permutation: its final state is
+    start[result].  Runs of moves are looked up whole, last run first."""
+    longest = max(tables)
+    out = np.broadcast_to(np.arange(SLOTS, dtype=np.uint8), (len(seqs), SLOTS)).copy()
+    for lo in reversed(range(0, seqs.shape[1], longest)):
+        run = seqs[:, lo:lo + longest]
+        code = np.zeros(len(seqs), np.intp)
+        for j in range(run.shape[1]):
+            code = code * len(NAMES) + run[:, j]
+        out = tables[run.shape[1]].ravel()[code[:, None] * SLOTS + out]
+    return out
+
+
+def verify(sequences, length, engine_sequences, seed):
+    rng = np.random.default_rng(seed)
+    model = np.array([model_permutation(*MOVES[n]) for n in NAMES])
+    engine = np.array([engine_permutation(n) for n in NAMES])
+    identity = np.arange(SLOTS)
+    failures = 0
+
+    def check(ok, what):
+        nonlocal failures
+        if not ok:
+            failures += 1
+            print(f"  FAIL: {what}")
+
+    print("single turns, inverses and order-4 identities")
+    for i, name in enumerate(NAMES):
+        check((engine[i] == model[i]).all(), f"{name} moves faces differently from the model")
+        inv = NAMES.index(inverse_name(name))
+        check((model[i][model[inv]] == identity).all(), f"model {name}{inverse_name(name)} != identity")
+        cube = labelled_cube()
+        for n in (name, inverse_name(name)):
+            cube.apply_move(*MOVES[n])
+        check((np.array(cube.state()) == identity).all(), f"engine {name}{inverse_name(name)} != identity")
+        cube = labelled_cube()
+        for _ in range(4):
+            cube.apply_move(*MOVES[name])
+        check((np.array(cube.state()) == identity).all(), f"engine {name}x4 != identity")
+        p = identity
+        for _ in range(4):
+            p = p[model[i]]
+        check((p == identity).all(), f"model {name}x4 != identity")
+
+    print(f"{sequences:,} random sequences of {length} turns composed from the engine's turns "
+          f"and from the model, {min(engine_sequences, sequences):,} of them played through RubiksCube")
+    engine_blocks, model_blocks = block_tables(engine), block_tables(model)
+    played = 0
+    batch = 50_000
+    for start in range(0, sequences, batch):
+        n = min(batch, sequences - start)
+        seqs = rng.integers(0, len(NAMES), (n, length))
+        a = compose(model_blocks, seqs)
+        wrong = np.flatnonzero((a != compose(engine_blocks, seqs)).any(axis=1))
+        if len(wrong):
+            check(False, "sequence " + "".join(NAMES[m] for m in seqs[wrong[0]]))
+        for k in range(min(n, engine_sequences - played)):
+            cube = labelled_cube()
+            for m in seqs[k]:
+                cube.apply_move(*MOVES[NAMES[m]])
+            misplaced = [(x, y, z) for x, plane in enumerate(cube.cube) for y, row in enumerate(plane)
+                         for z, c in enumerate(row) if (c.x_idx, c.y_idx, c.z_idx) != (x, y, z)]
+            if not (np.array(cube.state()) == a[k]).all() or misplaced:
+                check(False, "RubiksCube sequence " + "".join(NAMES[m] for m in seqs[k]))
+                engine_sequences = played  # one report is enough
+                break
+            played += 1
+    return failures
+
+
+# ---------- BENCHMARKS ----------
+def bench(seconds=1.0, seed=0):
+    rng = np.random.default_rng(seed)
+    turns = [MOVES[NAMES[m]] for m in rng.integers(0, len(NAMES), 10000)]
+
+    def rate(fn):
+        n, t0 = 0, time.perf_counter()
+        while time.perf_counter() - t0 < seconds:
+            fn(n)
+            n += 1
+        return n / (time.perf_counter() - t0)
+
+    cube = cube_core.RubiksCube()
+    moves = rate(lambda n: cube.apply_move(*turns[n % len(turns)]))
+    print(f"engine turns:        {moves:12,.0f} /s")
+
+    scramble = turns[:25]
+
+    def apply_scramble(_):
+        c = cube_core.RubiksCube()
+        for t in scramble:
+            c.apply_move(*t)
+    print(f"25-turn scrambles:   {rate(apply_scramble):12,.0f} /s (new cube + 25 turns)")
+
+    other = cube_core.RubiksCube()
+    print(f"state comparisons:   {rate(lambda n: cube.state() == other.state()):12,.0f} /s")
+
+    model = np.array([model_permutation(*MOVES[n]) for n in NAMES])
+    states = np.broadcast_to(np.arange(SLOTS), (100_000, SLOTS)).copy()
+    rows = np.arange(len(states))[:, None]
+    picks = rng.integers(0, len(NAMES), (20, len(states)))
+    t0 = time.perf_counter()
+    for j in range(20):
+        states = states[rows, model[picks[j]]]
+    print(f"model turns, batched:{20 * len(states) / (time.perf_counter() - t0):12,.0f} /s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark and verify the rubix2 cube engine")
+    parser.add_argument("--sequences", type=int, default=1_000_000, help="composed from engine and model turns")
+    parser.add_argument("--engine-sequences", type=int, default=10_000, help="of those, played through RubiksCube")
+    parser.add_argument("--length", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--bench-seconds", type=float, default=1.0)
+    parser.add_argument("--no-bench", action="store_true")
+    args = parser.parse_args()
+
+    failures = verify(args.sequences, args.length, args.engine_sequences, args.seed)
+    print("oracle: " + ("all checks passed" if not failures else f"{failures} check(s) failed"))
+    if not args.no_bench:
+        bench(args.bench_seconds, args.seed)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
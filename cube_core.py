@@ -0,0 +1,273 @@
+"""Rubik's cube model used by rubix2, without any OpenGL.
+
+Cubies know their grid indices and six face colors (U, D, F, B, L, R);
+RubiksCube turns layers by permuting cubies and cycling their colors.
+rubix2 subclasses both to draw them.  Cubes are 3x3x3 unless built with
+another layer count n (rubix2 --size 2).
+"""
+import random
+
+# Define colors for faces
+WHITE = (1, 1, 1)    # Up
+YELLOW = (1, 1, 0)   # Down
+RED = (1, 0, 0)      # Front
+ORANGE = (1, 0.5, 0) # Back
+BLUE = (0, 0, 1)     # Left
+GREEN = (0, 1, 0)    # Right
+BLACK = (0, 0, 0)
+
+face_indices = {'U':0, 'D':1, 'F':2, 'B':3, 'L':4, 'R':5}
+# Outward normal of each face, in face_indices order
+NORMALS = [(0, 1, 0), (0, -1, 0), (0, 0, 1), (0, 0, -1), (-1, 0, 0), (1, 0, 0)]  # U D F B L R
+positions = [-1.05, 0, 1.05]
+
+def layer_positions(n):
+    """Centre coordinate of each of n layers, 1.05 apart around the origin."""
+    return [1.05 * (i - (n - 1) / 2) for i in range(n)]
+
+colors_list = [WHITE, YELLOW, RED, ORANGE, BLUE, GREEN]
+
+# The 18 layer turns, keyed by rubix2's keyboard bindings: (axis, layer, clockwise)
+MOVES = {
+    'U': ('y', 2, True), 'u': ('y', 2, False),
+    'M': ('y', 1, True), 'm': ('y', 1, False),
+    'D': ('y', 0, True), 'd': ('y', 0, False),
+    'L': ('x', 0, True), 'l': ('x', 0, False),
+    'E': ('x', 1, True), 'e': ('x', 1, False),
+    'R': ('x', 2, True), 'r': ('x', 2, False),
+    'F': ('z', 2, True), 'f': ('z', 2, False),
+    'S': ('z', 1, True), 's': ('z', 1, False),
+    'B': ('z', 0, True), 'b': ('z', 0, False),
+}
+
+class Cubie:
+    def __init__(self, x_idx, y_idx, z_idx, n=3):
+        self.positions = positions if n == 3 else layer_positions(n)
+        self.x_idx = x_idx
+        self.y_idx = y_idx
+        self.z_idx = z_idx
+        self.size = 0.98
+        self.colors = [BLACK]*6
+        self.set_initial_colors()
+        self.update_position()
+
+    def set_initial_colors(self):
+        self.colors = [BLACK]*6
+        last = len(self.positions) - 1
+        if self.y_idx == last: self.colors[face_indices['U']] = WHITE
+        if self.y_idx == 0: self.colors[face_indices['D']] = YELLOW
+        if self.z_idx == last: self.colors[face_indices['F']] = RED
+        if self.z_idx == 0: self.colors[face_indices['B']] = ORANGE
+        if self.x_idx == 0: self.colors[face_indices['L']] = BLUE
+        if self.x_idx == last: self.colors[face_indices['R']] = GREEN
+
+    def update_position(self):
+        self.x = self.positions[self.x_idx]
+        self.y = self.positions[self.y_idx]
+        self.z = self.positions[self.z_idx]
+
+class RubiksCube:
+    cubie_class = Cubie
+
+    def __init__(self, n=3):
+        # 3D list of cubies indexed by x_idx, y_idx, z_idx (0 to n-1)
+        self.n = n
+        self.cube = [[[self.cubie_class(x,y,z,n) for z in range(n)] for y in range(n)] for x in range(n)]
+        self.animating = False
+        self.animation_axis = None
+        self.animation_layer = None
+        self.animation_direction = 1
+        self.animation_angle = 0
+        self.animation_speed = 5
+        self.animation_cubies = []
+
+    def start_rotation(self, axis, layer, clockwise=True):
+        if self.animating:
+            return
+        self.animating = True
+        self.animation_axis = axis
+        self.animation_layer = layer
+        self.animation_direction = 1 if clockwise else -1
+        self.animation_angle = 0
+        self.animation_cubies = []
+        n = self.n
+        for x in range(n):
+            for y in range(n):
+                for z in range(n):
+                    cubie = self.cube[x][y][z]
+                    pos = {'x':x,'y':y,'z':z}[axis]
+                    if pos == layer:
+                        self.animation_cubies.append(cubie)
+
+    def update_animation(self):
+        if not self.animating:
+            return
+        self.animation_angle += self.animation_speed
+        if self.animation_angle >= 90:
+            self.animation_angle = 90
+            self.animating = False
+            self.finish_rotation()
+
+    def finish_rotation(self):
+        axis = self.animation_axis
+        layer = self.animation_layer
+        direction = self.animation_direction
+        n = self.n
+        last = n - 1
+
+        # Extract layer cubies into 2D matrix for rotation
+        matrix = [[None]*n for _ in range(n)]
+        for x in range(n):
+            for y in range(n):
+                for z in range(n):
+                    cubie = self.cube[x][y][z]
+                    pos = {'x':x,'y':y,'z':z}[axis]
+                    if pos == layer:
+                        if axis == 'x':
+                            matrix[y][last-z] = cubie
+                        elif axis == 'y':
+                            matrix[last-z][x] = cubie
+                        else:
+                            matrix[y][x] = cubie
+
+        # Rotate the matrix clockwise or anticlockwise by 90 degrees
+        if direction == 1:
+            matrix = [list(reversed(col)) for col in zip(*matrix)]
+        else:
+            matrix = [list(row) for row in zip(*matrix)][::-1]
+
+        # Update cubie indices and positions based on rotation
+        for i in range(n):
+            for j in range(n):
+                cubie = matrix[i][j]
+                if axis == 'x':
+                    cubie.x_idx = layer
+                    cubie.y_idx = i
+                    cubie.z_idx = last - j
+                elif axis == 'y':
+                    cubie.x_idx = j
+                    cubie.y_idx = layer
+                    cubie.z_idx = last - i
+                else:
+                    cubie.x_idx = j
+                    cubie.y_idx = i
+                    cubie.z_idx = layer
+                cubie.update_position()
+                self.rotate_cubie_colors(cubie, axis, direction)
+
+        # Only the turned layer moved, so write its n*n cubies back in place
+        for row in matrix:
+            for cubie in row:
+                self.cube[cubie.x_idx][cubie.y_idx][cubie.z_idx] = cubie
+
+    def rotate_cubie_colors(self, cubie, axis, direction):
+        c = cubie.colors[:]
+        if axis == 'x':
+            if direction == 1:
+                cubie.colors[0] = c[3]
+                cubie.colors[3] = c[1]
+                cubie.colors[1] = c[2]
+                cubie.colors[2] = c[0]
+                cubie.colors[4] = c[4]
+                cubie.colors[5] = c[5]
+            else:
+                cubie.colors[0] = c[2]
+                cubie.colors[2] = c[1]
+                cubie.colors[1] = c[3]
+                cubie.colors[3] = c[0]
+                cubie.colors[4] = c[4]
+                cubie.colors[5] = c[5]
+        elif axis == 'y':
+            if direction == 1:
+                cubie.colors[2] = c[4]
+                cubie.colors[5] = c[2]
+                cubie.colors[3] = c[5]
+                cubie.colors[4] = c[3]
+                cubie.colors[0] = c[0]
+                cubie.colors[1] = c[1]
+            else:
+                cubie.colors[2] = c[5]
+                cubie.colors[5] = c[3]
+                cubie.colors[3] = c[4]
+                cubie.colors[4] = c[2]
+                cubie.colors[0] = c[0]
+                cubie.colors[1] = c[1]
+        elif axis == 'z':
+            if direction == 1:
+                cubie.colors[0] = c[5]
+                cubie.colors[5] = c[1]
+                cubie.colors[1] = c[4]
+                cubie.colors[4] = c[0]
+                cubie.colors[2] = c[2]
+                cubie.colors[3] = c[3]
+            else:
+                cubie.colors[0] = c[4]
+                cubie.colors[5] = c[0]
+                cubie.colors[1] = c[5]
+                cubie.colors[4] = c[1]
+                cubie.colors[2] = c[2]
+                cubie.colors[3] = c[3]
+
+    def randomize_colors(self):
+        # Randomly reassign face colors for all cubies (for color change effect)
+        n = self.n
+        for x in range(n):
+            for y in range(n):
+                for z in range(n):
+                    cubie = self.cube[x][y][z]
+                    # Only assign colors to faces that have color (non-black) originally
+                    new_colors = []
+                    for c in cubie.colors:
+                        if c == BLACK:
+                            new_colors.append(BLACK)
+                        else:
+                            new_colors.append(random.choice(colors_list))
+                    cubie.colors = new_colors
+
+    def apply_move(self, axis, layer, clockwise=True):
+        """Turn a layer instantly, without animating it."""
+        self.animation_axis = axis
+        self.animation_layer = layer
+        self.animation_direction = 1 if clockwise else -1
+        self.finish_rotation()
+
+    def state(self):
+        """Face colors of every cubie in grid order, for comparing cubes."""
+        return tuple(c for plane in self.cube for row in plane for cubie in row for c in cubie.colors)
+
+    def set_state(self, state):
+        """Repaint every cubie from a state() tuple."""
+        it = iter(state)
+        for plane in self.cube:
+            for row in plane:
+                for cubie in row:
+                    cubie.colors = [next(it) for _ in range(6)]
+
+def quarter_turn(axis, clockwise=True):
+    """Integer rotation matrix (rows) of a layer turn about axis 'x', 'y' or
+    'z': +90 degrees when clockwise, -90 otherwise, as rubix2 animates it."""
+    a = 'xyz'.index(axis)
+    b, c = (a + 1) % 3, (a + 2) % 3
+    s = 1 if clockwise else -1
+    m = [[int(i == j) for j in range(3)] for i in range(3)]
+    m[b][b] = m[c][c] = 0
+    m[c][b], m[b][c] = s, -s
+    return tuple(tuple(row) for row in m)
+
+def slot(x, y, z, face, n=3):
+    """Index of a cubie face in RubiksCube.state()."""
+    return ((x * n + y) * n + z) * 6 + face
+
+def move_table(moves=MOVES, n=3):
+    """For each move in moves, the state() index each slot takes its color from
+    after the turn: new_state[i] == old_state[table[name][i]]."""
+    table = {}
+    for name, move in moves.items():
+        cube = RubiksCube(n)
+        for x in range(n):
+            for y in range(n):
+                for z in range(n):
+                    cube.cube[x][y][z].colors = [slot(x, y, z, f, n) for f in range(6)]
+        cube.apply_move(*move)
+        table[name] = cube.state()
+    return table
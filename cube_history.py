@@ -0,0 +1,206 @@
+"""Move history for rubix2: undo, redo, and jumping to any move.
+
+Every turn is logged as one byte, its index in the cube's move table.
+Undo plays the inverse turn (U for u and back), redo the logged one, and
+a new turn after an undo drops the turns that could have been redone.
+
+The history tracks the cube as a permutation of its sticker slots
+(cube_core.move_table), not as colors, so rubix2's recoloring does not
+disturb it: colors are looked up through a separate sticker -> color map
+when the cube is repainted.  The permutation is checkpointed every
+CHECKPOINT_EVERY moves, and a jump to move N starts from whichever of
+the checkpoint below N, the checkpoint above it or the current position
+is closest, so it never applies more than CHECKPOINT_EVERY - 1 turns
+(CHECKPOINT_EVERY / 2 once the log runs past N's next checkpoint), however
+long the session.
+
+Saved histories are the log bytes behind a small header:
+
+    python cube_history.py session.rsh     # summary of a saved history
+    python cube_history.py                 # timing over a long random session
+"""
+import argparse
+import struct
+import time
+
+import numpy as np
+
+import cube_core
+from cube_core import MOVES
+
+CHECKPOINT_EVERY = 64
+HEADER = struct.Struct("<4sBBII")  # magic, cube size, moves in the table, position, log length
+MAGIC = b"RSMH"
+
+
+class MoveHistory:
+    def __init__(self, moves=MOVES, n=3, colors=None):
+        """moves: the cube's move table, its names swapcase to their inverses;
+        colors: the cube's state() when the history starts (solved by default)."""
+        self.n = n
+        self.names = list(moves)
+        if len(self.names) > 256:
+            raise ValueError("a move must fit in a byte")
+        self.codes = {name: i for i, name in enumerate(self.names)}
+        self.inverse = [self.codes[name.swapcase()] for name in self.names]
+        tables = cube_core.move_table(moves, n)
+        slots = n * n * n * 6
+        self.dtype = np.uint8 if slots <= 256 else np.uint16
+        self.table = np.array([tables[name] for name in self.names], np.intp)
+        self.colors = list(colors if colors is not None else cube_core.RubiksCube(n).state())
+        self.log = bytearray()
+        self.pos = 0
+        self.perm = np.arange(slots)
+        self.checkpoints = [self.perm.astype(self.dtype)]
+        self.applied = 0  # turns applied by seek(), for its cost
+
+    def __len__(self):
+        return len(self.log)
+
+    # ---------- EDITING ----------
+    def push(self, name):
+        """Log a new turn at the current position, dropping any redo tail."""
+        if self.pos < len(self.log):
+            del self.log[self.pos:]
+            del self.checkpoints[self.pos // CHECKPOINT_EVERY + 1:]
+        code = self.codes[name]
+        self.log.append(code)
+        self.perm = self.perm[self.table[code]]
+        self.pos += 1
+        if self.pos % CHECKPOINT_EVERY == 0:
+            self.checkpoints.append(self.perm.astype(self.dtype))
+
+    def undo(self):
+        """The turn that undoes the last one, or None at the start."""
+        if not self.pos:
+            return None
+        self.pos -= 1
+        code = self.inverse[self.log[self.pos]]
+        self.perm = self.perm[self.table[code]]
+        return self.names[code]
+
+    def redo(self):
+        """The next logged turn, or None at the end."""
+        if self.pos == len(self.log):
+            return None
+        code = self.log[self.pos]
+        self.perm = self.perm[self.table[code]]
+        self.pos += 1
+        if self.pos % CHECKPOINT_EVERY == 0 and len(self.checkpoints) <= self.pos // CHECKPOINT_EVERY:
+            self.checkpoints.append(self.perm.astype(self.dtype))
+        return self.names[code]
+
+    # ---------- JUMPING ----------
+    def seek(self, target):
+        """Go to move target (clamped to the log) without animating; returns
+        the number of turns it took."""
+        target = max(0, min(target, len(self.log)))
+        below = target // CHECKPOINT_EVERY
+        starts = [(target - below * CHECKPOINT_EVERY, below * CHECKPOINT_EVERY, self.checkpoints[below]),
+                  (abs(target - self.pos), self.pos, self.perm)]
+        if below + 1 < len(self.checkpoints):
+            above = (below + 1) * CHECKPOINT_EVERY
+            starts.append((above - target, above, self.checkpoints[below + 1]))
+        cost, pos, perm = min(starts, key=lambda s: s[0])
+        perm = perm.astype(np.intp)
+        table, log, inverse = self.table, self.log, self.inverse
+        for i in range(pos, target):
+            perm = perm[table[log[i]]]
+        for i in range(pos - 1, target - 1, -1):
+            perm = perm[table[inverse[log[i]]]]
+        self.perm, self.pos = perm, target
+        self.applied += cost
+        return cost
+
+    # ---------- COLORS ----------
+    def state(self):
+        """The current position's face colors, in RubiksCube.state() order."""
+        colors = self.colors
+        return [colors[i] for i in self.perm]
+
+    def recolor(self, state):
+        """The cube was repainted; remember its stickers' new colors."""
+        for i, color in zip(self.perm, state):
+            self.colors[i] = color
+
+    # ---------- FILES ----------
+    def save(self, path):
+        with open(path, "wb") as f:
+            f.write(HEADER.pack(MAGIC, self.n, len(self.names), self.pos, len(self.log)) + bytes(self.log))
+
+    def load(self, path):
+        """Replace the history with a saved one and go to its saved position
+        (the cube starts solved); returns that position."""
+        with open(path, "rb") as f:
+            data = f.read()
+        if len(data) < HEADER.size:
+            raise ValueError(f"{path} is not a {self.n}x{self.n}x{self.n} move history")
+        magic, n, names, pos, count = HEADER.unpack_from(data)
+        log = data[HEADER.size:HEADER.size + count]
+        if magic != MAGIC or n != self.n or names != len(self.names) or len(log) != count or pos > count:
+            raise ValueError(f"{path} is not a {self.n}x{self.n}x{self.n} move history")
+        if log and max(log) >= names:
+            raise ValueError(f"{path} has a move outside the move table")
+        self.log = bytearray()
+        self.pos = 0
+        self.perm = np.arange(len(self.perm))
+        del self.checkpoints[1:]
+        for code in log:
+            self.push(self.names[code])
+        self.seek(pos)
+        return pos
+
+
+def bench(moves=100_000, jumps=2000, seed=0):
+    rng = np.random.default_rng(seed)
+    history = MoveHistory()
+    names = history.names
+    t = time.perf_counter()
+    for code in rng.integers(0, len(names), moves).tolist():
+        history.push(names[code])
+    push = (time.perf_counter() - t) / moves
+    targets = rng.integers(0, moves + 1, jumps).tolist()
+    history.applied = 0
+    t = time.perf_counter()
+    for target in targets:
+        history.seek(target)
+    seek = (time.perf_counter() - t) / jumps
+    # the same jumps replayed from a solved cube, for a check
+    cube = cube_core.RubiksCube()
+    for code in history.log[:targets[-1]]:
+        cube.apply_move(*MOVES[names[code]])
+    ok = tuple(history.state()) == cube.state()
+    checkpoint_bytes = sum(c.nbytes for c in history.checkpoints)
+    print(f"{moves:,} moves: push {1e6 * push:.1f} us; {jumps} random jumps {1e6 * seek:.0f} us each, "
+          f"{history.applied / jumps:.1f} turns on average (at most {CHECKPOINT_EVERY - 1}); "
+          f"log {len(history.log) / 1024:.0f} KB + checkpoints {checkpoint_bytes / 1024:.0f} KB; "
+          f"engine agrees: {ok}")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect or time rubix2 move histories")
+    parser.add_argument("path", nargs="?", help="a saved history to summarize")
+    args = parser.parse_args()
+    if args.path is None:
+        raise SystemExit(0 if bench() else 1)
+    try:
+        with open(args.path, "rb") as f:
+            header = f.read(HEADER.size)
+        if len(header) < HEADER.size:
+            raise ValueError(f"{args.path} is not a move history")
+        if HEADER.unpack(header)[1] == 2:
+            import cube2
+            history = MoveHistory(cube2.MOVES, 2)
+        else:
+            history = MoveHistory()
+        pos = history.load(args.path)
+    except (OSError, ValueError) as e:
+        parser.error(str(e))
+    counts = np.bincount(np.frombuffer(bytes(history.log), np.uint8), minlength=len(history.names))
+    print(f"{args.path}: {len(history)} moves, at move {pos}; "
+          + " ".join(f"{name}:{c}" for name, c in zip(history.names, counts) if c))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,226 @@
+"""Mouse picking for rubix2, computed analytically without touching OpenGL.
+
+The view matrix is rebuilt on the CPU from the same calls rubix2 makes
+(gluPerspective, glTranslatef, glRotatef), inverted once per view change,
+and each mouse position is unprojected into a ray in cube space.  The ray
+is clipped against the cube's bounding box (slab test) to find the face
+and sticker under the cursor.  Dragging across that face then picks the
+layer: the in-plane axis the drag follows most, and the turn direction
+that moves the grabbed sticker along the drag.  No selection buffer or
+pixel readback, so nothing waits on the GPU; a pick is a few microseconds
+and does not depend on the cube's size.
+
+    python cube_pick.py      # self-check and timing
+"""
+import math
+import time
+
+import numpy as np
+
+import cube_core
+
+AXES = "xyz"
+
+
+# ---------- MATRICES (same as the GL calls) ----------
+def perspective(fovy, aspect, near, far):
+    f = 1 / math.tan(math.radians(fovy) / 2)
+    return np.array([[f / aspect, 0, 0, 0],
+                     [0, f, 0, 0],
+                     [0, 0, (far + near) / (near - far), 2 * far * near / (near - far)],
+                     [0, 0, -1, 0]])
+
+
+def translation(x, y, z):
+    m = np.eye(4)
+    m[:3, 3] = x, y, z
+    return m
+
+
+def gl_rotation(angle, x, y, z):
+    """glRotatef: angle degrees, right-handed about (x, y, z)."""
+    x, y, z = np.array([x, y, z], float) / math.sqrt(x * x + y * y + z * z)
+    c, s = math.cos(math.radians(angle)), math.sin(math.radians(angle))
+    m = np.eye(4)
+    m[:3, :3] = [[x * x * (1 - c) + c, x * y * (1 - c) - z * s, x * z * (1 - c) + y * s],
+                 [y * x * (1 - c) + z * s, y * y * (1 - c) + c, y * z * (1 - c) - x * s],
+                 [x * z * (1 - c) - y * s, y * z * (1 - c) + x * s, z * z * (1 - c) + c]]
+    return m
+
+
+class Hit:
+    __slots__ = ("point", "axis", "sign", "cell")
+
+    def __init__(self, point, axis, sign, cell):
+        self.point = point  # where the ray meets the cube, in cube space
+        self.axis = axis    # 0, 1, 2: the face's normal axis
+        self.sign = sign    # +1 or -1: which of the two faces on that axis
+        self.cell = cell    # (x_idx, y_idx, z_idx) of the cubie owning the sticker
+
+
+class Picker:
+    def __init__(self, size=3, spacing=1.05, cubie=0.98):
+        self.n = size
+        self.half = spacing * (size - 1) / 2 + cubie / 2
+        self.inverse = None
+        self.viewport = (1, 1)
+        self._key = None
+
+    def set_view(self, matrix, viewport, key=None):
+        """matrix maps cube space to clip space. key (e.g. the view angles)
+        skips the inversion when the view has not changed."""
+        if key is None or key != self._key:
+            self.inverse = np.linalg.inv(matrix)
+            self._key = key
+        self.viewport = viewport
+
+    def ray(self, mx, my):
+        """Origin and direction, in cube space, of the ray under pixel (mx, my)."""
+        w, h = self.viewport
+        x, y = 2 * mx / w - 1, 1 - 2 * my / h
+        near = self.inverse @ (x, y, -1, 1)
+        far = self.inverse @ (x, y, 1, 1)
+        near = near[:3] / near[3]
+        far = far[:3] / far[3]
+        return near, far - near
+
+    def pick(self, mx, my):
+        """The sticker under the cursor, or None."""
+        origin, d = self.ray(mx, my)
+        h = self.half
+        t_in, t_out, axis = -math.inf, math.inf, -1
+        for a in range(3):
+            o, da = origin[a], d[a]
+            if abs(da) < 1e-12:
+                if abs(o) > h:
+                    return None
+                continue
+            t0, t1 = (-h - o) / da, (h - o) / da
+            if t0 > t1:
+                t0, t1 = t1, t0
+            if t0 > t_in:
+                t_in, axis = t0, a
+            t_out = min(t_out, t1)
+        if t_in > t_out or t_out < 0 or axis < 0:
+            return None
+        point = origin + d * t_in
+        sign = 1 if point[axis] > 0 else -1
+        cell = [self._index(point[a]) for a in range(3)]
+        cell[axis] = self.n - 1 if sign > 0 else 0
+        return Hit(point, axis, sign, tuple(cell))
+
+    def _index(self, c):
+        i = int((c + self.half) / (2 * self.half) * self.n)
+        return min(self.n - 1, max(0, i))
+
+    def on_face(self, hit, mx, my):
+        """Where the cursor's ray crosses the plane of hit's face."""
+        origin, d = self.ray(mx, my)
+        a = hit.axis
+        if abs(d[a]) < 1e-12:
+            return None
+        t = (hit.sign * self.half - origin[a]) / d[a]
+        return origin + d * t
+
+    def turn(self, hit, mx, my, threshold=0.3):
+        """(axis, layer, clockwise) once the drag from hit has moved threshold
+        units across the face, else None.  clockwise is +90 degrees about
+        the axis, as in cube_core.MOVES."""
+        p = self.on_face(hit, mx, my)
+        if p is None:
+            return None
+        drag = p - hit.point
+        a = hit.axis
+        b = max((i for i in range(3) if i != a), key=lambda i: abs(drag[i]))
+        if abs(drag[b]) < threshold:
+            return None
+        r = 3 - a - b
+        # velocity along b of the grabbed point under a +90 degree turn about r:
+        # (e_r x p)_b = +-p_a, positive when (b, r, a) is a cyclic order
+        along = hit.point[a] if (r - b) % 3 == 1 else -hit.point[a]
+        return AXES[r], hit.cell[r], along * drag[b] > 0
+
+
+def view_matrix(rx, ry, display=(900, 700)):
+    """rubix2's view: what its glu/gl calls leave on the modelview stack."""
+    return (perspective(45, display[0] / display[1], 0.1, 50) @ translation(0, 0, -15)
+            @ gl_rotation(20, 2, 1, 0) @ gl_rotation(rx, 1, 0, 0) @ gl_rotation(ry, 0, 1, 0))
+
+
+# ---------- SELF-CHECK ----------
+
+def _project(matrix, p, display):
+    c = matrix @ (*p, 1)
+    x, y = c[0] / c[3], c[1] / c[3]
+    return (x + 1) / 2 * display[0], (1 - y) / 2 * display[1]
+
+
+def check(views=200, seed=0):
+    """Sticker centres projected to the screen must pick back to themselves,
+    and dragging along a face must turn the grabbed sticker along the drag."""
+    rng = np.random.default_rng(seed)
+    display = (900, 700)
+    picker = Picker()
+    centres = (-1.05, 0.0, 1.05)
+    picks = wrong = turns = wrong_turns = 0
+    for _ in range(views):
+        rx, ry = rng.uniform(-180, 180, 2)
+        m = view_matrix(rx, ry, display)
+        picker.set_view(m, display)
+        cam = np.linalg.inv(m) @ (0, 0, -1, 1)
+        cam = cam[:3] / cam[3]  # centre of the near plane, next to the eye
+        for a in range(3):
+            others = [i for i in range(3) if i != a]
+            for sign in (-1, 1):
+                normal = np.zeros(3)
+                normal[a] = sign
+                for u in range(3):
+                    for v in range(3):
+                        p = np.zeros(3)
+                        p[others[0]], p[others[1]] = centres[u], centres[v]
+                        p[a] = sign * picker.half
+                        if (cam - p) @ normal <= 0.2:
+                            continue  # face seen edge-on or from behind
+                        picks += 1
+                        hit = picker.pick(*_project(m, p, display))
+                        cell = [1, 1, 1]
+                        cell[others[0]], cell[others[1]] = u, v
+                        cell[a] = 2 if sign > 0 else 0
+                        if hit is None or hit.cell != tuple(cell) or hit.axis != a:
+                            wrong += 1
+                            continue
+                        for b in others:
+                            step = np.zeros(3)
+                            step[b] = rng.choice((-1, 1)) * 0.6
+                            turn = picker.turn(hit, *_project(m, p + step, display))
+                            if turn is None:
+                                continue
+                            turns += 1
+                            axis, layer, clockwise = turn
+                            moved = np.array(cube_core.quarter_turn(axis, clockwise)) @ p - p
+                            if layer != cell[AXES.index(axis)] or moved @ step <= 0:
+                                wrong_turns += 1
+    print(f"{picks} sticker picks, {wrong} wrong; {turns} drags, {wrong_turns} turned the wrong way")
+    return wrong + wrong_turns
+
+
+def bench(n=20000):
+    display = (900, 700)
+    picker = Picker()
+    picker.set_view(view_matrix(30, 40), display)
+    xy = np.random.default_rng(1).uniform((0, 0), display, (n, 2)).tolist()
+    t = time.perf_counter()
+    for mx, my in xy:
+        picker.pick(mx, my)
+    per = (time.perf_counter() - t) / n
+    hit = next(h for h in map(lambda p: picker.pick(*p), xy) if h is not None)
+    t = time.perf_counter()
+    for mx, my in xy:
+        picker.turn(hit, mx, my)
+    print(f"pick {1e6 * per:.1f} us, drag-to-turn {1e6 * (time.perf_counter() - t) / n:.1f} us per mouse event")
+
+
+if __name__ == "__main__":
+    failures = check()
+    bench()
+    raise SystemExit(1 if failures else 0)
@@ -0,0 +1,350 @@
+"""Scramble races between rubix2 instances (or bots) over TCP.
+
+A relay server groups players into races as they connect.  Each race
+starts with a seed from which every side builds the same scramble, and
+from then on the players send nothing but their own turns: two bytes
+each, a type and the turn's index in the move table.  The server relays
+every message to the other players in the race, with the sender's
+number inserted.  Each side turns a mirrored cube per opponent with the
+same move engine, so the cubes stay in lockstep.  Every CHECK_EVERY
+turns a player also sends a crc32 of its cube, which the mirrors verify.
+
+    python cube_race.py server --players 2
+    python rubix2.py --race 127.0.0.1          # in two windows, or one and:
+    python cube_race.py bots --count 1 --tps 2
+    python cube_race.py bots --count 200 --tps 10     # load test (server --quiet)
+
+Messages, client to server (the server relays them with the sender's
+number after the type byte):
+
+    JOIN   type, protocol version
+    MOVE   type, move code
+    CHECK  type, turns so far, crc32 of the cube after them
+    DONE   type, turns, milliseconds from the start to the solving turn
+
+and server to client: START (your number, players, cube size, seed) and
+LEFT (a player disconnected).
+"""
+import argparse
+import asyncio
+import random
+import socket
+import struct
+import threading
+import time
+import zlib
+
+import numpy as np
+
+import cube_core
+import cube_history
+from cube_core import BLACK, colors_list
+
+PORT = 47810
+VERSION = 1
+SCRAMBLE_LENGTH = 25
+CHECK_EVERY = 16
+REPORT_EVERY = 5.0
+
+MSG_JOIN, MSG_START, MSG_MOVE, MSG_CHECK, MSG_DONE, MSG_LEFT = range(1, 7)
+JOIN = struct.Struct("<BB")       # type, protocol version
+MOVE = struct.Struct("<BB")       # type, move code
+CHECK = struct.Struct("<BII")     # type, turns so far, crc32 of the cube
+DONE = struct.Struct("<BII")      # type, turns, milliseconds
+START = struct.Struct("<BBBBI")   # type, your number, players, cube size, seed
+LEFT = struct.Struct("<BB")       # type, player
+CLIENT_SIZES = {MSG_MOVE: MOVE.size, MSG_CHECK: CHECK.size, MSG_DONE: DONE.size}
+RELAYED = {MSG_MOVE: struct.Struct("<BBB"), MSG_CHECK: struct.Struct("<BBII"), MSG_DONE: struct.Struct("<BBII")}
+SERVER_FORMATS = {MSG_START: START, MSG_LEFT: LEFT, **RELAYED}
+
+_COLOR_INDEX = {color: i for i, color in enumerate(colors_list + [BLACK])}
+
+
+def move_table(size):
+    if size == 2:
+        import cube2
+        return cube2.MOVES
+    return cube_core.MOVES
+
+
+def scramble(seed, names, length=SCRAMBLE_LENGTH):
+    """The race's scramble, the same on every side."""
+    return random.Random(seed).choices(names, k=length)
+
+
+def state_crc(state):
+    """crc32 of a RubiksCube.state(), colors as their index."""
+    return zlib.crc32(bytes(_COLOR_INDEX[color] for color in state))
+
+
+def nodelay(sock):
+    sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+
+# ---------- SERVER ----------
+class Race:
+    def __init__(self, number, seed):
+        self.number, self.seed = number, seed
+        self.writers = []
+        self.started = asyncio.Event()
+        self.results = {}  # player -> (turns, ms), or None if they left first
+
+    def relay(self, player, packet):
+        for i, writer in enumerate(self.writers):
+            if i != player and writer is not None:
+                writer.write(packet)
+
+    @property
+    def over(self):
+        return len(self.results) == len(self.writers)
+
+
+class RaceServer:
+    def __init__(self, players=2, size=3, seed=None, quiet=False):
+        self.players, self.size, self.quiet = players, size, quiet
+        self.rng = random.Random(seed)
+        self.lobby = None
+        self.races = 0
+        self.clients = 0
+        self.stats = {"messages": 0, "bytes": 0, "finished": 0}
+
+    def join(self, writer):
+        if self.lobby is None:
+            self.races += 1
+            self.lobby = Race(self.races, self.rng.getrandbits(32))
+        race = self.lobby
+        race.writers.append(writer)
+        if len(race.writers) == self.players:
+            for i, w in enumerate(race.writers):
+                w.write(START.pack(MSG_START, i, self.players, self.size, race.seed))
+            race.started.set()
+            self.lobby = None
+        return race
+
+    async def handle(self, reader, writer):
+        nodelay(writer.get_extra_info("socket"))
+        race = player = None
+        self.clients += 1
+        try:
+            kind, version = JOIN.unpack(await reader.readexactly(JOIN.size))
+            if kind != MSG_JOIN or version != VERSION:
+                return
+            race = self.join(writer)
+            # watch the socket while in the lobby, so a player who quits frees their place
+            started = asyncio.ensure_future(race.started.wait())
+            head = asyncio.ensure_future(reader.read(1))
+            try:
+                await asyncio.wait((started, head), return_when=asyncio.FIRST_COMPLETED)
+            finally:
+                started.cancel()
+            if not race.started.is_set():
+                head.cancel()
+                return  # gone, or sent a message before the start
+            player = race.writers.index(writer)
+            head = await head
+            while head:
+                kind = head[0]
+                size = CLIENT_SIZES.get(kind)
+                if size is None:
+                    return
+                rest = await reader.readexactly(size - 1)
+                race.relay(player, bytes((kind, player)) + rest)
+                self.stats["messages"] += 1
+                self.stats["bytes"] += size + 1
+                if kind == MSG_DONE and player not in race.results:
+                    race.results[player] = DONE.unpack(bytes((kind,)) + rest)[1:]
+                    self.finish(race)
+                head = await reader.read(1)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            self.clients -= 1
+            if race is not None:
+                if not race.started.is_set():
+                    race.writers.remove(writer)  # still in the lobby: the place goes to the next player
+                else:
+                    race.writers[player] = None
+                    race.relay(player, LEFT.pack(MSG_LEFT, player))
+                    if player not in race.results:
+                        race.results[player] = None
+                        self.finish(race)
+            writer.close()
+
+    def finish(self, race):
+        if not race.over:
+            return
+        self.stats["finished"] += 1
+        if self.quiet:
+            return
+        ranked = sorted(race.results.items(), key=lambda r: r[1][1] if r[1] else float("inf"))
+        places = []
+        for p, result in ranked:
+            if result is None:
+                places.append(f"player {p + 1}: left")
+            else:
+                places.append(f"player {p + 1}: {result[1] / 1000:.2f} s, {result[0]} turns")
+        print(f"[race {race.number}] " + ", ".join(places))
+
+    async def report(self):
+        while True:
+            await asyncio.sleep(REPORT_EVERY)
+            s = self.stats
+            if s["messages"] or self.clients:
+                print(f"[race server] {self.clients} players, {self.races} races started, "
+                      f"{s['finished']} finished; {s['messages'] / REPORT_EVERY:.0f} messages/s relayed, "
+                      f"{s['bytes'] / REPORT_EVERY / 1024:.1f} KB/s")
+            self.stats = dict.fromkeys(s, 0)
+
+
+async def serve(host, port, players, size, seed=None, quiet=False):
+    server = RaceServer(players, size, seed, quiet)
+    listener = await asyncio.start_server(server.handle, host, port)
+    print(f"race server on {host}:{port}: {players} players a race, {size}x{size}x{size}")
+    async with listener:
+        await asyncio.gather(listener.serve_forever(), server.report())
+
+
+# ---------- RUBIX2 CLIENT ----------
+class RaceClient:
+    """rubix2's connection: sends from the caller's thread and reads on its
+    own, handing deliver(message, arrival time) each decoded message, or
+    None once the connection is gone."""
+
+    def __init__(self, host, port, deliver):
+        self.sock = socket.create_connection((host, port))
+        nodelay(self.sock)
+        self.sock.sendall(JOIN.pack(MSG_JOIN, VERSION))
+        self.thread = threading.Thread(target=self._read, args=(deliver,), daemon=True)
+        self.thread.start()
+
+    def _read(self, deliver):
+        buf = b""
+        try:
+            while True:
+                data = self.sock.recv(4096)
+                if not data:
+                    break
+                now = time.perf_counter()
+                buf += data
+                while buf:
+                    fmt = SERVER_FORMATS.get(buf[0])
+                    if fmt is None:
+                        raise ConnectionError(f"unknown message type {buf[0]}")
+                    if len(buf) < fmt.size:
+                        break
+                    deliver(fmt.unpack_from(buf), now)
+                    buf = buf[fmt.size:]
+        except OSError:
+            pass
+        deliver(None, time.perf_counter())
+
+    def send_move(self, code):
+        self.sock.sendall(MOVE.pack(MSG_MOVE, code))
+
+    def send_check(self, turns, crc):
+        self.sock.sendall(CHECK.pack(MSG_CHECK, turns, crc))
+
+    def send_done(self, turns, ms):
+        self.sock.sendall(DONE.pack(MSG_DONE, turns, ms))
+
+    def close(self):
+        self.sock.close()
+
+
+# ---------- BOTS ----------
+async def bot(host, port, tps, stats, sent):
+    """One headless racer: it solves by undoing the scramble at about tps
+    turns a second, mirrors its opponents and checks their crcs."""
+    reader, writer = await asyncio.open_connection(host, port)
+    nodelay(writer.get_extra_info("socket"))
+    writer.write(JOIN.pack(MSG_JOIN, VERSION))
+    _, me, players, size, seed = START.unpack(await reader.readexactly(START.size))
+    moves = move_table(size)
+    names = list(moves)
+    codes = {name: i for i, name in enumerate(names)}
+    mixed = scramble(seed, names)
+    cubes = {}
+    for p in range(players):
+        cubes[p] = cube_history.MoveHistory(moves, size)
+        for name in mixed:
+            cubes[p].push(name)
+    turns = dict.fromkeys(cubes, 0)
+    waiting = set(cubes) - {me}
+    rng = random.Random(seed + me)
+    start = time.perf_counter()
+
+    async def listen():
+        while waiting:
+            try:
+                head = await reader.readexactly(1)
+                fmt = SERVER_FORMATS[head[0]]
+                msg = fmt.unpack(head + await reader.readexactly(fmt.size - 1))
+            except (asyncio.IncompleteReadError, ConnectionError):
+                return
+            kind, p = msg[0], msg[1]
+            if kind == MSG_MOVE:
+                cubes[p].push(names[msg[2]])
+                turns[p] += 1
+                stats["mirrored"] += 1
+                at = sent.get((seed, p, turns[p]))  # only other bots' turns have a send time here
+                if at is not None:
+                    stats["latency"].append(time.perf_counter() - at)
+            elif kind == MSG_CHECK:
+                stats["checks"] += 1
+                stats["desyncs"] += msg[2] != turns[p] or msg[3] != state_crc(cubes[p].state())
+            elif kind in (MSG_DONE, MSG_LEFT):
+                waiting.discard(p)
+
+    async def play():
+        for name in [name.swapcase() for name in reversed(mixed)]:
+            await asyncio.sleep(rng.expovariate(tps))
+            cubes[me].push(name)
+            turns[me] += 1
+            sent[seed, me, turns[me]] = time.perf_counter()
+            writer.write(MOVE.pack(MSG_MOVE, codes[name]))
+            if turns[me] % CHECK_EVERY == 0:
+                writer.write(CHECK.pack(MSG_CHECK, turns[me], state_crc(cubes[me].state())))
+        assert cubes[me].state() == list(cube_core.RubiksCube(size).state())
+        writer.write(DONE.pack(MSG_DONE, turns[me], int(1000 * (time.perf_counter() - start))))
+        stats["solved"] += 1
+
+    await asyncio.gather(play(), listen())
+    writer.close()
+
+
+async def bots(host, port, count, tps):
+    stats = {"latency": [], "mirrored": 0, "checks": 0, "desyncs": 0, "solved": 0}
+    sent = {}  # (seed, player, turn) -> when it was sent, for the bots that mirror it
+    t = time.perf_counter()
+    await asyncio.gather(*(bot(host, port, tps, stats, sent) for _ in range(count)))
+    ms = 1000 * np.array(stats["latency"])
+    p = np.percentile(ms, (50, 95, 99)) if len(ms) else (0, 0, 0)
+    print(f"[bots] {stats['solved']}/{count} solved in {time.perf_counter() - t:.1f} s; "
+          f"{stats['mirrored']:,} opponent turns mirrored; relay latency between bots p50 {p[0]:.2f} / p95 {p[1]:.2f} / "
+          f"p99 {p[2]:.2f} / max {ms.max(initial=0):.2f} ms; {stats['checks']} crc checks, "
+          f"{stats['desyncs']} desynced")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Scramble races between rubix2 instances")
+    parser.add_argument("mode", choices=("server", "bots"))
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--players", type=int, default=2, help="players in each race")
+    parser.add_argument("--size", type=int, choices=(2, 3), default=3)
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--quiet", action="store_true", help="no line per finished race")
+    parser.add_argument("--count", type=int, default=1, help="bots to run")
+    parser.add_argument("--tps", type=float, default=2.0, help="each bot's turns per second")
+    args = parser.parse_args()
+    try:
+        if args.mode == "server":
+            asyncio.run(serve(args.host, args.port, args.players, args.size, args.seed, args.quiet))
+        else:
+            asyncio.run(bots(args.host, args.port, args.count, args.tps))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
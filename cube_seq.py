@@ -0,0 +1,361 @@
+"""Move sequences over rubix2's 18 layer turns: canonical forms and hashes.
+
+Sequences use rubix2's key names (cube_core.MOVES): upper case is a
+clockwise quarter turn, lower case its inverse, and spaces are optional.
+A "2" after a move doubles it and a "'" inverts it, so "U2 r' M" reads
+as U U R M; "U2'" and "U'2" are half turns too.  canonical() rewrites a sequence without changing what it
+does to the cube:
+
+- turns about one axis commute, so every run of them collapses to a net
+  quarter-turn count per layer, written in layer order (D before M before
+  U); inverse pairs cancel, repeats merge into half turns, and runs that
+  cancel to nothing vanish, letting the turns on either side meet
+  (U R r u is empty);
+- with slices=False a slice turn (M, E, S) becomes its two outer turns
+  plus a turn of the whole cube.  That cube turn is carried through the
+  rest of the sequence, relabelling the turns after it, and dropped at
+  the end, so the result keeps the centers fixed and says only where the
+  other pieces go relative to them.  Sequences that differ only in how
+  the cube ends up held then reach the same state.
+
+Sequence hashes are of the canonical form.  State hashes are of the
+visible sticker colors it leaves, which are computed for whole batches
+of sequences at once.  stream() reads sequences one per line, in batches,
+and writes each one's canonical form, optionally with both hashes or
+without duplicates by either hash.  Memory stays bounded by the batch
+and a fixed-size table of seen hashes:
+
+    python cube_seq.py algs.txt -o canonical.txt --dedupe state
+    python cube_seq.py                  # self-check and timing on random sequences
+"""
+import argparse
+import hashlib
+import io
+import re
+import sys
+import time
+from itertools import chain, islice
+
+import numpy as np
+
+import cube_core
+from cube_core import MOVES, colors_list
+
+NAMES = list(MOVES)
+CODES = {name: i for i, name in enumerate(NAMES)}
+INVERSE = [CODES[name.swapcase()] for name in NAMES]
+AXIS = ["xyz".index(MOVES[name][0]) for name in NAMES]
+LAYER = [MOVES[name][1] for name in NAMES]
+QUARTERS = [1 if MOVES[name][2] else 3 for name in NAMES]  # clockwise quarter turns, mod 4
+CLOCKWISE = {(AXIS[c], LAYER[c]): c for c in range(len(NAMES)) if QUARTERS[c] == 1}
+
+_tables = cube_core.move_table()
+TABLE = np.array([_tables[name] for name in NAMES], np.uint8)  # new_state[i] == old_state[TABLE[code][i]]
+_solved = np.array([colors_list.index(c) if c in colors_list else len(colors_list)
+                    for c in cube_core.RubiksCube().state()], np.uint8)
+VISIBLE = np.flatnonzero(_solved != len(colors_list))  # the 54 stickers; the rest are black insides
+SOLVED = _solved[VISIBLE]
+
+# Canonical forms are written in words: the 18 quarter turns (same codes as
+# NAMES) and then the 9 half turns; WORD_TABLE is TABLE on the visible
+# stickers only (turns never move one inside), with a row per word.
+WORD_NAMES = NAMES + [NAMES[c] + "2" for c in CLOCKWISE.values()]
+HALF = {c: len(NAMES) + i for i, c in enumerate(CLOCKWISE.values())}
+_visible = np.full(len(_solved), -1, np.intp)
+_visible[VISIBLE] = np.arange(len(VISIBLE))
+WORD_TABLE = np.array([_visible[TABLE[c][VISIBLE]] for c in range(len(NAMES))]
+                      + [_visible[TABLE[c][TABLE[c]][VISIBLE]] for c in CLOCKWISE.values()], np.uint8)
+# A run of turns about one axis is a block: axis * 64 plus the net clockwise
+# quarter turns of layers 0, 1 and 2 as base-4 digits.  STEP[block][code] is
+# the block after one more turn about its axis (a multiple of 64 once it
+# cancels out), BLOCK[code] the block a turn starts, WORDS[block] its words.
+_DIGIT = [16, 4, 1]
+STEP = [[(block & ~(3 * _DIGIT[LAYER[c]]))
+         + (block // _DIGIT[LAYER[c]] + QUARTERS[c]) % 4 * _DIGIT[LAYER[c]] for c in range(len(NAMES))]
+        for block in range(3 * 64)]
+BLOCK = [AXIS[c] * 64 + QUARTERS[c] * _DIGIT[LAYER[c]] for c in range(len(NAMES))]
+WORDS = [tuple({1: c, 2: HALF[c], 3: INVERSE[c]}[block // _DIGIT[layer] % 4]
+               for layer, c in ((layer, CLOCKWISE[block // 64, layer]) for layer in range(3))
+               if block // _DIGIT[layer] % 4)
+         for block in range(3 * 64)]
+
+TOKEN = re.compile(r"(\S)(2'?|'2?)?")
+BATCH = 65536
+UNIQUE = 1 << 23  # slots in the table of seen hashes (64 MB); it holds up to 3/4 as many
+
+
+# ---------- WHOLE-CUBE TURNS ----------
+def _rotations():
+    """The 24 whole-cube turns as slot permutations; their products; how
+    each relabels each turn; and each slice turn's outer turns and cube turn."""
+    table = TABLE.astype(np.intp)
+    identity = np.arange(table.shape[1])
+    quarter = []
+    for axis in range(3):
+        p = identity
+        for layer in range(3):
+            p = p[table[CLOCKWISE[axis, layer]]]
+        quarter.append(p)
+    rotations, index = [identity], {identity.tobytes(): 0}
+    for p in rotations:
+        for q in quarter:
+            r = p[q]
+            if r.tobytes() not in index:
+                index[r.tobytes()] = len(rotations)
+                rotations.append(r)
+    assert len(rotations) == 24
+    product = [[index[a[b].tobytes()] for b in rotations] for a in rotations]
+    # a cube turn r then the turn m is the turn conjugate[r][m] then r
+    moves = {table[c].tobytes(): c for c in range(len(NAMES))}
+    conjugate = []
+    for r in rotations:
+        inverse = np.argsort(r)
+        conjugate.append([moves[r[table[m]][inverse].tobytes()] for m in range(len(NAMES))])
+    # a slice turn is its outer layers turned back, then the whole cube turned
+    split = {}
+    for c in range(len(NAMES)):
+        if LAYER[c] == 1:
+            outer = [CLOCKWISE[AXIS[c], 0], CLOCKWISE[AXIS[c], 2]]
+            if QUARTERS[c] == 1:
+                outer = [INVERSE[o] for o in outer]
+            turn = quarter[AXIS[c]] if QUARTERS[c] == 1 else quarter[AXIS[c]][quarter[AXIS[c]]][quarter[AXIS[c]]]
+            assert (table[outer[0]][table[outer[1]]][turn] == table[c]).all()
+            split[c] = (outer, index[turn.tobytes()])
+    return np.array([_visible[r[VISIBLE]] for r in rotations], np.uint8), product, conjugate, split
+
+
+ROTATIONS, PRODUCT, CONJUGATE, SPLIT = _rotations()
+
+
+# ---------- SEQUENCES ----------
+_BLANKS = str.maketrans("", "", " \t\r\n")
+
+
+def parse(text):
+    """Move codes of a sequence written with rubix2's key names."""
+    if "2" not in text and "'" not in text:
+        try:
+            return [CODES[name] for name in text.translate(_BLANKS)]
+        except KeyError:
+            pass  # the slow path names the bad move
+    codes = []
+    for name, suffix in TOKEN.findall(text):
+        code = CODES.get(name)
+        if code is None:
+            raise ValueError(f"unknown move {name!r}")
+        if suffix == "'":
+            code = INVERSE[code]
+        codes.append(code)
+        if len(suffix) > 1 or suffix == "2":  # a half turn is its own inverse: U2' = U'2 = U2
+            codes.append(code)
+    return codes
+
+
+def reduce(codes, slices=True):
+    """Canonical blocks (see STEP) of a code sequence, and the whole-cube
+    turn left over (always 0 with slices)."""
+    rotation = 0
+    if not slices:
+        codes, rotation = _outer(codes)
+    blocks = []
+    top = -1
+    for code in codes:
+        if top >> 6 == AXIS[code]:
+            top = STEP[top][code]
+            if top & 63:
+                blocks[-1] = top
+            else:
+                blocks.pop()
+                top = blocks[-1] if blocks else -1
+        else:
+            top = BLOCK[code]
+            blocks.append(top)
+    return blocks, rotation
+
+
+def _outer(codes):
+    """The codes with every slice turn split and the turns after it
+    relabelled, and the whole-cube turn left at the end."""
+    rotated = []
+    rotation = 0
+    for code in codes:
+        code = CONJUGATE[rotation][code]
+        if LAYER[code] == 1:
+            outer, turn = SPLIT[code]
+            rotation = PRODUCT[turn][rotation]
+            rotated.extend(outer)
+        else:
+            rotated.append(code)
+    return rotated, rotation
+
+
+def canonical(codes, slices=True):
+    """Canonical form of a code sequence, as words (see WORD_NAMES)."""
+    return list(chain.from_iterable(map(WORDS.__getitem__, reduce(codes, slices)[0])))
+
+
+def to_text(words):
+    return " ".join(map(WORD_NAMES.__getitem__, words))
+
+
+# ---------- HASHES ----------
+def final_states(sequences, start=SOLVED):
+    """Visible stickers after each word sequence, applied to start (one row
+    per sequence).  Rows are sorted longest first so that step t only
+    touches the rows still turning, and the words stay flat, so memory
+    follows the total number of moves."""
+    lengths = np.fromiter(map(len, sequences), np.intp, len(sequences))
+    order = np.argsort(-lengths, kind="stable")
+    flat = np.fromiter(chain.from_iterable(sequences[i] for i in order), np.intp, int(lengths.sum()))
+    starts = np.concatenate(([0], np.cumsum(lengths[order])[:-1])).astype(np.intp)
+    remaining = -lengths[order]  # ascending, for searchsorted
+    width = len(start)
+    states = np.tile(start, (len(sequences), 1))
+    rows = np.arange(len(sequences), dtype=np.intp)[:, None] * width
+    for t in range(int(lengths.max(initial=0))):
+        k = int(np.searchsorted(remaining, -t))  # rows with more than t moves
+        states[:k] = states.ravel()[rows[:k] + WORD_TABLE[flat[starts[:k] + t]]]
+    out = np.empty_like(states)
+    out[order] = states
+    return out
+
+
+def sequence_hashes(sequences):
+    return np.frombuffer(b"".join(hashlib.blake2b(bytes(s), digest_size=8).digest() for s in sequences), "<u8")
+
+
+def state_hashes(sequences):
+    colors = final_states(sequences)
+    return np.frombuffer(b"".join(hashlib.blake2b(row.tobytes(), digest_size=8).digest() for row in colors), "<u8")
+
+
+class HashSet:
+    """Open-addressing set of 64-bit hashes in a fixed numpy table, filled a
+    batch at a time."""
+
+    def __init__(self, slots=UNIQUE):
+        self.table = np.zeros(1 << (slots - 1).bit_length(), np.uint64)
+        self.mask = np.uint64(len(self.table) - 1)
+        self.limit = len(self.table) * 3 // 4
+        self.count = 0
+
+    def add(self, keys):
+        """Add a batch of hashes; True for each one not seen before (only the
+        first of a repeated hash within the batch)."""
+        keys = np.where(keys == 0, np.uint64(1), keys).astype(np.uint64)  # 0 marks an empty slot
+        new = np.zeros(len(keys), bool)
+        pending = np.unique(keys, return_index=True)[1]
+        slot = (keys[pending] & self.mask).astype(np.intp)
+        while len(pending):
+            k = keys[pending]
+            found = self.table[slot]
+            empty = found == 0
+            # keys racing for one empty slot: the last write wins, the rest probe on
+            self.table[slot[empty]] = k[empty]
+            won = empty & (self.table[slot] == k)
+            new[pending[won]] = True
+            done = won | (found == k)
+            pending, slot = pending[~done], (slot[~done] + 1) & int(self.mask)
+        self.count += int(new.sum())
+        if self.count > self.limit:
+            raise RuntimeError(f"more than {self.limit:,} distinct hashes; use more --unique slots")
+        return new
+
+
+# ---------- FILES ----------
+def stream(lines, out, slices=True, dedupe=None, hashes=False, batch=BATCH, unique=UNIQUE):
+    """Write the canonical form of each sequence in lines to out, one per
+    line ("sequence-hash state-hash form" with hashes), skipping blank and
+    # lines and, with dedupe ("sequence" or "state"), repeats.  Returns
+    the number of sequences read and written."""
+    seen = HashSet(unique) if dedupe else None
+    numbered = ((n, line) for n, line in enumerate(lines, 1) if line.strip() and not line.lstrip().startswith("#"))
+    read = written = 0
+    while True:
+        chunk = list(islice(numbered, batch))
+        if not chunk:
+            return read, written
+        forms = []
+        for n, line in chunk:
+            try:
+                forms.append(canonical(parse(line), slices))
+            except ValueError as e:
+                raise ValueError(f"line {n}: {e}") from None
+        read += len(forms)
+        seq = sequence_hashes(forms) if hashes or dedupe == "sequence" else None
+        state = state_hashes(forms) if hashes or dedupe == "state" else None
+        keep = seen.add(seq if dedupe == "sequence" else state) if dedupe else np.ones(len(forms), bool)
+        rows = []
+        for i in np.flatnonzero(keep).tolist():
+            text = to_text(forms[i])
+            rows.append(f"{seq[i]:016x} {state[i]:016x} {text}" if hashes else text)
+        written += len(rows)
+        out.write("\n".join(rows) + "\n" if rows else "")
+
+
+# ---------- CHECKS ----------
+def check(count=20000, length=25, seed=0):
+    """Canonical forms against the original sequences, slot by slot."""
+    rng = np.random.default_rng(seed)
+    slots = np.arange(len(VISIBLE), dtype=np.uint8)
+    sequences = rng.integers(0, len(NAMES), (count, length)).tolist()
+    before = final_states(sequences, slots)
+    exact = final_states([canonical(s) for s in sequences], slots)
+    ok = (before == exact).all()
+    reduced = [reduce(s, slices=False) for s in sequences]
+    outer = final_states([canonical(s, slices=False) for s in sequences], slots)
+    turns = ROTATIONS[[rotation for _, rotation in reduced]]
+    ok &= (np.take_along_axis(outer, turns.astype(np.intp), axis=1) == before).all()
+    examples = {"U R r u": "", "U D u": "D", "U U U": "u", "U2 u2": "", "M m": "", "U L D": "U L D",
+                "r' R2": "r", "F B S": "B S F", "U D": "D U", "R E r": "E", "R M r": "R M r",
+                "U2' R'2": "U2 R2"}
+    for text, expected in examples.items():
+        ok &= to_text(canonical(parse(text))) == expected
+    ok &= to_text(canonical(parse("M"), slices=False)) == "d u"
+    return bool(ok)
+
+
+def bench(count=200_000, length=20, seed=1):
+    rng = np.random.default_rng(seed)
+    lines = [" ".join(NAMES[c] for c in row) for row in rng.integers(0, len(NAMES), (count, length)).tolist()]
+    # every sequence again, written differently: commuting turns swapped, inverse pairs added
+    lines += [line.replace("U D", "D U") + " R r" for line in lines]
+    for mode, kwargs in (("canonical", {}), ("+hashes", {"hashes": True}),
+                         ("dedupe by state", {"dedupe": "state"}), ("dedupe by sequence", {"dedupe": "sequence"}),
+                         ("no slices, dedupe by state", {"dedupe": "state", "slices": False})):
+        out = io.StringIO()
+        t = time.perf_counter()
+        read, written = stream(lines, out, **kwargs)
+        dt = time.perf_counter() - t
+        print(f"{mode:27} {read:,} sequences of {length} moves -> {written:,} in {dt:.2f} s "
+              f"({read / dt / 1000:.0f}k/s)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Canonicalize, hash and deduplicate rubix2 move sequences")
+    parser.add_argument("path", nargs="?", help="sequences, one per line ('-' for stdin)")
+    parser.add_argument("-o", "--output", help="where to write (stdout by default)")
+    parser.add_argument("--no-slices", action="store_true",
+                        help="rewrite slice turns as outer turns, ignoring how the cube is held")
+    parser.add_argument("--dedupe", choices=("sequence", "state"), help="drop repeats of either hash")
+    parser.add_argument("--hashes", action="store_true", help="prefix each line with both hashes")
+    parser.add_argument("--unique", type=int, default=UNIQUE, help="slots in the table of seen hashes")
+    args = parser.parse_args()
+    if args.path is None:
+        ok = check()
+        print(f"canonical forms agree with the engine: {ok}")
+        bench()
+        raise SystemExit(0 if ok else 1)
+    src = sys.stdin if args.path == "-" else open(args.path)
+    dst = open(args.output, "w") if args.output else sys.stdout
+    with src, dst:
+        t = time.perf_counter()
+        try:
+            read, written = stream(src, dst, not args.no_slices, args.dedupe, args.hashes, unique=args.unique)
+        except (ValueError, RuntimeError) as e:
+            raise SystemExit(f"{args.path}: {e}")
+    print(f"{read:,} sequences -> {written:,} in {time.perf_counter() - t:.1f} s", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
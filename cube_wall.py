@@ -0,0 +1,382 @@
+"""Gallery mode for rubix2: a wall of hundreds of independent cubes.
+
+All cubes share one geometry, built once in cube-local coordinates, and
+per-cube data lives in packed NumPy arrays: sticker colors as palette
+indices in cube_core's state() layout, the running turn and its angle,
+and the wall offset.
+
+A cube at rest is drawn as its (at most three) faces that point at the
+viewer, one quad each.  The sticker colors come from an atlas texture
+holding a 3x3 texel tile per cube face, modulated by a small grid
+texture for the black gaps, so only cubes that finish a turn touch the
+atlas.  Cubes mid-turn are drawn sticker by sticker instead, with their
+turning layer rotated about the cube center and only the stickers that
+face the viewer sent.  Each pass is a single draw call.
+
+    python rubix2.py --wall 500
+"""
+import math
+import random
+import time
+from collections import deque
+
+import numpy as np
+import pygame
+from pygame.locals import *
+from OpenGL.GL import *
+from OpenGL.error import NullFunctionError
+
+import cube_core
+import idle
+from cube_core import MOVES, NORMALS
+
+NAMES = list(MOVES)
+AXES = {'x': 0, 'y': 1, 'z': 2}
+PALETTE = np.array([[int(255 * v) for v in c] for c in cube_core.colors_list + [cube_core.BLACK]], np.uint8)
+SPACING = 5.2
+TURN_SPEED = 300  # degrees per second, rubix2's 5 degrees per frame at 60 FPS
+ATLAS_COLUMNS = 32  # cubes per atlas row; each cube is an 18x3 texel strip, one 3x3 tile per face
+GRID_TEXELS = 16  # one sticker cell of the gap texture
+CORNERS = ((-1, -1), (1, -1), (1, 1), (-1, 1))
+QUAD = np.arange(4, dtype=np.uint32)
+
+
+def _face_basis(n):
+    """Axis of normal n and in-face axes u, v with u x v == n, so corners wind
+    counter-clockwise seen from outside."""
+    k = next(i for i in range(3) if n[i])
+    e = np.eye(3, dtype=np.float32)
+    u, v = (e[(k + 1) % 3], e[(k + 2) % 3]) if n[k] > 0 else (e[(k + 2) % 3], e[(k + 1) % 3])
+    return k, u, v
+
+
+def _stickers():
+    """Slots, faces, corner positions, grid coordinates and atlas texels of the 54 outward faces."""
+    slots, faces, quads, cells, texels = [], [], [], [], []
+    for f, n in enumerate(NORMALS):
+        k, u, v = _face_basis(n)
+        for x in range(3):
+            for y in range(3):
+                for z in range(3):
+                    if (x, y, z)[k] != (2 if n[k] > 0 else 0):
+                        continue
+                    center = np.array([cube_core.positions[i] for i in (x, y, z)]) + 0.49 * np.array(n)
+                    quads.append([center + 0.45 * (a * u + b * v) for a, b in CORNERS])
+                    slots.append(cube_core.slot(x, y, z, f))
+                    faces.append(f)
+                    cells.append((x, y, z))
+                    # u and v are positive unit axes, so the grid index along them picks the texel
+                    texels.append((int(v @ (x, y, z)), f * 3 + int(u @ (x, y, z))))
+    return (np.array(slots), np.array(faces), np.array(quads, np.float32).reshape(-1, 3),
+            np.array(cells), np.array(texels))
+
+
+def _faces():
+    """One quad per face, sized so its three texel columns line up with the stickers."""
+    half = 1.5 * cube_core.positions[2]
+    quads = []
+    for n in NORMALS:
+        _, u, v = _face_basis(n)
+        quads.append([half * (np.array(n) + a * u + b * v) for a, b in CORNERS])
+    return np.array(quads, np.float32).reshape(-1, 3)
+
+
+STICKER_SLOTS, STICKER_FACES, TEMPLATE, STICKER_CELLS, STICKER_TEXELS = _stickers()
+STICKER_NORMALS = np.array(NORMALS, np.float32)[STICKER_FACES]
+FACE_TEMPLATE = _faces()
+# corner of each face quad as (0 or 1, 0 or 1) along its u and v axes
+FACE_UNIT = np.array([((a + 1) // 2, (b + 1) // 2) for a, b in CORNERS] * 6, np.float32)
+TABLE = np.array([cube_core.move_table()[n] for n in NAMES], np.intp)
+MOVE_AXIS = np.array([AXES[MOVES[n][0]] for n in NAMES])
+MOVE_SIGN = np.array([1 if MOVES[n][2] else -1 for n in NAMES], np.float32)
+# stickers in each move's turning layer
+LAYER_STICKERS = np.array([STICKER_CELLS[:, AXES[a]] == layer for a, layer, _ in (MOVES[n] for n in NAMES)])
+
+
+def rotations(axes, degrees):
+    """Stack of rotation matrices, one per (axis index, angle) pair."""
+    t = np.radians(degrees)
+    c, s = np.cos(t), np.sin(t)
+    k = np.arange(len(axes))
+    b, d = (axes + 1) % 3, (axes + 2) % 3
+    r = np.zeros((len(axes), 3, 3), np.float32)
+    r[k, axes, axes] = 1
+    r[k, b, b] = c
+    r[k, d, d] = c
+    r[k, b, d] = -s
+    r[k, d, b] = s
+    return r
+
+
+def tilt(rotation_x, rotation_y):
+    return (rotations(np.array([0]), [rotation_x])[0] @ rotations(np.array([1]), [rotation_y])[0]).T
+
+
+def gap_texture():
+    """One white sticker cell with the black gap around it, repeated across a face."""
+    cell = np.zeros((GRID_TEXELS, GRID_TEXELS, 3), np.uint8)
+    cell[1:-1, 1:-1] = 255
+    return cell
+
+
+def quad_indices(quads):
+    return (quads.astype(np.uint32)[:, None] * 4 + QUAD).ravel()
+
+
+class CubeWall:
+    def __init__(self, count, columns=None):
+        self.count = count
+        self.columns = columns or max(1, math.ceil(math.sqrt(count * 9 / 7)))
+        self.rows = math.ceil(count / self.columns)
+        solved = cube_core.RubiksCube().state()
+        index = {c: i for i, c in enumerate(cube_core.colors_list + [cube_core.BLACK])}
+        self.state = np.tile(np.array([index[c] for c in solved], np.uint8), (count, 1))
+        self.move = np.full(count, -1, np.intp)
+        self.angle = np.zeros(count, np.float32)
+        self.queues = [deque() for _ in range(count)]
+        i = np.arange(count)
+        self.offset = np.zeros((count, 3), np.float32)
+        self.offset[:, 0] = (i % self.columns - (self.columns - 1) / 2) * SPACING
+        self.offset[:, 1] = ((self.rows - 1) / 2 - i // self.columns) * SPACING
+        self.turns = 0
+
+        # atlas texel origin of each cube, and face texcoords into it
+        self.tile_row = i // ATLAS_COLUMNS * 3
+        self.tile_col = i % ATLAS_COLUMNS * 18
+        self.atlas = np.zeros((self.tile_row[-1] + 3, ATLAS_COLUMNS * 18, 3), np.uint8)
+        faces = np.repeat(np.arange(6), 4)
+        tex = np.empty((count, 24, 2), np.float32)
+        tex[..., 0] = (self.tile_col[:, None] + faces * 3 + 3 * FACE_UNIT[:, 0]) / self.atlas.shape[1]
+        tex[..., 1] = (self.tile_row[:, None] + 3 * FACE_UNIT[:, 1]) / self.atlas.shape[0]
+        self.face_texcoords = tex
+        self.gap_texcoords = np.tile(3 * FACE_UNIT, (count, 1))
+
+        # GL objects, created on the first draw, and what needs uploading
+        self.buffers = self.textures = None
+        self.retilted = self.recolored = True
+        self.set_tilt(tilt(25, -35))
+        self.recolor(i)
+
+    def set_tilt(self, matrix):
+        """View rotation applied to every cube about its own center."""
+        self.tilt = matrix.astype(np.float32)
+        # stickers and faces whose normal points towards the viewer (+z after the tilt)
+        self.facing = (STICKER_NORMALS @ self.tilt)[:, 2] > 1e-6
+        self.facing_faces = np.flatnonzero((np.array(NORMALS, np.float32) @ self.tilt)[:, 2] > 1e-6)
+        self.face_vertices = FACE_TEMPLATE @ self.tilt + self.offset[:, None]
+        self.retilted = True
+
+    def recolor(self, cubes):
+        """Copy the sticker colors of cubes into their atlas tiles."""
+        rows = self.tile_row[cubes, None] + STICKER_TEXELS[:, 0]
+        cols = self.tile_col[cubes, None] + STICKER_TEXELS[:, 1]
+        self.atlas[rows, cols] = PALETTE[self.state[cubes][:, STICKER_SLOTS]]
+        self.recolored = True
+
+    def turns_of(self, cubes):
+        """Turn-then-view matrices for row vectors of the turning layers of cubes."""
+        moves = self.move[cubes]
+        return rotations(MOVE_AXIS[moves], self.angle[cubes] * MOVE_SIGN[moves]).transpose(0, 2, 1) @ self.tilt
+
+    def turning_geometry(self):
+        """Vertices and colors of the stickers of cubes mid-turn that face the viewer."""
+        cubes = np.flatnonzero(self.move >= 0)
+        moves = self.move[cubes]
+        turn = self.turns_of(cubes)
+        in_layer = LAYER_STICKERS[moves]
+        show = np.where(in_layer, (STICKER_NORMALS @ turn)[..., 2] > 1e-6, self.facing)
+        which, sticker = np.nonzero(show)
+        # each sticker either turns with its layer or just gets the view rotation (the last matrix)
+        matrices = np.concatenate((turn, self.tilt[None]))
+        matrix = matrices[np.where(in_layer[which, sticker], which, len(cubes))]
+        vertices = TEMPLATE.reshape(-1, 4, 3)[sticker] @ matrix + self.offset[cubes[which], None]
+        colors = np.repeat(PALETTE[self.state[cubes[which], STICKER_SLOTS[sticker]]], 4, axis=0)
+        return vertices, colors
+
+    def play(self, cube, names):
+        """Queue a sequence of moves (keys of MOVES) on one cube."""
+        self.queues[cube].extend(NAMES.index(n) for n in names)
+
+    def scramble(self, cube, length=25, rng=random):
+        self.play(cube, rng.choices(NAMES, k=length))
+
+    def update(self, dt):
+        """Advance every turn by dt seconds, finish completed ones and start queued ones."""
+        active = np.flatnonzero(self.move >= 0)
+        self.angle[active] += TURN_SPEED * dt
+        done = active[self.angle[active] >= 90]
+        if len(done):
+            self.state[done] = np.take_along_axis(self.state[done], TABLE[self.move[done]], axis=1)
+            self.move[done] = -1
+            self.angle[done] = 0
+            self.recolor(done)
+            self.turns += len(done)
+        for i in np.flatnonzero(self.move < 0):
+            if self.queues[i]:
+                self.move[i] = self.queues[i].popleft()
+
+    def busy(self):
+        return bool((self.move >= 0).any()) or any(self.queues)
+
+    def _create(self):
+        self.buffers = glGenBuffers(6)
+        self.textures = glGenTextures(2)
+        glPixelStorei(GL_UNPACK_ALIGNMENT, 1)
+        for tex, image, wrap in ((self.textures[0], self.atlas, GL_CLAMP_TO_EDGE),
+                                 (self.textures[1], gap_texture(), GL_REPEAT)):
+            glBindTexture(GL_TEXTURE_2D, tex)
+            glTexImage2D(GL_TEXTURE_2D, 0, GL_RGB, image.shape[1], image.shape[0], 0,
+                         GL_RGB, GL_UNSIGNED_BYTE, image)
+            glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MIN_FILTER, GL_NEAREST)
+            glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MAG_FILTER, GL_NEAREST)
+            glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_WRAP_S, wrap)
+            glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_WRAP_T, wrap)
+        self._upload(1, self.face_texcoords, GL_STATIC_DRAW)
+        self._upload(2, self.gap_texcoords, GL_STATIC_DRAW)
+
+    def _upload(self, buffer, array, usage=GL_STREAM_DRAW, target=GL_ARRAY_BUFFER):
+        glBindBuffer(target, self.buffers[buffer])
+        glBufferData(target, array.nbytes, array, usage)
+
+    def draw(self):
+        """Resting cubes as textured faces, then cubes mid-turn sticker by sticker."""
+        if self.buffers is None:
+            self._create()
+        if self.retilted:
+            self._upload(0, self.face_vertices, GL_DYNAMIC_DRAW)
+        if self.recolored:
+            glBindTexture(GL_TEXTURE_2D, self.textures[0])
+            glTexSubImage2D(GL_TEXTURE_2D, 0, 0, 0, self.atlas.shape[1], self.atlas.shape[0],
+                            GL_RGB, GL_UNSIGNED_BYTE, self.atlas)
+        self.retilted = self.recolored = False
+
+        glEnableClientState(GL_VERTEX_ARRAY)
+        resting = np.flatnonzero(self.move < 0)
+        if len(resting):
+            faces = quad_indices((resting[:, None] * 6 + self.facing_faces).ravel())
+            glBindBuffer(GL_ARRAY_BUFFER, self.buffers[0])
+            glVertexPointer(3, GL_FLOAT, 0, None)
+            for unit, mode in ((0, GL_REPLACE), (1, GL_MODULATE)):
+                glActiveTexture(GL_TEXTURE0 + unit)
+                glClientActiveTexture(GL_TEXTURE0 + unit)
+                glEnable(GL_TEXTURE_2D)
+                glBindTexture(GL_TEXTURE_2D, self.textures[unit])
+                glTexEnvi(GL_TEXTURE_ENV, GL_TEXTURE_ENV_MODE, mode)
+                glEnableClientState(GL_TEXTURE_COORD_ARRAY)
+                glBindBuffer(GL_ARRAY_BUFFER, self.buffers[1 + unit])
+                glTexCoordPointer(2, GL_FLOAT, 0, None)
+            self._upload(3, faces, target=GL_ELEMENT_ARRAY_BUFFER)
+            glDrawElements(GL_QUADS, len(faces), GL_UNSIGNED_INT, None)
+            for unit in (1, 0):
+                glActiveTexture(GL_TEXTURE0 + unit)
+                glClientActiveTexture(GL_TEXTURE0 + unit)
+                glDisable(GL_TEXTURE_2D)
+                glDisableClientState(GL_TEXTURE_COORD_ARRAY)
+
+        if len(resting) < self.count:
+            vertices, colors = self.turning_geometry()
+            self._upload(4, vertices)
+            glVertexPointer(3, GL_FLOAT, 0, None)
+            self._upload(5, colors)
+            glEnableClientState(GL_COLOR_ARRAY)
+            glColorPointer(3, GL_UNSIGNED_BYTE, 0, None)
+            glDrawArrays(GL_QUADS, 0, len(colors))
+            glDisableClientState(GL_COLOR_ARRAY)
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+        glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, 0)
+
+
+def run(count, seed=None, fps=60):
+    pygame.init()
+    display = (900, 700)
+    pygame.display.set_mode(display, DOUBLEBUF | OPENGL)
+    rng = random.Random(seed)
+    wall = CubeWall(count)
+
+    glEnable(GL_DEPTH_TEST)
+    glEnable(GL_CULL_FACE)
+    glMatrixMode(GL_PROJECTION)
+    half_w = wall.columns * SPACING / 2
+    half_h = max(wall.rows * SPACING / 2, half_w * display[1] / display[0])
+    half_w = half_h * display[0] / display[1]
+    glOrtho(-half_w, half_w, -half_h, half_h, -10, 10)
+    glMatrixMode(GL_MODELVIEW)
+
+    print("Cube wall controls:")
+    print("Mouse drag to rotate every cube")
+    print("Space: pause / resume random turns")
+    print("S: scramble every cube")
+
+    loop = idle.IdleLoop(fps)
+    paused = False
+    rotation_x, rotation_y = 25, -35
+    mouse_down = False
+    last_pos = None
+    frame_time = 0.0
+    last = time.perf_counter()
+    # GPU time per frame from timer queries, read a few frames late so
+    # nothing waits on the pipeline
+    try:
+        queries = list(glGenQueries(4))
+    except (GLError, NullFunctionError):  # no timer queries in this context
+        queries = []
+    pending, gpu_time, gpu_frames = deque(), 0.0, 0
+
+    running = True
+    while running:
+        for event in loop.events(busy=wall.busy() or not paused):
+            if event.type == QUIT or (event.type == KEYDOWN and event.key == K_ESCAPE):
+                running = False
+            elif event.type == KEYDOWN and event.key == K_SPACE:
+                paused = not paused
+            elif event.type == KEYDOWN and event.key == K_s:
+                for i in range(count):
+                    wall.scramble(i, rng=rng)
+            elif event.type == MOUSEBUTTONDOWN and event.button == 1:
+                mouse_down = True
+                last_pos = event.pos
+            elif event.type == MOUSEBUTTONUP and event.button == 1:
+                mouse_down = False
+            elif event.type == MOUSEMOTION and mouse_down:
+                rotation_y += (event.pos[0] - last_pos[0]) * 0.5
+                rotation_x += (event.pos[1] - last_pos[1]) * 0.5
+                last_pos = event.pos
+                wall.set_tilt(tilt(rotation_x, rotation_y))
+                loop.invalidate()
+
+        now = time.perf_counter()
+        dt, last = min(now - last, 0.1), now
+        if not paused:
+            for i in np.flatnonzero(wall.move < 0):
+                if not wall.queues[i] and rng.random() < 0.02:
+                    wall.play(i, [rng.choice(NAMES)])
+        if wall.busy():
+            loop.invalidate()
+        if not loop.dirty:
+            continue
+
+        t = time.perf_counter()
+        wall.update(dt)
+        query = queries.pop() if queries else None  # none free: the GPU is behind, skip timing this frame
+        if query is not None:
+            glBeginQuery(GL_TIME_ELAPSED, query)
+        glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
+        wall.draw()
+        if query is not None:
+            glEndQuery(GL_TIME_ELAPSED)
+            pending.append(query)
+        frame_time += time.perf_counter() - t
+        pygame.display.flip()
+        loop.drawn()
+        while pending and glGetQueryObjectiv(pending[0], GL_QUERY_RESULT_AVAILABLE):
+            query = pending.popleft()
+            gpu_time += glGetQueryObjectuiv(query, GL_QUERY_RESULT) / 1e9  # ns; 32 bits hold 4 s
+            gpu_frames += 1
+            queries.append(query)
+
+    if loop.frames:
+        print(f"Cube wall: {count} cubes, {wall.turns} turns, "
+              f"{1000 * frame_time / loop.frames:.2f} ms/frame update+draw calls"
+              + (f", {1000 * gpu_time / gpu_frames:.2f} ms/frame on the GPU" if gpu_frames else ""))
+    loop.report("rubix2 wall:")
+    pygame.quit()
@@ -0,0 +1,77 @@
+"""Render-on-demand main loop for the OpenGL cube viewers.
+
+While something is changing (a key held, an animation running, a redraw
+requested) the loop polls events at a fixed frame rate.  Otherwise it
+blocks in pygame.event.wait until the next event or timer, so an idle
+viewer uses next to no CPU.  CPU time is tracked separately for idle and
+active periods.
+"""
+import time
+
+import pygame
+
+# Posted by other threads (e.g. a Tk control window) that changed the scene.
+REDRAW = pygame.USEREVENT + 1
+
+_WAKE_EVENTS = {pygame.VIDEOEXPOSE, pygame.VIDEORESIZE, pygame.WINDOWEXPOSED,
+                pygame.WINDOWRESIZED, pygame.WINDOWRESTORED, REDRAW}
+
+
+def request_redraw():
+    """Wake the loop and force a redraw; safe to call from any thread."""
+    if pygame.display.get_init():
+        pygame.event.post(pygame.event.Event(REDRAW))
+
+
+class IdleLoop:
+    def __init__(self, fps=60):
+        self.fps = fps
+        self.clock = pygame.time.Clock()
+        self.dirty = True
+        self.frames = 0
+        # mode -> [wall seconds, cpu seconds]
+        self.usage = {"idle": [0.0, 0.0], "active": [0.0, 0.0]}
+        self._mark = (time.perf_counter(), time.process_time())
+        self._mode = "active"
+
+    def invalidate(self):
+        self.dirty = True
+
+    def events(self, busy=False, timeout=None):
+        """This iteration's events. busy keeps the loop ticking at fps; otherwise
+        block until an event arrives or timeout seconds pass (None = forever)."""
+        self._account()
+        if busy or self.dirty:
+            self._mode = "active"
+            self.clock.tick(self.fps)
+            events = pygame.event.get()
+        else:
+            self._mode = "idle"
+            ms = 0 if timeout is None else max(1, int(timeout * 1000))
+            first = pygame.event.wait(ms)
+            events = [] if first.type == pygame.NOEVENT else [first] + pygame.event.get()
+            # don't let the clock count the blocked time as one long frame
+            self.clock.tick()
+        if any(e.type in _WAKE_EVENTS for e in events):
+            self.dirty = True
+        return events
+
+    def drawn(self):
+        """Call after flipping a frame."""
+        self.dirty = False
+        self.frames += 1
+
+    def _account(self):
+        wall, cpu = time.perf_counter(), time.process_time()
+        used = self.usage[self._mode]
+        used[0] += wall - self._mark[0]
+        used[1] += cpu - self._mark[1]
+        self._mark = (wall, cpu)
+
+    def report(self, name=""):
+        self._account()
+        parts = []
+        for mode, (wall, cpu) in self.usage.items():
+            if wall > 0:
+                parts.append(f"{mode} {100 * cpu / wall:.1f}% CPU over {wall:.1f} s")
+        print(f"{name}{' ' if name else ''}{self.frames} frames drawn; " + ", ".join(parts))
@@ -0,0 +1,65 @@
+"""Timestamped keyboard input for tick-based games.
+
+Key events are stamped when they are polled (every render frame) and kept
+in a queue.  At each simulation tick they are applied in order, so a tap
+that starts and ends between two ticks still counts.  The queue is never
+capped: dropping a KEYUP would leave its key held.  With
+move_on_press the caller applies a press immediately, in the render frame;
+the next tick then skips that direction so it does not move twice.
+"""
+import time
+from collections import deque
+
+import pygame
+
+
+class InputBuffer:
+    def __init__(self, key_bits, move_on_press=False):
+        self.key_bits = dict(key_bits)
+        self.move_on_press = move_on_press
+        self.queue = deque()  # drained by take() every tick
+        self.held = 0
+        self.moved = 0
+        self.latency_total = 0.0
+        self.latency_max = 0.0
+        self.applied = 0
+
+    def push(self, event, now=None):
+        """Queue a KEYDOWN/KEYUP. Returns the bit to apply right now (move_on_press) or 0."""
+        bit = self.key_bits.get(getattr(event, "key", None))
+        if not bit or event.type not in (pygame.KEYDOWN, pygame.KEYUP):
+            return 0
+        now = time.perf_counter() if now is None else now
+        down = event.type == pygame.KEYDOWN
+        immediate = down and self.move_on_press and not self.moved & bit
+        if immediate:
+            self.moved |= bit
+            self._applied(0.0)
+        self.queue.append((now, bit, down, immediate))
+        return bit if immediate else 0
+
+    def take(self, now=None):
+        """Apply queued events up to now. Returns (bits for this tick, bits already moved)."""
+        now = time.perf_counter() if now is None else now
+        pressed = 0
+        while self.queue and self.queue[0][0] <= now:
+            stamp, bit, down, immediate = self.queue.popleft()
+            if down:
+                self.held |= bit
+                if not immediate:
+                    pressed |= bit
+                    self._applied(now - stamp)
+            else:
+                self.held &= ~bit
+        moved, self.moved = self.moved, 0
+        return (self.held & ~moved) | pressed, moved
+
+    def _applied(self, latency):
+        self.latency_total += latency
+        self.latency_max = max(self.latency_max, latency)
+        self.applied += 1
+
+    def report(self):
+        if self.applied:
+            print(f"Input: {self.applied} presses, latency to simulation "
+                  f"{1000 * self.latency_total / self.applied:.1f} ms avg / {1000 * self.latency_max:.1f} ms max")
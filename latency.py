@@ -0,0 +1,89 @@
+"""Input-to-photon latency tracing.
+
+Each input is stamped with perf_counter when it is polled, marked when the
+simulation first acts on it, and closed by the first display flip after
+that.  If it reached the simulation in a later frame than the one that
+polled it, it waited.  The caller names the reason (a simulation tick, an
+animation still running), and the frames that showed a waited input are
+counted per reason.
+
+    tracer = LatencyTracer("planb")
+    tracer.poll("key")                # event loop
+    tracer.apply("key", "tick")       # the tick that moved the food
+    pygame.display.update()
+    tracer.present()
+    ...
+    tracer.report()
+"""
+import time
+from collections import Counter
+
+import numpy as np
+
+BUCKETS_MS = (8, 16, 33, 50, 100, 200)
+
+
+class LatencyTracer:
+    def __init__(self, name):
+        self.name = name
+        self.frame = 0
+        self.pending = []  # (kind, polled at, polled in frame)
+        self.applied = []  # (kind, polled at, waited for)
+        self.samples = {}  # kind -> latencies in seconds
+        self.waits = {}    # reason -> seconds between poll and apply
+        self.flagged = Counter()  # reason -> frames that showed an input that waited for it
+
+    def poll(self, kind, now=None):
+        self.pending.append((kind, time.perf_counter() if now is None else now, self.frame))
+
+    def apply(self, kind, reason=None, count=None, now=None):
+        """The simulation now reflects the oldest `count` (default all) pending
+        inputs of kind. reason is what they waited for if they were polled in
+        an earlier frame."""
+        now = time.perf_counter() if now is None else now
+        keep = []
+        for entry in self.pending:
+            k, stamp, frame = entry
+            if k != kind or count == 0:
+                keep.append(entry)
+                continue
+            waited = reason if frame < self.frame else None
+            if waited is not None:
+                self.waits.setdefault(waited, []).append(now - stamp)
+            self.applied.append((k, stamp, waited))
+            if count is not None:
+                count -= 1
+        self.pending = keep
+
+    def present(self, now=None):
+        """Call right after display.flip / display.update."""
+        now = time.perf_counter() if now is None else now
+        reasons = set()
+        for kind, stamp, waited in self.applied:
+            self.samples.setdefault(kind, []).append(now - stamp)
+            if waited is not None:
+                reasons.add(waited)
+        self.flagged.update(reasons)
+        self.applied.clear()
+        self.frame += 1
+
+    def percentiles(self, kind):
+        ms = 1000 * np.array(self.samples.get(kind, ()))
+        return dict(zip(("p50", "p95", "p99"), np.percentile(ms, (50, 95, 99)))) if len(ms) else {}
+
+    def report(self):
+        if not self.samples:
+            return
+        print(f"{self.name} latency, input polled -> first frame showing it, over {self.frame} frames:")
+        for kind, values in self.samples.items():
+            ms = 1000 * np.array(values)
+            p = self.percentiles(kind)
+            counts = np.bincount(np.searchsorted(BUCKETS_MS, ms), minlength=len(BUCKETS_MS) + 1)
+            labels = [f"<{b}" for b in BUCKETS_MS] + [f">={BUCKETS_MS[-1]}"]
+            hist = " ".join(f"{label}:{n}" for label, n in zip(labels, counts) if n)
+            print(f"  {kind:<6} n={len(ms):<5} p50 {p['p50']:.1f}  p95 {p['p95']:.1f}  "
+                  f"p99 {p['p99']:.1f}  max {ms.max():.1f} ms   [{hist} ms]")
+        for reason, frames in self.flagged.items():
+            waits = 1000 * np.array(self.waits[reason])
+            print(f"  {frames} frames showed input that waited for {reason}: "
+                  f"{len(waits)} inputs, wait {waits.mean():.1f} ms avg / {waits.max():.1f} ms max")
@@ -0,0 +1,192 @@
+"""One launcher for all the games.
+
+Listing the games imports nothing heavy; pygame, NumPy, PyOpenGL and
+tkinter are only imported once a game is chosen, and then by the game
+itself.  Every import the game makes at module level is timed, and a
+breakdown of imports and time to first frame is printed when the game
+flips its first frame.
+
+pygame's system font table (a font-directory scan, or an fc-list call on
+Linux) is cached on disk between launches; --refresh rebuilds it.
+
+    python launcher.py                  # pick from a list
+    python launcher.py planb --hard     # arguments after the name go to the game
+"""
+import builtins
+import json
+import os
+import runpy
+import sys
+import time
+
+T0 = time.perf_counter()
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+CACHE = os.path.join(os.path.expanduser("~"), ".cache", "reverse_snake", "launcher.json")
+CACHE_MAX_AGE = 7 * 24 * 3600
+
+# name -> (script, description, heavy dependencies)
+GAMES = {
+    "planb": ("planb.py", "Inverse Snake: you are the food", "pygame"),
+    "planc": ("planc.py", "Reverse Snake with neon visuals and rewind", "pygame, NumPy"),
+    "rubix": ("rubix.py", "Rubik's cube viewer", "pygame, PyOpenGL"),
+    "rubix2": ("rubix2.py", "Rubik's cube with layer turns", "pygame, PyOpenGL, NumPy"),
+    "puthiyath": ("puthiyath.py", "Rubik's cube with a Tk control window", "pygame, PyOpenGL, tkinter"),
+}
+
+
+class ImportTimer:
+    """Times the imports made outside any other import (the game's own
+    module-level imports), each including everything it pulls in."""
+
+    def __init__(self):
+        self.times = {}
+        self.depth = 0
+        self._import = builtins.__import__
+
+    def install(self):
+        builtins.__import__ = self._timed
+
+    def _timed(self, name, globals=None, locals=None, fromlist=(), level=0):
+        if self.depth or level or name in sys.modules:
+            return self._import(name, globals, locals, fromlist, level)
+        self.depth += 1
+        t = time.perf_counter()
+        try:
+            return self._import(name, globals, locals, fromlist, level)
+        finally:
+            self.depth -= 1
+            self.times[name] = self.times.get(name, 0.0) + time.perf_counter() - t
+
+    @property
+    def total(self):
+        return sum(self.times.values())
+
+
+# ---------- FONT CACHE ----------
+def load_cache():
+    try:
+        if time.time() - os.path.getmtime(CACHE) > CACHE_MAX_AGE:
+            return {}
+        with open(CACHE) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_cache(cache):
+    try:
+        os.makedirs(os.path.dirname(CACHE), exist_ok=True)
+        with open(CACHE + ".tmp", "w") as f:
+            json.dump(cache, f)
+        os.replace(CACHE + ".tmp", CACHE)
+    except OSError as e:
+        print(f"launcher: could not write {CACHE}: {e}")
+
+
+def cache_sysfonts(cache):
+    """Serve pygame's font table from cache, or build it once and save it."""
+    import pygame.sysfont as sysfont
+    scan = sysfont.initsysfonts
+
+    def initsysfonts():
+        if sysfont.is_init:
+            return
+        t = time.perf_counter()
+        fonts = cache.get("fonts")
+        if fonts is not None:
+            sysfont.Sysfonts.update({name: {(bool(b), bool(i)): path for b, i, path in styles}
+                                     for name, styles in fonts.items()})
+            sysfont.create_aliases()
+            sysfont.is_init = True
+            print(f"launcher: font table from cache in {1000 * (time.perf_counter() - t):.0f} ms")
+            return
+        scan()
+        cache["fonts"] = {name: [[b, i, path] for (b, i), path in styles.items()]
+                          for name, styles in sysfont.Sysfonts.items()}
+        save_cache(cache)
+        print(f"launcher: font table scanned in {1000 * (time.perf_counter() - t):.0f} ms, cached for next time")
+
+    sysfont.initsysfonts = initsysfonts
+
+
+# ---------- LAUNCH ----------
+def watch_first_frame(report):
+    """Call report() once, on the first display flip or update."""
+    import pygame
+    flip, update = pygame.display.flip, pygame.display.update
+    done = []
+
+    def first(fn):
+        def wrapper(*args):
+            result = fn(*args)
+            if not done:
+                done.append(True)
+                pygame.display.flip, pygame.display.update = flip, update
+                report()
+            return result
+        return wrapper
+
+    pygame.display.flip, pygame.display.update = first(flip), first(update)
+
+
+def launch(name, args, refresh=False):
+    script = os.path.join(HERE, GAMES[name][0])
+    cache = {} if refresh else load_cache()
+    timer = ImportTimer()
+    timer.install()
+    start = time.perf_counter()
+    # every game needs pygame: import it on its own (through the timer) so the
+    # report charges it to pygame rather than to pygame.sysfont below
+    __import__("pygame")
+    cache_sysfonts(cache)
+
+    def report():
+        now = time.perf_counter()
+        imports = sorted(timer.times.items(), key=lambda kv: -kv[1])
+        print(f"launcher: {name} first frame {1000 * (now - T0):.0f} ms after launch "
+              f"({1000 * (start - T0):.0f} ms in the launcher)")
+        print(f"  imports {1000 * timer.total:.0f} ms: "
+              + ", ".join(f"{mod} {1000 * t:.0f}" for mod, t in imports if t >= 0.001))
+        print(f"  game code until first frame {1000 * (now - start - timer.total):.0f} ms")
+
+    watch_first_frame(report)
+    sys.argv = [script] + args
+    sys.path.insert(0, HERE)
+    runpy.run_path(script, run_name="__main__")
+
+
+def choose():
+    names = list(GAMES)
+    for i, name in enumerate(names, 1):
+        script, description, deps = GAMES[name]
+        print(f"{i}. {name:<10} {description} ({deps})")
+    try:
+        pick = input("Game: ").strip()
+    except EOFError:
+        return None
+    if pick.isdigit() and 1 <= int(pick) <= len(names):
+        return names[int(pick) - 1]
+    return pick if pick in GAMES else None
+
+
+def main():
+    argv = sys.argv[1:]
+    refresh = "--refresh" in argv[:1]
+    if refresh:
+        argv = argv[1:]
+    if argv and argv[0] in ("-h", "--help", "--list"):
+        print(__doc__.strip())
+        print()
+        for name, (script, description, deps) in GAMES.items():
+            print(f"  {name:<10} {description} ({deps})")
+        return
+    name = argv[0] if argv else choose()
+    if name not in GAMES:
+        print(f"launcher: unknown game {name!r}; choose from {', '.join(GAMES)}")
+        sys.exit(2)
+    launch(name, argv[1:], refresh)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""Startup pipeline shared by the snake games.
+
+The window is opened first and a loading screen is drawn while fonts,
+images and synthesized sounds are produced on a background thread.
+Background music is streamed by pygame.mixer.music rather than decoded into
+a Sound.  Images and sounds come preprocessed from assetcache.
+StartupTimer reports time-to-first-frame and per-asset load times.
+"""
+import threading
+import time
+
+import pygame
+
+import assetcache
+
+
+class StartupTimer:
+    def __init__(self):
+        self.t0 = time.perf_counter()
+        self.marks = {}
+
+    def mark(self, name):
+        """Record the first time name happens, in ms since the timer started."""
+        self.marks.setdefault(name, (time.perf_counter() - self.t0) * 1000)
+
+    def report(self, loader=None):
+        parts = [f"{name} {ms:.0f} ms" for name, ms in self.marks.items()]
+        print("Startup: " + ", ".join(parts))
+        if loader is not None:
+            print("  assets: " + ", ".join(f"{name} {ms:.0f} ms" for name, ms in loader.timings.items()))
+
+
+class AssetLoader:
+    """Runs named load jobs in order on one background thread."""
+
+    def __init__(self):
+        self.jobs = []
+        self.assets = {}
+        self.timings = {}
+        self.error = None
+        self._done = threading.Event()
+
+    def add(self, name, fn, *args):
+        self.jobs.append((name, fn, args))
+
+    def start(self):
+        threading.Thread(target=self._run, name="asset-loader", daemon=True).start()
+        return self
+
+    def _run(self):
+        try:
+            for name, fn, args in self.jobs:
+                t = time.perf_counter()
+                self.assets[name] = fn(*args)
+                self.timings[name] = (time.perf_counter() - t) * 1000
+        except Exception as e:
+            self.error = e
+        finally:
+            self._done.set()
+
+    @property
+    def ready(self):
+        return self._done.is_set()
+
+    @property
+    def progress(self):
+        return len(self.assets) / max(1, len(self.jobs))
+
+    def __getitem__(self, name):
+        if self.error is not None:
+            raise self.error
+        return self.assets[name]
+
+
+def load_scaled_image(path, size):
+    """Decoded and scaled image from the asset cache (decoded on a miss, off the
+    main thread); convert() is left to the caller."""
+    return assetcache.image(path, size)
+
+
+def start_music(path, volume=0.3):
+    """Stream path through mixer.music instead of decoding it into memory."""
+    if not pygame.mixer.get_init():
+        return False
+    try:
+        pygame.mixer.music.load(path)
+    except pygame.error as e:
+        print(f"Warning: could not stream {path}: {e}")
+        return False
+    pygame.mixer.music.set_volume(volume)
+    pygame.mixer.music.play(-1)
+    return True
+
+
+def draw_loading(surf, progress):
+    w, h = surf.get_size()
+    surf.fill((0, 0, 0))
+    font = pygame.font.Font(None, 36)
+    text = font.render("Loading...", True, (255, 255, 255))
+    surf.blit(text, (w//2 - text.get_width()//2, h//2 - 40))
+    pygame.draw.rect(surf, (80, 80, 80), (w//4, h//2, w//2, 12), 1)
+    pygame.draw.rect(surf, (255, 255, 255), (w//4 + 2, h//2 + 2, int((w//2 - 4) * progress), 8))
+
+
+def wait_for(loader, surf, timer, fps=60):
+    """Show the loading screen until loader finishes. False if the window was closed."""
+    clock = pygame.time.Clock()
+    while True:
+        for e in pygame.event.get():
+            if e.type == pygame.QUIT:
+                return False
+        draw_loading(surf, loader.progress)
+        pygame.display.flip()
+        timer.mark("first frame")
+        if loader.ready:
+            timer.mark("assets ready")
+            return True
+        clock.tick(fps)
@@ -1,38 +1,73 @@
+import argparse
 import pygame
 import random
 import sys
+import time
+
+import inputbuf
+import latency
+import loader
+import recorder
+import sfx
 
 # --- Configuration ---
 SCREEN_WIDTH, SCREEN_HEIGHT = 800, 600
 BLOCK_SIZE = 20
 FPS = 8 # The snake now moves slower (was 10)
+RENDER_FPS = 60 # input is polled and the screen redrawn this often
 
 # --- Colors ---
 BLACK = (0, 0, 0)
 WHITE = (255, 255, 255)
 
+# --- Input bits (also the format of recorded sessions) ---
+KEY_BITS = ((pygame.K_LEFT, 1), (pygame.K_RIGHT, 2), (pygame.K_UP, 4), (pygame.K_DOWN, 8))
+
+screen = snake_image = food_image = font = sounds = None
+
 # --- Initialize Pygame ---
-pygame.init()
-
-# --- Load Images and Handle Errors ---
-screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
-try:
-    # Use convert_alpha() for transparency
-    snake_image = pygame.image.load("snake.png").convert_alpha()
-    food_image = pygame.image.load("food.png").convert_alpha()
-
-    # Scale the images to fit the block size
-    snake_image = pygame.transform.scale(snake_image, (BLOCK_SIZE, BLOCK_SIZE))
-    food_image = pygame.transform.scale(food_image, (BLOCK_SIZE, BLOCK_SIZE))
-except pygame.error as e:
-    print(f"Error: Could not load image files. {e}")
-    print("Please make sure 'snake.png' and 'food.png' are in the same folder as the script.")
-    pygame.quit()
-    sys.exit()
+def init():
+    """Open the window and start loading assets in the background."""
+    global screen
+    timer = loader.StartupTimer()
+    pygame.init()
+    screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+    pygame.display.set_caption("Inverse Snake - Control the Food!")
+    timer.mark("window")
+
+    assets = loader.AssetLoader()
+    assets.add("snake", loader.load_scaled_image, "snake.png", (BLOCK_SIZE, BLOCK_SIZE))
+    assets.add("food", loader.load_scaled_image, "food.png", (BLOCK_SIZE, BLOCK_SIZE))
+    assets.add("font", pygame.font.SysFont, None, 36)
+    assets.add("music", loader.start_music, "bg_music.mp3.wav")
+    assets.add("sfx", sfx.load, {"eat": ("eat.wav", 0.6), "over": ("over.wav", 0.8)})
+    return timer, assets.start()
+
+def finish_loading(timer, assets):
+    """Wait on the loading screen and pick up the loaded assets. False if closed."""
+    global snake_image, food_image, font, sounds
+    if not loader.wait_for(assets, screen, timer):
+        return False
+    # --- Load Images and Handle Errors ---
+    try:
+        # Use convert_alpha() for transparency
+        snake_image = assets["snake"].convert_alpha()
+        food_image = assets["food"].convert_alpha()
+    except (pygame.error, FileNotFoundError) as e:
+        print(f"Error: Could not load image files. {e}")
+        print("Please make sure 'snake.png' and 'food.png' are in the same folder as the script.")
+        pygame.quit()
+        sys.exit()
+    font = assets["font"]
+    sounds = assets["sfx"]
+    return True
+
 # --- Snake and Food Classes ---
 class Snake:
-    """The AI-controlled snake that chases the food."""
-    def __init__(self):
+    """The AI-controlled snake that chases the food, greedily or with a
+    planb_ai.Search."""
+    def __init__(self, search=None):
+        self.search = search
         self.x = SCREEN_WIDTH // 2
         self.y = SCREEN_HEIGHT // 2
         self.dx = 0
@@ -42,6 +77,14 @@ class Snake:
 
     def move(self, food_x, food_y):
         """AI logic to move the snake towards the food."""
+        self.steer(food_x, food_y)
+        self.step()
+
+    def steer(self, food_x, food_y):
+        """Greedy: close the x gap first, then the y gap."""
+        if self.search is not None:
+            self.dx, self.dy = self.search.choose(self, food_x, food_y)
+            return
         if self.x < food_x:
             self.dx, self.dy = BLOCK_SIZE, 0
         elif self.x > food_x:
@@ -51,6 +94,7 @@ class Snake:
         elif self.y > food_y:
             self.dx, self.dy = 0, -BLOCK_SIZE
 
+    def step(self):
         self.x += self.dx
         self.y += self.dy
         self.body.insert(0, (self.x, self.y))
@@ -97,47 +141,95 @@ class Food:
         surface.blit(food_image, (self.x, self.y))
 
 # --- Main Game Loop ---
-def main():
+def move_food(food, bits):
+    """Apply input bits (LEFT=1, RIGHT=2, UP=4, DOWN=8) to the food."""
+    if bits & 1:
+        food.move(-BLOCK_SIZE, 0)
+    if bits & 2:
+        food.move(BLOCK_SIZE, 0)
+    if bits & 4:
+        food.move(0, -BLOCK_SIZE)
+    if bits & 8:
+        food.move(0, BLOCK_SIZE)
 
-    pygame.display.set_caption("Inverse Snake - Control the Food!")
+def main(capture=None, log=None, replay=None, headless=False, move_on_press=False, search=None):
+    """Run one game. capture is a recorder.FrameRecorder, log an InputLog to
+    fill, replay an InputLog whose inputs replace the keyboard, search a
+    planb_ai.Search that steers the snake (hard difficulty).
+
+    The game ticks at FPS but renders and polls input at RENDER_FPS; key
+    events are buffered with timestamps and applied at the next tick, or
+    immediately with move_on_press."""
+    timer, assets = init()
+    if not finish_loading(timer, assets):
+        pygame.quit()
+        return
     clock = pygame.time.Clock()
+    inputs = inputbuf.InputBuffer(KEY_BITS, move_on_press)
+    tracer = latency.LatencyTracer("planb")
 
-    snake = Snake()
+    snake = Snake(search)
     food = Food()
     score = 0
+    frame = 0
+    game_over = False
+    tick_time = 1 / FPS
+    next_tick = time.perf_counter()
 
     running = True
     while running:
-        # --- Event Loop (for quitting the game) ---
+        now = time.perf_counter()
+        # --- Event Loop: quitting, and timestamped key events for the food ---
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 running = False
             if event.type == pygame.KEYDOWN:
                 if event.key == pygame.K_ESCAPE:
                     running = False
+            if replay is None:
+                if event.type == pygame.KEYDOWN and event.key in inputs.key_bits:
+                    tracer.poll("key", now)
+                moved = inputs.push(event, now)
+                if moved:
+                    tracer.apply("key", now=now)
+                move_food(food, moved)
+
+        # --- Game tick ---
+        ticked = headless or now >= next_tick
+        if ticked:
+            next_tick = max(next_tick + tick_time, now)
+            if replay is not None:
+                if frame >= len(replay):
+                    break
+                entry = replay.bits[frame]
+                # the high nibble holds moves already made on key press
+                move_food(food, entry >> 4)
+            else:
+                bits, moved = inputs.take(now)
+                tracer.apply("key", "the next tick", now=now)
+                entry = bits | moved << 4
+            if log is not None:
+                log.append(entry)
+            frame += 1
+            bits = entry & 15
+            move_food(food, bits)
+
+            # --- Game Logic ---
+            snake.move(food.x, food.y)
 
-        # --- Continuous Input Handling for Food ---
-        keys = pygame.key.get_pressed()
-        if keys[pygame.K_LEFT]:
-            food.move(-BLOCK_SIZE, 0)
-        if keys[pygame.K_RIGHT]:
-            food.move(BLOCK_SIZE, 0)
-        if keys[pygame.K_UP]:
-            food.move(0, -BLOCK_SIZE)
-        if keys[pygame.K_DOWN]:
-            food.move(0, BLOCK_SIZE)
-
-        # --- Game Logic ---
-        snake.move(food.x, food.y)
-
-        # Check if snake "eats" the food
-        if (snake.x, snake.y) == (food.x, food.y):
-            snake.grow()
-            score += 10
-
-        # Check for game over
-        if snake.check_collision():
-            running = False
+            # Check if snake "eats" the food
+            if (snake.x, snake.y) == (food.x, food.y):
+                snake.grow()
+                score += 10
+                if sounds:
+                    sounds.trigger("eat", 1)
+
+            # Check for game over
+            game_over = snake.check_collision()
+            if game_over:
+                running = False
+                if sounds:
+                    sounds.trigger("over", 2)
 
         # --- Drawing ---
         screen.fill(BLACK)
@@ -145,16 +237,88 @@ def main():
         food.draw(screen)
 
         # Display score
-        font = pygame.font.SysFont(None, 36)
         text = font.render(f"Score: {score}", True, WHITE)
         screen.blit(text, (10, 10))
+        if search is not None:
+            screen.blit(font.render(search.hud(), True, WHITE), (10, 40))
 
         # Update the display
+        if sounds:
+            sounds.flush()
+        if capture is not None and ticked:
+            capture.capture(screen)
         pygame.display.update()
-        clock.tick(FPS)
+        tracer.present()
+        if ticked and frame == 1:
+            timer.mark("first game frame")
+            timer.report(assets)
+        if not headless:
+            clock.tick(RENDER_FPS)
 
+    inputs.report()
+    tracer.report()
+    if search is not None:
+        search.report()
+    # Let the game over sound finish before the mixer shuts down
+    if sounds and not headless and game_over:
+        pygame.time.wait(1000)
     pygame.quit()
-    sys.exit()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Inverse Snake - control the food")
+    recorder.add_arguments(parser)
+    parser.add_argument("--move-on-press", action="store_true",
+                        help="move the food as soon as a key is pressed instead of at the next tick")
+    parser.add_argument("--board", metavar="WxH",
+                        help="play on a huge board of W by H cells with a scrolling camera")
+    parser.add_argument("--arena", type=int, metavar="SNAKES",
+                        help="arena mode: this many snakes chase many food pieces (board from --board, default 200x150)")
+    parser.add_argument("--foods", type=int, default=60, help="food pieces in arena mode")
+    parser.add_argument("--hard", action="store_true",
+                        help="the snake searches ahead (alpha-beta) instead of chasing greedily")
+    parser.add_argument("--hard-ms", type=float, default=30,
+                        help="search time per snake move with --hard")
+    parser.add_argument("--hard-depth", type=int,
+                        help="search to exactly this depth instead; use it for sessions that will be replayed")
+    args = parser.parse_args()
+    recorder.setup_headless(args)
+
+    if args.arena:
+        import planb_arena
+        width, height = map(int, (args.board or "200x150").lower().split("x"))
+        planb_arena.run(args.arena, args.foods, width, height, args.seed, args.move_on_press)
+        sys.exit()
+
+    if args.board:
+        import planb_world
+        width, height = map(int, args.board.lower().split("x"))
+        planb_world.run(width, height, args.seed, args.move_on_press)
+        sys.exit()
+
+    try:
+        replay = recorder.InputLog.load(args.replay, "planb") if args.replay else None
+    except (OSError, ValueError) as e:
+        parser.error(f"--replay: {e}")
+    seed = replay.seed if replay else args.seed if args.seed is not None else random.randrange(2**32)
+    random.seed(seed)
+    log = recorder.InputLog("planb", seed, FPS) if args.save_session else None
+    capture = None
+    if args.record:
+        capture = recorder.FrameRecorder(args.record, (SCREEN_WIDTH, SCREEN_HEIGHT), FPS,
+                                         every=args.record_every, scale=args.record_scale,
+                                         block=args.headless)
+    search = None
+    if args.hard or args.hard_depth:
+        import planb_ai
+        if args.hard_depth:
+            search = planb_ai.Search(budget=float("inf"), max_depth=args.hard_depth)
+        else:
+            search = planb_ai.Search(budget=args.hard_ms / 1000)
+    try:
+        main(capture, log, replay, args.headless, args.move_on_press, search)
+    finally:
+        if capture is not None:
+            capture.close()
+        if log is not None:
+            log.save(args.save_session)
+    sys.exit()
\ No newline at end of file
@@ -0,0 +1,330 @@
+"""Hard difficulty for planb: a snake that searches instead of chasing greedily.
+
+Every tick the snake plays minimax with alpha-beta over its own four moves
+and the food's replies (stay or one step; two-key diagonals are left out),
+using planb's rules: the snake steps, its tail follows unless it is still
+growing, it grows after eating and dies on a wall or its own body.
+Iterative deepening runs until the per-tick time budget is spent and the
+last fully searched depth picks the move.
+
+Positions are Zobrist-hashed (occupied cells, head, food, pending growth
+and side to move; the order of the body behind the head is not hashed)
+into a fixed-size transposition table, which also supplies the first move
+to try at each node.  The other moves are ordered by distance to the food.
+
+Pass a Search to planb.Snake to have it steer the snake.
+
+    python planb.py --hard
+"""
+import random
+import time
+from array import array
+from collections import deque
+
+import planb
+
+B = planb.BLOCK_SIZE
+W, H = planb.SCREEN_WIDTH // B, planb.SCREEN_HEIGHT // B
+XS = [c % W for c in range(W * H)]
+YS = [c // W for c in range(W * H)]
+SNAKE_MOVES = ((1, 0), (-1, 0), (0, 1), (0, -1))
+FOOD_MOVES = ((0, 0), (-1, 0), (1, 0), (0, -1), (0, 1))
+# cell reached by each snake move (-1 off the board) and each clamped food move
+NEIGHBORS = [[x + dx + (y + dy) * W if 0 <= x + dx < W and 0 <= y + dy < H else -1
+              for dx, dy in SNAKE_MOVES] for x, y in zip(XS, YS)]
+FOOD_STEPS = [[min(max(x + dx, 0), W - 1) + min(max(y + dy, 0), H - 1) * W
+               for dx, dy in FOOD_MOVES] for x, y in zip(XS, YS)]
+
+INF = 1 << 40
+DEATH = 1_000_000  # minus the remaining depth, so a later death scores higher
+EAT = 1000
+DIST_WEIGHT = 10
+TRAP_WEIGHT = 200  # per cell missing from the free area the snake's length needs
+SPACE_LIMIT = 48
+EXACT, LOWER, UPPER = 0, 1, 2
+CHECK_EVERY = 256  # nodes between clock checks
+
+
+class Timeout(Exception):
+    pass
+
+
+class TranspositionTable:
+    """2**bits slots in flat arrays (about 17 bytes each). A slot is replaced by
+    a search at least as deep, or by anything once it is from an older tick."""
+
+    def __init__(self, bits=18):
+        size = 1 << bits
+        self.mask = size - 1
+        self.keys = array('Q', bytes(8 * size))
+        self.depths = array('b', bytes(size))
+        self.values = array('i', bytes(4 * size))
+        self.flags = array('b', bytes(size))
+        self.moves = array('b', bytes(size))
+        self.ages = array('H', bytes(2 * size))
+        self.age = 1
+        self.probes = self.hits = 0
+
+    @property
+    def nbytes(self):
+        return sum(a.itemsize * len(a) for a in (self.keys, self.depths, self.values,
+                                                  self.flags, self.moves, self.ages))
+
+    def new_search(self):
+        self.age = self.age % 0xFFFF + 1
+
+    def probe(self, key):
+        """Slot holding key, or -1."""
+        self.probes += 1
+        slot = key & self.mask
+        if self.keys[slot] == key and self.ages[slot]:
+            self.hits += 1
+            return slot
+        return -1
+
+    def store(self, key, depth, value, flag, move):
+        slot = key & self.mask
+        if self.ages[slot] == self.age and self.keys[slot] != key and self.depths[slot] > depth:
+            return
+        self.keys[slot] = key
+        self.depths[slot] = depth
+        self.values[slot] = value
+        self.flags[slot] = flag
+        self.moves[slot] = move
+        self.ages[slot] = self.age
+
+
+class Search:
+    def __init__(self, budget=0.03, max_depth=40, tt_bits=18, seed=0):
+        rng = random.Random(seed)
+        keys = lambda n: [rng.getrandbits(64) for _ in range(n)]
+        self.z_body, self.z_head, self.z_food, self.z_grow = keys(W * H), keys(W * H), keys(W * H), keys(64)
+        self.z_food_turn = rng.getrandbits(64)
+        self.tt = TranspositionTable(tt_bits)
+        self.budget = budget
+        self.max_depth = max_depth
+        self.nodes = 0
+        self.searches = 0
+        self.search_time = 0.0
+        self.depth_total = 0
+        self.last = (0, 0, 0.0)  # depth, nodes, seconds of the latest search
+
+    # ---------- STATE ----------
+    def _load(self, snake, food_x, food_y):
+        self.body = deque(x // B + y // B * W for x, y in snake.body)
+        self.occ = bytearray(W * H)
+        key = 0
+        for c in self.body:
+            if 0 <= c < W * H:
+                self.occ[c] += 1
+                key ^= self.z_body[c]
+        self.length = snake.length
+        self.food = food_x // B + food_y // B * W
+        self.key = key ^ self.z_head[self.body[0]] ^ self.z_food[self.food] ^ self.z_grow[self._growth()]
+
+    def _growth(self):
+        return min(self.length - len(self.body), 63)
+
+    def _tick(self):
+        self.nodes += 1
+        if self.nodes & (CHECK_EVERY - 1) == 0 and self.stoppable and time.perf_counter() > self.deadline:
+            raise Timeout
+
+    # ---------- SEARCH ----------
+    def choose(self, snake, food_x, food_y):
+        """Direction (dx, dy) in pixels for the snake's next step."""
+        start = time.perf_counter()
+        nodes = self.nodes
+        self.deadline = start + self.budget
+        self._load(snake, food_x, food_y)
+        self.tt.new_search()
+        move, reached = 0, 0
+        for depth in range(1, self.max_depth + 1):
+            # depth 1 always finishes so there is a move to play
+            self.stoppable = depth > 1
+            try:
+                value, move_at_depth = self._root(depth)
+            except Timeout:
+                self._load(snake, food_x, food_y)
+                break
+            move, reached = move_at_depth, depth
+            if abs(value) >= DEATH - self.max_depth or time.perf_counter() > self.deadline:
+                break  # the outcome is forced, or there is no time for another iteration
+        elapsed = time.perf_counter() - start
+        self.searches += 1
+        self.search_time += elapsed
+        self.depth_total += reached
+        self.last = (reached, self.nodes - nodes, elapsed)
+        dx, dy = SNAKE_MOVES[move]
+        return dx * B, dy * B
+
+    def _root(self, depth):
+        best, best_move = -INF, 0
+        alpha = -INF
+        for m in self._snake_order(-1):
+            value = self._snake_move(m, depth, alpha, INF)
+            if value > best:
+                best, best_move = value, m
+            alpha = max(alpha, value)
+        self.tt.store(self.key, depth, best, EXACT, best_move)
+        return best, best_move
+
+    def _snake_order(self, first):
+        head, food = self.body[0], self.food
+        fx, fy = XS[food], YS[food]
+        order = sorted(range(4), key=lambda m: self._distance_after(NEIGHBORS[head][m], fx, fy))
+        if first >= 0:
+            order.remove(first)
+            order.insert(0, first)
+        return order
+
+    @staticmethod
+    def _distance_after(cell, fx, fy):
+        return INF if cell < 0 else abs(XS[cell] - fx) + abs(YS[cell] - fy)
+
+    def _snake_node(self, depth, alpha, beta):
+        """Snake to move; value from the snake's side, counted from this node on."""
+        self._tick()
+        if depth == 0:
+            return self._evaluate()
+        tt = self.tt
+        key = self.key
+        first = -1
+        slot = tt.probe(key)
+        if slot >= 0:
+            first = tt.moves[slot]
+            if tt.depths[slot] >= depth:
+                value, flag = tt.values[slot], tt.flags[slot]
+                if flag == EXACT or (flag == LOWER and value >= beta) or (flag == UPPER and value <= alpha):
+                    return value
+        alpha0 = alpha
+        best, best_move = -INF, 0
+        for m in self._snake_order(first):
+            value = self._snake_move(m, depth, alpha, beta)
+            if value > best:
+                best, best_move = value, m
+                if value > alpha:
+                    alpha = value
+                    if alpha >= beta:
+                        break
+        flag = UPPER if best <= alpha0 else LOWER if best >= beta else EXACT
+        tt.store(key, depth, best, flag, best_move)
+        return best
+
+    def _snake_move(self, m, depth, alpha, beta):
+        """Play snake move m, search the food's replies and take it back."""
+        body, occ = self.body, self.occ
+        head = body[0]
+        cell = NEIGHBORS[head][m]
+        if cell < 0:
+            return -DEATH - depth
+        saved_key, saved_length = self.key, self.length
+        key = saved_key ^ self.z_grow[self._growth()] ^ self.z_head[head] ^ self.z_head[cell] ^ self.z_body[cell]
+        body.appendleft(cell)
+        occ[cell] += 1
+        tail = -1
+        if len(body) > self.length:
+            tail = body.pop()
+            occ[tail] -= 1
+            key ^= self.z_body[tail]
+        if occ[cell] > 1:
+            value = -DEATH - depth
+        else:
+            bonus = 0
+            if cell == self.food:
+                self.length += 1
+                bonus = EAT
+            self.key = key ^ self.z_grow[self._growth()] ^ self.z_food_turn
+            value = bonus + self._food_node(depth, alpha - bonus, beta - bonus)
+        if tail >= 0:
+            body.append(tail)
+            occ[tail] += 1
+        body.popleft()
+        occ[cell] -= 1
+        self.key, self.length = saved_key, saved_length
+        return value
+
+    def _food_node(self, depth, alpha, beta):
+        """Food to move: it picks the reply worst for the snake."""
+        self._tick()
+        tt = self.tt
+        key = self.key
+        first = -1
+        slot = tt.probe(key)
+        if slot >= 0:
+            first = tt.moves[slot]
+            if tt.depths[slot] >= depth:
+                value, flag = tt.values[slot], tt.flags[slot]
+                if flag == EXACT or (flag == LOWER and value >= beta) or (flag == UPPER and value <= alpha):
+                    return value
+        food = self.food
+        steps = FOOD_STEPS[food]
+        head = self.body[0]
+        hx, hy = XS[head], YS[head]
+        # away from the head first
+        order = sorted(range(5), key=lambda m: -abs(XS[steps[m]] - hx) - abs(YS[steps[m]] - hy))
+        if first >= 0:
+            order.remove(first)
+            order.insert(0, first)
+        beta0 = beta
+        best, best_move = INF, 0
+        tried = set()
+        for m in order:
+            cell = steps[m]
+            if cell in tried:  # clamped against a wall, same as another reply
+                continue
+            tried.add(cell)
+            self.food = cell
+            self.key = key ^ self.z_food[food] ^ self.z_food[cell] ^ self.z_food_turn
+            value = self._snake_node(depth - 1, alpha, beta)
+            self.food, self.key = food, key
+            if value < best:
+                best, best_move = value, m
+                if value < beta:
+                    beta = value
+                    if alpha >= beta:
+                        break
+        flag = LOWER if best >= beta0 else UPPER if best <= alpha else EXACT
+        tt.store(key, depth, best, flag, best_move)
+        return best
+
+    def _evaluate(self):
+        """Closer to the food is better; so is having room for the whole body."""
+        head, food, occ = self.body[0], self.food, self.occ
+        value = -DIST_WEIGHT * (abs(XS[head] - XS[food]) + abs(YS[head] - YS[food]))
+        need = min(self.length + 1, SPACE_LIMIT)
+        seen = {head}
+        stack = [head]
+        while stack and len(seen) <= need:
+            for cell in NEIGHBORS[stack.pop()]:
+                if cell >= 0 and not occ[cell] and cell not in seen:
+                    seen.add(cell)
+                    stack.append(cell)
+        room = len(seen) - 1
+        if room < need:
+            value -= TRAP_WEIGHT * (need - room)
+        return value
+
+    # ---------- STATS ----------
+    def stats(self):
+        tt = self.tt
+        return {
+            "searches": self.searches,
+            "nodes": self.nodes,
+            "nodes_per_sec": self.nodes / self.search_time if self.search_time else 0.0,
+            "mean_depth": self.depth_total / self.searches if self.searches else 0.0,
+            "last_depth": self.last[0],
+            "tt_hit_rate": tt.hits / tt.probes if tt.probes else 0.0,
+            "tt_bytes": tt.nbytes,
+        }
+
+    def hud(self):
+        depth, nodes, seconds = self.last
+        return f"depth {depth}  {nodes / seconds / 1000 if seconds else 0:.0f}k nodes/s"
+
+    def report(self):
+        s = self.stats()
+        print(f"Search: {s['searches']} moves, {s['nodes']:,} nodes at {s['nodes_per_sec']:,.0f}/s, "
+              f"mean depth {s['mean_depth']:.1f}, TT hit rate {s['tt_hit_rate']:.1%} "
+              f"({s['tt_bytes'] >> 20} MB)")
+
@@ -0,0 +1,263 @@
+"""Arena mode for planb: hundreds of snakes and many food pieces on one grid.
+
+There are no per-snake objects.  The world is a set of NumPy arrays: head
+positions, directions, lengths and liveness per snake, each body as a ring
+of cell indices, food positions, and one occupancy grid holding the owner
+of every body cell.  Each tick moves every snake in batched operations:
+steering toward the nearest food while avoiding occupied cells, moving,
+eating and growing, freeing tails, and resolving wall, self, snake-vs-snake
+and head-on collisions.  Dead snakes are cleared and respawn later.
+
+You steer food 0 with the arrow keys; the other pieces wander.
+
+    python planb.py --arena 300 --foods 60
+    python planb_arena.py --snakes 1000       # headless benchmark
+"""
+import argparse
+import time
+
+import numpy as np
+import pygame
+
+import inputbuf
+import planb
+
+MOVES = np.array([(1, 0), (-1, 0), (0, 1), (0, -1)], np.int32)
+MAX_LENGTH = 256
+START_LENGTH = 3
+RESPAWN_TICKS = 40
+BLOCKED = 1 << 20  # steering penalty for a move onto an occupied cell or off the board
+
+
+class Arena:
+    def __init__(self, width, height, snakes, foods, seed=None, max_length=MAX_LENGTH):
+        self.w, self.h = width, height
+        self.n, self.max_length = snakes, max_length
+        self.rng = np.random.default_rng(seed)
+        self.occ = np.zeros(width * height, np.int32)  # 0 empty, else snake index + 1
+        self.head = np.zeros((snakes, 2), np.int32)
+        self.dir = np.zeros((snakes, 2), np.int32)
+        self.length = np.zeros(snakes, np.int32)  # target length
+        self.count = np.zeros(snakes, np.int32)   # cells in the body right now
+        self.body = np.zeros((snakes, max_length), np.int32)  # ring of cell indices
+        self.ptr = np.zeros(snakes, np.int32)     # ring slot of the head
+        self.alive = np.zeros(snakes, bool)
+        self.dead_for = np.full(snakes, RESPAWN_TICKS, np.int32)
+        self.eaten = np.zeros(snakes, np.int32)
+        self.food = np.zeros((foods, 2), np.int32)
+        self.food[:] = self.empty_cells(foods)
+        self.ticks = 0
+        self.deaths = 0
+        self.player_eaten = 0
+        self.respawn()
+
+    # ---------- HELPERS ----------
+    def empty_cells(self, k):
+        """k random cells that no snake occupies, as (k, 2) x, y."""
+        out = np.empty((0, 2), np.int32)
+        while len(out) < k:
+            cells = self.rng.integers(0, self.w * self.h, 2 * (k - len(out)) + 8)
+            cells = cells[self.occ[cells] == 0]
+            out = np.concatenate([out, np.stack([cells % self.w, cells // self.w], 1)])
+        return out[:k].astype(np.int32)
+
+    def body_cells(self, idx):
+        """Flat cell indices of the bodies of snakes idx."""
+        back = np.arange(self.max_length)
+        slots = (self.ptr[idx, None] - back) % self.max_length
+        return self.body[idx[:, None], slots][back < self.count[idx, None]]
+
+    def respawn(self):
+        """Bring back snakes that have been dead for RESPAWN_TICKS."""
+        idx = np.flatnonzero(~self.alive & (self.dead_for >= RESPAWN_TICKS))
+        if not len(idx):
+            return
+        pos = self.empty_cells(len(idx))
+        cells = pos[:, 0] + pos[:, 1] * self.w
+        # two respawns on one cell: keep the first
+        cells, first = np.unique(cells, return_index=True)
+        idx, pos = idx[first], pos[first]
+        self.head[idx] = pos
+        self.dir[idx] = 0
+        self.length[idx] = START_LENGTH
+        self.count[idx] = 1
+        self.ptr[idx] = 0
+        self.body[idx, 0] = cells
+        self.alive[idx] = True
+        self.eaten[idx] = 0
+        self.occ[cells] = idx + 1
+
+    # ---------- TICK ----------
+    def move_food(self, player_bits):
+        dx = bool(player_bits & 2) - bool(player_bits & 1)
+        dy = bool(player_bits & 8) - bool(player_bits & 4)
+        steps = np.concatenate([np.zeros((1, 2), np.int32), MOVES])
+        walk = steps[self.rng.integers(0, 5, len(self.food))]
+        walk[0] = (dx, dy)
+        self.food += walk
+        np.clip(self.food, 0, (self.w - 1, self.h - 1), out=self.food)
+
+    def steer(self):
+        """Every snake heads for its nearest food, x gap first like planb's
+        snake, but never onto an occupied cell or off the board if it can help it."""
+        live = np.flatnonzero(self.alive)
+        head = self.head[live]
+        gap = np.abs(head[:, None, :] - self.food[None, :, :]).sum(axis=2)
+        target = self.food[gap.argmin(axis=1)]
+        nxt = head[:, None, :] + MOVES[None, :, :]
+        inside = (nxt[..., 0] >= 0) & (nxt[..., 0] < self.w) & (nxt[..., 1] >= 0) & (nxt[..., 1] < self.h)
+        cells = np.clip(nxt[..., 0], 0, self.w - 1) + np.clip(nxt[..., 1], 0, self.h - 1) * self.w
+        free = inside & (self.occ[cells] == 0)
+        score = 2 * np.abs(nxt - target[:, None, :]).sum(axis=2) + (MOVES[:, 1] != 0) + BLOCKED * ~free
+        self.dir[live] = MOVES[score.argmin(axis=1)]
+
+    def tick(self, player_bits=0):
+        self.ticks += 1
+        self.move_food(player_bits)
+        self.steer()
+        live = np.flatnonzero(self.alive)
+        new = self.head[live] + self.dir[live]
+        inside = (new[:, 0] >= 0) & (new[:, 0] < self.w) & (new[:, 1] >= 0) & (new[:, 1] < self.h)
+        cells = np.clip(new[:, 0], 0, self.w - 1) + np.clip(new[:, 1], 0, self.h - 1) * self.w
+
+        # a head landing on food keeps its tail this tick; the food only counts
+        # as eaten once collisions show the snake survived the move
+        food_cells = self.food[:, 0] + self.food[:, 1] * self.w
+        grows = np.isin(cells, food_cells) & inside
+        grown = np.minimum(self.length[live] + grows, self.max_length)
+
+        # tails move first, so following a tail (any snake's) is legal
+        tails = live[self.count[live] >= grown]
+        tail_slots = (self.ptr[tails] - self.count[tails] + 1) % self.max_length
+        self.occ[self.body[tails, tail_slots]] = 0
+        self.count[tails] -= 1
+
+        # walls, bodies, and heads meeting on one cell
+        dies = ~inside | (self.occ[cells] != 0)
+        shared = np.bincount(cells[inside], minlength=self.w * self.h)[cells] > 1
+        dies |= shared & inside
+
+        # eating: a surviving head on food grows that snake and respawns the food
+        eats = grows & ~dies
+        self.length[live[eats]] = grown[eats]
+        self.eaten[live[eats]] += 1
+        hit = np.isin(food_cells, cells[eats])
+        if hit[0]:
+            self.player_eaten += 1
+            if planb.sounds:
+                planb.sounds.trigger("eat", 1)
+
+        movers, moved_cells = live[~dies], cells[~dies]
+        self.head[movers] = new[~dies]
+        self.ptr[movers] = (self.ptr[movers] + 1) % self.max_length
+        self.body[movers, self.ptr[movers]] = moved_cells
+        self.count[movers] += 1
+        self.occ[moved_cells] = movers + 1
+
+        dead = live[dies]
+        if len(dead):
+            self.occ[self.body_cells(dead)] = 0
+            self.alive[dead] = False
+            self.dead_for[dead] = 0
+            self.count[dead] = 0
+            self.deaths += len(dead)
+        if hit.any():
+            self.food[hit] = self.empty_cells(int(hit.sum()))
+        self.dead_for[~self.alive] += 1
+        self.respawn()
+
+    # ---------- DRAWING ----------
+    def palette(self):
+        hues = np.linspace(0, 1, self.n, endpoint=False)
+        rgb = np.stack([np.abs(((hues * 6 + k) % 6) - 3) - 1 for k in (0, 4, 2)], 1).clip(0, 1)
+        return np.concatenate([[[0, 0, 0]], 60 + 195 * rgb]).astype(np.uint8)
+
+
+def run(snakes, foods, width, height, seed=None, move_on_press=False):
+    timer, assets = planb.init()
+    if not planb.finish_loading(timer, assets):
+        pygame.quit()
+        return
+    screen = planb.screen
+    arena = Arena(width, height, snakes, foods, seed)
+    scale = max(1, min(planb.SCREEN_WIDTH // width, planb.SCREEN_HEIGHT // height))
+    grid = pygame.Surface((width, height))
+    palette = arena.palette()
+    food_image = pygame.transform.scale(planb.food_image, (max(scale, 6), max(scale, 6)))
+    inputs = inputbuf.InputBuffer(planb.KEY_BITS, move_on_press)
+    clock = pygame.time.Clock()
+    next_tick = time.perf_counter()
+    tick_time = frames = 0
+
+    running = True
+    while running:
+        now = time.perf_counter()
+        pressed = 0
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT or (event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE):
+                running = False
+            pressed |= inputs.push(event, now)
+        if pressed:
+            # move-on-press: step food 0 now, the others wait for the tick
+            arena.food[0] += ((pressed & 2) // 2 - (pressed & 1), (pressed & 8) // 8 - (pressed & 4) // 4)
+            np.clip(arena.food[0], 0, (width - 1, height - 1), out=arena.food[0])
+
+        if now >= next_tick:
+            next_tick = max(next_tick + 1 / planb.FPS, now)
+            bits, _ = inputs.take(now)
+            t = time.perf_counter()
+            arena.tick(bits)
+            tick_time += time.perf_counter() - t
+
+        rgb = palette[arena.occ.reshape(height, width)]
+        fx, fy = arena.food[1:, 0], arena.food[1:, 1]
+        rgb[fy, fx] = (255, 255, 255)
+        pygame.surfarray.blit_array(grid, rgb.transpose(1, 0, 2))
+        screen.fill(planb.BLACK)
+        screen.blit(pygame.transform.scale(grid, (width * scale, height * scale)), (0, 0))
+        px, py = arena.food[0]
+        screen.blit(food_image, (px * scale + (scale - food_image.get_width()) // 2,
+                                 py * scale + (scale - food_image.get_height()) // 2))
+        text = planb.font.render(f"Snakes {arena.alive.sum()}/{snakes}   longest {arena.count.max()}   "
+                                 f"your food eaten {arena.player_eaten}x", True, planb.WHITE)
+        screen.blit(text, (10, 10))
+        frames += 1
+        if planb.sounds:
+            planb.sounds.flush()
+        pygame.display.update()
+        if frames == 1:
+            timer.mark("first game frame")
+            timer.report(assets)
+        clock.tick(planb.RENDER_FPS)
+
+    print(f"Arena {width}x{height}, {snakes} snakes, {foods} food: {arena.ticks} ticks, "
+          f"{1000 * tick_time / max(1, arena.ticks):.2f} ms/tick, {arena.deaths} deaths")
+    inputs.report()
+    pygame.quit()
+
+
+def bench(snakes, foods, width, height, ticks, seed=0):
+    arena = Arena(width, height, snakes, foods, seed)
+    t = time.perf_counter()
+    for _ in range(ticks):
+        arena.tick()
+    elapsed = time.perf_counter() - t
+    print(f"{snakes} snakes, {foods} food on {width}x{height}: {ticks / elapsed:,.0f} ticks/s "
+          f"({1000 * elapsed / ticks:.2f} ms/tick, {snakes * ticks / elapsed:,.0f} snake-moves/s), "
+          f"{arena.deaths} deaths, longest {arena.count.max()}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless benchmark of planb's arena mode")
+    parser.add_argument("--snakes", type=int, default=300)
+    parser.add_argument("--foods", type=int, default=60)
+    parser.add_argument("--board", default="200x150", metavar="WxH")
+    parser.add_argument("--ticks", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    width, height = map(int, args.board.lower().split("x"))
+    bench(args.snakes, args.foods, width, height, args.ticks, args.seed)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+"""Headless tournament of scripted food strategies for planb.
+
+Each game uses planb's own Snake and Food with no display. Game i of a
+strategy is seeded with seed + i, so any single game can be reproduced.
+Games are split into batches and played on a multiprocessing pool. Each
+batch comes back as a few NumPy columns, and the columns are written to
+one compressed .npz file.
+
+    python planb_tournament.py --games 5000 --out results.npz
+    python planb_tournament.py --games 2000 --scaling
+    python planb_tournament.py --games 200 --hard-depth 4
+"""
+import argparse
+import multiprocessing as mp
+import random
+import time
+
+import numpy as np
+
+import planb
+
+B = planb.BLOCK_SIZE
+LEFT, RIGHT, UP, DOWN = 1, 2, 4, 8
+
+
+# ---------- STRATEGIES ----------
+# A strategy maps (food, snake, rng) to planb input bits for this tick.
+def still(food, snake, rng):
+    return 0
+
+
+def wander(food, snake, rng):
+    return rng.choice((0, LEFT, RIGHT, UP, DOWN))
+
+
+def flee(food, snake, rng):
+    """Step away from the snake's head along the axis it is closest on."""
+    dx, dy = food.x - snake.x, food.y - snake.y
+    if abs(dx) < abs(dy):
+        bits = RIGHT if dx >= 0 else LEFT
+        if (bits == RIGHT and food.x >= planb.SCREEN_WIDTH - B) or (bits == LEFT and food.x <= 0):
+            bits = UP if dy < 0 else DOWN
+    else:
+        bits = DOWN if dy >= 0 else UP
+        if (bits == DOWN and food.y >= planb.SCREEN_HEIGHT - B) or (bits == UP and food.y <= 0):
+            bits = LEFT if dx < 0 else RIGHT
+    return bits
+
+
+def bait(food, snake, rng):
+    """Cross behind the head to make a long snake turn back into itself."""
+    if snake.length < 3:
+        return flee(food, snake, rng)
+    if snake.dx:
+        return LEFT if snake.dx > 0 else RIGHT
+    if snake.dy:
+        return UP if snake.dy > 0 else DOWN
+    return 0
+
+
+STRATEGIES = {"still": still, "wander": wander, "flee": flee, "bait": bait}
+
+
+# ---------- GAMES ----------
+def play(strategy, seed, max_ticks, hard_depth=0):
+    """One headless planb game. Returns (ticks survived, score, capped).
+    hard_depth > 0 plays against the searching snake at that fixed depth."""
+    random.seed(seed)
+    rng = random.Random(seed ^ 0x5EED)
+    if hard_depth:
+        import planb_ai
+        snake = planb.Snake(planb_ai.Search(budget=float("inf"), max_depth=hard_depth, tt_bits=16))
+    else:
+        snake = planb.Snake()
+    food = planb.Food()
+    score = 0
+    for tick in range(1, max_ticks + 1):
+        bits = strategy(food, snake, rng)
+        if bits & LEFT:
+            food.move(-B, 0)
+        if bits & RIGHT:
+            food.move(B, 0)
+        if bits & UP:
+            food.move(0, -B)
+        if bits & DOWN:
+            food.move(0, B)
+        snake.move(food.x, food.y)
+        if (snake.x, snake.y) == (food.x, food.y):
+            snake.grow()
+            score += 10
+        if snake.check_collision():
+            return tick, score, False
+    return max_ticks, score, True
+
+
+def play_batch(task):
+    """Worker entry point: a batch of consecutive seeds for one strategy."""
+    code, name, first_seed, count, max_ticks, hard_depth = task
+    strategy = STRATEGIES[name]
+    ticks = np.empty(count, np.uint32)
+    scores = np.empty(count, np.uint32)
+    capped = np.empty(count, bool)
+    for i in range(count):
+        ticks[i], scores[i], capped[i] = play(strategy, first_seed + i, max_ticks, hard_depth)
+    seeds = np.arange(first_seed, first_seed + count, dtype=np.uint32)
+    return np.full(count, code, np.uint8), seeds, ticks, scores, capped
+
+
+def run(names, games, seed, max_ticks, workers, batch, hard_depth=0):
+    tasks = [(code, name, seed + start, min(batch, games - start), max_ticks, hard_depth)
+             for code, name in enumerate(names) for start in range(0, games, batch)]
+    columns = [[] for _ in range(5)]
+    with mp.Pool(workers) as pool:
+        for result in pool.imap_unordered(play_batch, tasks):
+            for col, part in zip(columns, result):
+                col.append(part)
+    strategy, seeds, ticks, scores, capped = (np.concatenate(c) for c in columns)
+    # imap_unordered returns batches as they finish; sort for a stable file
+    order = np.lexsort((seeds, strategy))
+    return {"strategy": strategy[order], "seed": seeds[order], "ticks": ticks[order],
+            "score": scores[order], "capped": capped[order]}
+
+
+def summarize(results, names):
+    print(f"{'strategy':<8} {'games':>6} {'ticks p10/p50/p90':>20} {'mean ticks':>10} "
+          f"{'mean score':>10} {'max score':>9} {'capped':>7}")
+    for code, name in enumerate(names):
+        sel = results["strategy"] == code
+        ticks, scores = results["ticks"][sel], results["score"][sel]
+        p10, p50, p90 = np.percentile(ticks, (10, 50, 90))
+        print(f"{name:<8} {sel.sum():>6} {p10:>6.0f}/{p50:>6.0f}/{p90:>6.0f} {ticks.mean():>10.1f} "
+              f"{scores.mean():>10.1f} {scores.max():>9} {results['capped'][sel].mean():>6.1%}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tournament of planb food strategies")
+    parser.add_argument("--strategies", default=",".join(STRATEGIES))
+    parser.add_argument("--games", type=int, default=2000, help="games per strategy")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--max-ticks", type=int, default=2000)
+    parser.add_argument("--workers", type=int, default=mp.cpu_count())
+    parser.add_argument("--batch", type=int, default=100, help="games per work item")
+    parser.add_argument("--out", default="tournament.npz")
+    parser.add_argument("--hard-depth", type=int, default=0,
+                        help="play against the searching snake (planb --hard) at this depth")
+    parser.add_argument("--scaling", action="store_true",
+                        help="time the run with 1..workers processes instead")
+    args = parser.parse_args()
+    names = args.strategies.split(",")
+
+    if args.scaling:
+        base = None
+        for w in range(1, args.workers + 1):
+            t = time.perf_counter()
+            run(names, args.games, args.seed, args.max_ticks, w, args.batch, args.hard_depth)
+            elapsed = time.perf_counter() - t
+            base = base or elapsed
+            print(f"{w} workers: {elapsed:.2f} s, speedup {base / elapsed:.2f}x")
+        return
+
+    t = time.perf_counter()
+    results = run(names, args.games, args.seed, args.max_ticks, args.workers, args.batch, args.hard_depth)
+    elapsed = time.perf_counter() - t
+    np.savez_compressed(args.out, names=np.array(names), **results)
+    print(f"{len(results['seed'])} games in {elapsed:.2f} s on {args.workers} workers "
+          f"({len(results['seed']) / elapsed:,.0f} games/s), written to {args.out}")
+    summarize(results, names)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,220 @@
+"""Huge-board mode for planb.
+
+The board is stored as CHUNK x CHUNK uint8 arrays that are only allocated
+once the snake reaches them.  Each chunk has a cached pre-rendered surface
+that is redrawn only after one of its cells changes, and only chunks that
+intersect the camera's viewport are drawn.  Collision is a single cell
+lookup and food spawns by sampling cells, so neither depends on board size.
+
+    python planb.py --board 4000x4000
+"""
+import random
+import time
+from collections import OrderedDict, deque
+
+import numpy as np
+import pygame
+
+import inputbuf
+import planb
+
+CHUNK = 32
+EMPTY, SNAKE = 0, 1
+MAX_SURFACES = 64
+B = planb.BLOCK_SIZE
+
+
+class ChunkedBoard:
+    def __init__(self, width, height):
+        self.width, self.height = width, height
+        self.chunks = {}
+        self.dirty = set()
+        self.surfaces = OrderedDict()
+        self.redraws = 0
+
+    def in_bounds(self, x, y):
+        return 0 <= x < self.width and 0 <= y < self.height
+
+    def get(self, x, y):
+        chunk = self.chunks.get((x // CHUNK, y // CHUNK))
+        return EMPTY if chunk is None else chunk[y % CHUNK, x % CHUNK]
+
+    def set(self, x, y, value):
+        key = (x // CHUNK, y // CHUNK)
+        chunk = self.chunks.get(key)
+        if chunk is None:
+            chunk = self.chunks[key] = np.zeros((CHUNK, CHUNK), np.uint8)
+        chunk[y % CHUNK, x % CHUNK] = value
+        self.dirty.add(key)
+
+    def random_empty_cell(self, rng):
+        while True:
+            x, y = rng.randrange(self.width), rng.randrange(self.height)
+            if self.get(x, y) == EMPTY:
+                return x, y
+
+    def chunk_surface(self, key):
+        """Cached render of one chunk, redrawn only if its cells changed."""
+        surf = self.surfaces.get(key)
+        if surf is not None and key not in self.dirty:
+            self.surfaces.move_to_end(key)
+            return surf
+        if surf is None:
+            surf = pygame.Surface((CHUNK * B, CHUNK * B)).convert()
+        surf.fill(planb.BLACK)
+        ys, xs = np.nonzero(self.chunks[key])
+        surf.blits([(planb.snake_image, (x * B, y * B)) for x, y in zip(xs.tolist(), ys.tolist())], False)
+        self.dirty.discard(key)
+        self.surfaces[key] = surf
+        self.surfaces.move_to_end(key)
+        while len(self.surfaces) > MAX_SURFACES:
+            self.surfaces.popitem(last=False)
+        self.redraws += 1
+        return surf
+
+
+class Camera:
+    def __init__(self, board, view_w, view_h):
+        self.board = board
+        self.w, self.h = view_w, view_h
+        self.x = self.y = 0
+
+    def follow(self, cx, cy):
+        """Center on cell (cx, cy), clamped to the board."""
+        self.x = min(max(cx * B + B // 2 - self.w // 2, 0), max(0, self.board.width * B - self.w))
+        self.y = min(max(cy * B + B // 2 - self.h // 2, 0), max(0, self.board.height * B - self.h))
+
+    def visible_chunks(self):
+        size = CHUNK * B
+        for cy in range(self.y // size, (self.y + self.h - 1) // size + 1):
+            for cx in range(self.x // size, (self.x + self.w - 1) // size + 1):
+                yield cx, cy
+
+    def to_screen(self, cx, cy):
+        return cx * B - self.x, cy * B - self.y
+
+
+class BigSnake:
+    """planb's greedy snake on board cells, with O(1) collision against the board."""
+
+    def __init__(self, board, x, y):
+        self.board = board
+        self.x, self.y = x, y
+        self.dx = self.dy = 0
+        self.body = deque([(x, y)])
+        self.length = 1
+        board.set(x, y, SNAKE)
+
+    def move(self, food_x, food_y):
+        """Same steering as planb.Snake.move. Returns True on a wall or self collision."""
+        if self.x < food_x:
+            self.dx, self.dy = 1, 0
+        elif self.x > food_x:
+            self.dx, self.dy = -1, 0
+        elif self.y < food_y:
+            self.dx, self.dy = 0, 1
+        elif self.y > food_y:
+            self.dx, self.dy = 0, -1
+        self.x += self.dx
+        self.y += self.dy
+        if not self.board.in_bounds(self.x, self.y):
+            return True
+        self.body.appendleft((self.x, self.y))
+        if len(self.body) > self.length:
+            self.board.set(*self.body.pop(), EMPTY)
+        if len(self.body) > 1 and self.board.get(self.x, self.y) == SNAKE:
+            return True
+        self.board.set(self.x, self.y, SNAKE)
+        return False
+
+
+class BigFood:
+    def __init__(self, board, x, y):
+        self.board = board
+        self.x, self.y = x, y
+
+    def move(self, bits):
+        dx = bool(bits & 2) - bool(bits & 1)
+        dy = bool(bits & 8) - bool(bits & 4)
+        self.x = max(0, min(self.x + dx, self.board.width - 1))
+        self.y = max(0, min(self.y + dy, self.board.height - 1))
+
+
+def move_bits(food, bits):
+    """Apply planb input bits one axis step at a time, like planb.move_food."""
+    for bit in (1, 2, 4, 8):
+        if bits & bit:
+            food.move(bit)
+
+
+def run(width, height, seed=None, move_on_press=False):
+    timer, assets = planb.init()
+    if not planb.finish_loading(timer, assets):
+        pygame.quit()
+        return
+    screen = planb.screen
+    rng = random.Random(seed)
+    board = ChunkedBoard(width, height)
+    camera = Camera(board, planb.SCREEN_WIDTH, planb.SCREEN_HEIGHT)
+    snake = BigSnake(board, width // 2, height // 2)
+    food = BigFood(board, *board.random_empty_cell(rng))
+    inputs = inputbuf.InputBuffer(planb.KEY_BITS, move_on_press)
+    clock = pygame.time.Clock()
+    score = 0
+    next_tick = time.perf_counter()
+    draw_time = frames = 0
+    game_over = False
+
+    running = True
+    while running:
+        now = time.perf_counter()
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT or (event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE):
+                running = False
+            move_bits(food, inputs.push(event, now))
+
+        if now >= next_tick:
+            next_tick = max(next_tick + 1 / planb.FPS, now)
+            bits, _ = inputs.take(now)
+            move_bits(food, bits)
+            if snake.move(food.x, food.y):
+                if planb.sounds:
+                    planb.sounds.trigger("over", 2)
+                game_over = True
+                running = False
+            elif (snake.x, snake.y) == (food.x, food.y):
+                snake.length += 1
+                score += 10
+                if planb.sounds:
+                    planb.sounds.trigger("eat", 1)
+
+        t = time.perf_counter()
+        camera.follow(food.x, food.y)
+        screen.fill(planb.BLACK)
+        for key in camera.visible_chunks():
+            if key in board.chunks:
+                screen.blit(board.chunk_surface(key), camera.to_screen(key[0] * CHUNK, key[1] * CHUNK))
+        bx, by = camera.to_screen(0, 0)
+        pygame.draw.rect(screen, (90, 90, 90), (bx - 2, by - 2, width * B + 4, height * B + 4), 2)
+        screen.blit(planb.food_image, camera.to_screen(food.x, food.y))
+        dist = abs(snake.x - food.x) + abs(snake.y - food.y)
+        text = planb.font.render(f"Score: {score}   Snake: {dist} cells away", True, planb.WHITE)
+        screen.blit(text, (10, 10))
+        draw_time += time.perf_counter() - t
+        frames += 1
+
+        if planb.sounds:
+            planb.sounds.flush()
+        pygame.display.update()
+        if frames == 1:
+            timer.mark("first game frame")
+            timer.report(assets)
+        clock.tick(planb.RENDER_FPS)
+
+    print(f"Board {width}x{height}: {len(board.chunks)} chunks allocated, "
+          f"{board.redraws} chunk redraws, {1000 * draw_time / max(1, frames):.2f} ms/frame drawing")
+    inputs.report()
+    # Let the game over sound finish before the mixer shuts down
+    if planb.sounds and game_over:
+        pygame.time.wait(1000)
+    pygame.quit()
@@ -1,33 +1,62 @@
-import sys, math, random, time
+import sys, math, random, argparse, functools
 import pygame, numpy as np
 
+import loader
+import recorder
+import rewind
+import sfx
+
 # ---------- SETTINGS ----------
 SCREEN_W, SCREEN_H = 800, 600
 PLAYER_SPEED = 4.0
 SNAKE_SPEED = 2.0
+TURN_BLEND = 0.15  # how far the snake's heading turns toward where it wants to go each frame
 SNAKE_LENGTH = 12
+SEGMENT_SPACING = 15  # arc length between body segments along the head's path
 FPS = 60
 
-pygame.init()
-pygame.mixer.pre_init(44100, -16, 1, 512)
-pygame.mixer.init()
+# input bits, also the format of recorded sessions
+BIT_LEFT, BIT_RIGHT, BIT_UP, BIT_DOWN, BIT_REWIND = 1, 2, 4, 8, 16
+REWIND_SPEED = 2  # frames stepped back per frame while rewinding
+
+screen = clock = font = big_font = None
+sounds = None
+
+def init():
+    """Open the window and start loading fonts and sounds in the background."""
+    global screen, clock
+    timer = loader.StartupTimer()
+    pygame.mixer.pre_init(44100, -16, 1, 512)
+    pygame.init()
+
+    screen = pygame.display.set_mode((SCREEN_W, SCREEN_H))
+    pygame.display.set_caption("Reverse Snake ✨")
+    clock = pygame.time.Clock()
+    timer.mark("window")
 
-screen = pygame.display.set_mode((SCREEN_W, SCREEN_H))
-pygame.display.set_caption("Reverse Snake ✨")
-clock = pygame.time.Clock()
-font = pygame.font.SysFont("consolas", 22)
+    assets = loader.AssetLoader()
+    assets.add("font", pygame.font.SysFont, "consolas", 22)
+    assets.add("big_font", pygame.font.SysFont, "consolas", 48)
+    assets.add("sfx", sfx.load, {
+        "game_over": (functools.partial(make_tone, 130, 700), 0.25),
+        "beep": (functools.partial(make_tone, 660, 70), 0.12),
+        "over": ("over.wav", 0.6),
+    })
+    assets.add("music", loader.start_music, "bg_music.mp3.wav")
+    return timer, assets.start()
+
+def finish_loading(timer, assets):
+    global font, big_font, sounds
+    if not loader.wait_for(assets, screen, timer): return False
+    font, big_font = assets["font"], assets["big_font"]
+    sounds = assets["sfx"]
+    return True
 
 # ---------- SOUND ----------
-def make_tone(freq=440, duration_ms=200, volume=0.2, sample_rate=44100):
+def make_tone(freq=440, duration_ms=200, sample_rate=44100):
+    """Sine samples in [-1, 1] and their rate, ready for sfx.SfxBank."""
     t = np.linspace(0, duration_ms/1000.0, int(sample_rate * duration_ms/1000.0), False)
-    wave = 32767 * np.sin(2 * np.pi * freq * t)
-    audio = wave.astype(np.int16)
-    snd = pygame.mixer.Sound(buffer=audio.tobytes())
-    snd.set_volume(volume)
-    return snd
-
-SND_GAME_OVER = make_tone(130, 700, 0.25)
-SND_BEEP = make_tone(660, 70, 0.12)
+    return np.sin(2 * np.pi * freq * t), sample_rate
 
 # ---------- GRADIENT BACKGROUND ----------
 def draw_gradient_background(surf, time_shift):
@@ -38,12 +67,23 @@ def draw_gradient_background(surf, time_shift):
         pygame.draw.line(surf, (r, g, b), (0, y), (SCREEN_W, y))
 
 # ---------- GLOW DRAW ----------
+_glow_sprites = {}
+
+def glow_sprite(color, radius, intensity):
+    """The additive glow for one circle, rendered once per (color, radius, intensity)."""
+    key = (tuple(color), radius, intensity)
+    glow = _glow_sprites.get(key)
+    if glow is None:
+        glow = pygame.Surface((radius*4, radius*4), pygame.SRCALPHA)
+        for i in range(intensity, 0, -1):
+            alpha = int(25 * i)
+            pygame.draw.circle(glow, (*color, alpha),
+                               (radius*2, radius*2), radius + i*3)
+        _glow_sprites[key] = glow
+    return glow
+
 def draw_glow_circle(surf, color, pos, radius, intensity=6):
-    glow = pygame.Surface((radius*4, radius*4), pygame.SRCALPHA)
-    for i in range(intensity, 0, -1):
-        alpha = int(25 * i)
-        pygame.draw.circle(glow, (*color, alpha),
-                           (radius*2, radius*2), radius + i*3)
+    glow = glow_sprite(color, radius, intensity)
     surf.blit(glow, (pos[0]-radius*2, pos[1]-radius*2), special_flags=pygame.BLEND_RGBA_ADD)
 
 # ---------- PLAYER ----------
@@ -66,81 +106,275 @@ class Player:
         pygame.draw.circle(surf, grad_color2, (int(self.x), int(self.y)), self.radius)
 
 # ---------- SNAKE ----------
+class SnakePath:
+    """The head's trajectory: a ring of points and their cumulative arc length.
+
+    Pushing a point is O(1).  Body segments are not stored; sample() finds
+    the points at given arc lengths behind the head by binary search and
+    interpolates between neighbours, so segments sit exactly on the path.
+    """
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.xy = np.zeros((capacity, 2))
+        self.s = np.zeros(capacity)
+        self.first = 0  # absolute index of the oldest point still in the ring
+        self.total = 0  # points ever pushed; the newest is total - 1
+
+    def line(self, x, y, back, step):
+        """Restart the path as a straight run from (x - back, y) to the head at (x, y)."""
+        n = min(int(math.ceil(back / step)) + 1, self.capacity)
+        self.s[:n] = np.arange(n) * step
+        self.xy[:n, 0] = x - self.s[n-1] + self.s[:n]
+        self.xy[:n, 1] = y
+        self.first, self.total = 0, n
+
+    def push(self, x, y):
+        cap = self.capacity
+        last = (self.total - 1) % cap
+        i = self.total % cap
+        self.s[i] = self.s[last] + math.hypot(x - self.xy[last, 0], y - self.xy[last, 1])
+        self.xy[i, 0], self.xy[i, 1] = x, y
+        self.total += 1
+        self.first = max(self.first, self.total - cap)
+
+    def rewind_to(self, total):
+        """Drop the points pushed after the path had `total` points."""
+        self.total = max(self.first + 1, min(total, self.total))
+
+    def sample(self, back):
+        """(len(back), 2) points at arc lengths `back` behind the head; anything
+        older than the ring clamps to its oldest point."""
+        cap, n = self.capacity, self.total - self.first
+        a = self.first % cap
+        target = self.s[(self.total - 1) % cap] - back
+        if a + n <= cap:
+            j = np.searchsorted(self.s[a:a+n], target, "right") - 1
+        else:
+            # the ring has wrapped: s[a:] holds the older run, s[:a+n-cap] the newer
+            older = cap - a
+            j = np.where(target >= self.s[0],
+                         older + np.searchsorted(self.s[:a+n-cap], target, "right") - 1,
+                         np.searchsorted(self.s[a:], target, "right") - 1)
+        j = np.clip(j, 0, n - 1)
+        i0 = (a + j) % cap
+        i1 = (a + np.minimum(j + 1, n - 1)) % cap
+        s0, s1 = self.s[i0], self.s[i1]
+        t = np.clip((target - s0) / np.maximum(s1 - s0, 1e-9), 0.0, 1.0)[:, None]
+        return self.xy[i0] * (1 - t) + self.xy[i1] * t
+
+
 class AISnake:
-    def __init__(self, x, y, length=SNAKE_LENGTH):
-        self.segments = [[x - i*15, y] for i in range(length)]
+    def __init__(self, x, y, length=SNAKE_LENGTH, history=0, planner=None):
+        """history: extra frames of path kept so a rewind can restore the body;
+        planner: a planc_ai.Planner choosing the heading (hard difficulty)."""
+        self.planner = planner
         self.speed = SNAKE_SPEED
         self.dir_x, self.dir_y = 1.0, 0.0
+        self.x, self.y = float(x), float(y)
+        self.offsets = np.arange(length) * float(SEGMENT_SPACING)
+        body = self.offsets[-1]
+        self.path = SnakePath(int(body / self.speed) + 3 + history)
+        self.path.line(self.x, self.y, body, self.speed)
+
+    @property
+    def segments(self):
+        """(length, 2) segment positions, head first, sampled from the path."""
+        return self.path.sample(self.offsets)
 
     def update(self, tx, ty):
-        head = self.segments[0]
-        vec_x, vec_y = tx - head[0], ty - head[1]
-        dist = math.hypot(vec_x, vec_y) + 1e-6
-        self.dir_x += (vec_x/dist - self.dir_x) * 0.15
-        self.dir_y += (vec_y/dist - self.dir_y) * 0.15
+        if self.planner is not None:
+            want_x, want_y = self.planner.steer(self, tx, ty)
+        else:
+            vec_x, vec_y = tx - self.x, ty - self.y
+            dist = math.hypot(vec_x, vec_y) + 1e-6
+            want_x, want_y = vec_x/dist, vec_y/dist
+        self.dir_x += (want_x - self.dir_x) * TURN_BLEND
+        self.dir_y += (want_y - self.dir_y) * TURN_BLEND
         dlen = math.hypot(self.dir_x, self.dir_y) + 1e-9
         self.dir_x /= dlen; self.dir_y /= dlen
-        head[0] += self.dir_x * self.speed
-        head[1] += self.dir_y * self.speed
-        for i in range(1, len(self.segments)):
-            prev, cur = self.segments[i-1], self.segments[i]
-            dx, dy = prev[0]-cur[0], prev[1]-cur[1]
-            d = math.hypot(dx, dy) + 1e-6
-            if d > 15:
-                cur[0] += (dx/d)*(d-15)
-                cur[1] += (dy/d)*(d-15)
+        self.x += self.dir_x * self.speed
+        self.y += self.dir_y * self.speed
+        self.path.push(self.x, self.y)
+
+    def mark(self):
+        """An O(1) token for the body's current shape, for restore()."""
+        return self.path.total
+
+    def restore(self, mark):
+        self.path.rewind_to(mark)
+        self.x, self.y = self.path.xy[(self.path.total - 1) % self.path.capacity]
 
     def draw(self, surf):
-        for i, seg in enumerate(self.segments):
-            fade = 255 - i*15
-            col = (180, 255, 200)
-            draw_glow_circle(surf, col, (seg[0], seg[1]), 10, intensity=4)
-            pygame.draw.circle(surf, col, (int(seg[0]), int(seg[1])), 8)
+        draw_snake(surf, self.segments)
 
     def collides_with_point(self, px, py, radius=10):
-        return any(math.hypot(seg[0]-px, seg[1]-py) < radius for seg in self.segments)
+        d = self.segments - (px, py)
+        return bool(((d * d).sum(axis=1) < radius * radius).any())
+
+def draw_snake(surf, segs):
+    col = (180, 255, 200)
+    glow = glow_sprite(col, 10, 4)
+    w, h = surf.get_size()
+    # only the segments whose glow reaches the screen
+    on = (segs[:, 0] > -20) & (segs[:, 0] < w + 20) & (segs[:, 1] > -20) & (segs[:, 1] < h + 20)
+    for x, y in segs[on].tolist():
+        surf.blit(glow, (x - 20, y - 20), special_flags=pygame.BLEND_RGBA_ADD)
+        pygame.draw.circle(surf, col, (int(x), int(y)), 8)
+
+# ---------- WORLD ----------
+class World:
+    """Everything a frame of play changes, advanced by one frame's input bits."""
+    def __init__(self, length=SNAKE_LENGTH, history=None, planner=None):
+        self.player = Player(SCREEN_W//2, SCREEN_H//2)
+        self.snake = AISnake(100, 100, length, history.capacity if history is not None else 0, planner)
+        self.history = history
+        self.score, self.game_over, self.go_time = 0, False, None
+        self.t_shift = 0
+        self.rewinding = False
+
+    def step(self, bits, dt):
+        """Play one frame; True if the snake caught the player in it."""
+        dx = bool(bits & BIT_RIGHT) - bool(bits & BIT_LEFT)
+        dy = bool(bits & BIT_DOWN) - bool(bits & BIT_UP)
+        if dx and dy: dx*=0.707; dy*=0.707
+
+        caught = False
+        self.rewinding = self.history is not None and bool(bits & BIT_REWIND)
+        if self.rewinding:
+            restored = self.history.rewind(self.player, self.snake, REWIND_SPEED)
+            if restored: (self.score, self.t_shift), self.game_over = restored, False
+        elif not self.game_over:
+            self.player.move(dx*PLAYER_SPEED, dy*PLAYER_SPEED)
+            self.snake.update(self.player.x, self.player.y)
+            if self.snake.collides_with_point(self.player.x, self.player.y, radius=self.player.radius+2):
+                self.game_over, self.go_time, caught = True, self.t_shift, True
+            self.score += dt*10
+
+        if not self.rewinding: self.t_shift += dt
+        if self.history is not None and not self.rewinding and not self.game_over:
+            self.history.capture(self.player, self.snake, self.score, self.t_shift)
+        return caught
+
+def draw_world(surf, dt, player, segs, score, t_shift, hud=None, rewind_seconds=None, over_for=None):
+    """One frame: hud is the planner's line, rewind_seconds the history left
+    while rewinding, over_for the seconds since the game ended."""
+    draw_gradient_background(surf, t_shift)
+    player.draw(surf, dt)
+    draw_snake(surf, segs)
+    txt = font.render(f"Score: {int(score)}", True, (255,255,255))
+    surf.blit(txt, (10, 10))
+    if hud is not None:
+        surf.blit(font.render(hud, True, (255,255,255)), (10, 36))
+    if rewind_seconds is not None:
+        txt = font.render(f"<< {rewind_seconds:.1f}s", True, (255,255,255))
+        surf.blit(txt, (SCREEN_W - txt.get_width() - 10, 10))
+
+    if over_for is not None:
+        alpha = min(200, int(over_for*200))
+        overlay = pygame.Surface((SCREEN_W, SCREEN_H), pygame.SRCALPHA)
+        overlay.fill((0,0,0,alpha))
+        surf.blit(overlay, (0,0))
+        text = big_font.render("GAME OVER", True, (255,180,200))
+        surf.blit(text, (SCREEN_W//2 - text.get_width()//2, SCREEN_H//2 - 40))
 
 # ---------- MAIN ----------
-def main():
-    player = Player(SCREEN_W//2, SCREEN_H//2)
-    snake = AISnake(100, 100)
-    score, game_over, go_time = 0, False, None
-    t_shift = 0
+def read_input_bits():
+    keys = pygame.key.get_pressed()
+    return ((keys[pygame.K_LEFT] or keys[pygame.K_a]) * BIT_LEFT
+            | (keys[pygame.K_RIGHT] or keys[pygame.K_d]) * BIT_RIGHT
+            | (keys[pygame.K_UP] or keys[pygame.K_w]) * BIT_UP
+            | (keys[pygame.K_DOWN] or keys[pygame.K_s]) * BIT_DOWN
+            | (keys[pygame.K_r] or keys[pygame.K_BACKSPACE]) * BIT_REWIND)
+
+def main(capture=None, log=None, replay=None, headless=False, history=None, length=SNAKE_LENGTH, planner=None):
+    timer, assets = init()
+    if not finish_loading(timer, assets): return
+    world = World(length, history, planner)
+    frame = 0
     while True:
-        dt = clock.tick(FPS) / 1000
+        if replay is not None:
+            if frame >= len(replay): return
+            bits, dt_ms = replay.bits[frame], replay.dts[frame]
+            if not headless: clock.tick(FPS)
+        else:
+            dt_ms = clock.tick(FPS)
+            bits = read_input_bits()
+        if log is not None: log.append(bits, dt_ms)
+        frame += 1
+        dt = dt_ms / 1000
         for e in pygame.event.get():
             if e.type == pygame.QUIT: return
-        keys = pygame.key.get_pressed()
-        dx = (keys[pygame.K_RIGHT] or keys[pygame.K_d]) - (keys[pygame.K_LEFT] or keys[pygame.K_a])
-        dy = (keys[pygame.K_DOWN] or keys[pygame.K_s]) - (keys[pygame.K_UP] or keys[pygame.K_w])
-        if dx and dy: dx*=0.707; dy*=0.707
-
-        if not game_over:
-            player.move(dx*PLAYER_SPEED, dy*PLAYER_SPEED)
-            snake.update(player.x, player.y)
-            if snake.collides_with_point(player.x, player.y, radius=player.radius+2):
-                SND_GAME_OVER.play(); game_over, go_time = True, time.time()
-            score += dt*10
+        if world.step(bits, dt) and sounds:
+            sounds.trigger("game_over", 2); sounds.trigger("over", 2)
 
         # DRAW
-        t_shift += dt
-        draw_gradient_background(screen, t_shift)
-        player.draw(screen, dt)
-        snake.draw(screen)
-        txt = font.render(f"Score: {int(score)}", True, (255,255,255))
-        screen.blit(txt, (10, 10))
-
-        if game_over:
-            alpha = min(200, int((time.time()-go_time)*200))
-            overlay = pygame.Surface((SCREEN_W, SCREEN_H), pygame.SRCALPHA)
-            overlay.fill((0,0,0,alpha))
-            screen.blit(overlay, (0,0))
-            big_font = pygame.font.SysFont("consolas", 48)
-            text = big_font.render("GAME OVER", True, (255,180,200))
-            screen.blit(text, (SCREEN_W//2 - text.get_width()//2, SCREEN_H//2 - 40))
-            if time.time()-go_time > 3: return
+        over_for = world.t_shift - world.go_time if world.game_over else None
+        draw_world(screen, dt, world.player, world.snake.segments, world.score, world.t_shift,
+                   planner.hud() if planner is not None else None,
+                   history.seconds if world.rewinding else None, over_for)
+        if over_for is not None and over_for > 3: return
 
+        if sounds: sounds.flush()
+        if capture is not None: capture.capture(screen)
         pygame.display.flip()
+        if frame == 1:
+            timer.mark("first game frame"); timer.report(assets)
+
+def positive_int(text):
+    """argparse type for counts that must be at least 1."""
+    value = int(text)
+    if value < 1:
+        raise ValueError(text)
+    return value
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Reverse Snake")
+    recorder.add_arguments(parser)
+    parser.add_argument("--rewind-seconds", type=float, default=10,
+                        help="seconds of history kept for rewinding with R (0 disables)")
+    parser.add_argument("--rewind-mb", type=float, default=8, help="memory ceiling of the rewind history")
+    parser.add_argument("--snake-length", type=positive_int, default=SNAKE_LENGTH, help="segments in the snake's body")
+    parser.add_argument("--hard", action="store_true",
+                        help="the snake plans an intercept from batched rollouts instead of chasing")
+    parser.add_argument("--hard-ms", type=float, default=4, help="planning time per frame with --hard")
+    parser.add_argument("--hard-plans", type=int,
+                        help="roll out this many plans per frame instead of timing it; use it for sessions that will be replayed")
+    parser.add_argument("--sim-process", action="store_true",
+                        help="simulate in a separate process at a fixed rate, shared with the window through shared memory")
+    args = parser.parse_args()
+    recorder.setup_headless(args)
+    if args.sim_process:
+        if args.record or args.save_session or args.replay:
+            parser.error("--sim-process does not record or replay sessions")
+        import planc_mp
+        planc_mp.run(args.snake_length, args.rewind_seconds, args.rewind_mb,
+                     args.hard_ms if args.hard or args.hard_plans else None, args.hard_plans, args.seed)
+        sys.exit()
+
+    try:
+        replay = recorder.InputLog.load(args.replay, "planc") if args.replay else None
+    except (OSError, ValueError) as e:
+        parser.error(f"--replay: {e}")
+    seed = replay.seed if replay else args.seed if args.seed is not None else random.randrange(2**32)
+    random.seed(seed)
+    log = recorder.InputLog("planc", seed, FPS) if args.save_session else None
+    capture = None
+    if args.record:
+        capture = recorder.FrameRecorder(args.record, (SCREEN_W, SCREEN_H), FPS,
+                                         every=args.record_every, scale=args.record_scale,
+                                         block=args.headless)
+    history = None
+    if args.rewind_seconds > 0:
+        history = rewind.RewindBuffer(args.rewind_seconds, FPS, int(args.rewind_mb * 2**20))
+        print(history.describe())
+    planner = None
+    if args.hard or args.hard_plans:
+        import planc_ai
+        planner = planc_ai.Planner(args.hard_ms / 1000, args.hard_plans, seed=seed)
+    try:
+        main(capture, log, replay, args.headless, history, args.snake_length, planner)
+    finally:
+        if history is not None: history.report()
+        if planner is not None: planner.report()
+        if capture is not None: capture.close()
+        if log is not None: log.save(args.save_session)
\ No newline at end of file
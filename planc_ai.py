@@ -0,0 +1,335 @@
+"""Hard difficulty for planc: a snake that plans an intercept instead of chasing.
+
+Every frame the planner rolls out a batch of candidate steering plans
+against a set of predicted player futures, all at once with NumPy.  A
+plan is a target heading for each HOLD-frame segment of the next HORIZON
+frames (segments are aligned to the frame count, so a plan stays valid
+from one frame to the next).  Candidate heads move with AISnake's own
+dynamics, the heading blending toward the target by TURN_BLEND each
+frame; since a segment's target is fixed, the path it traces depends
+only on how far the head starts off that target, and comes from a table
+built once, making a rollout a handful of gathers.  The futures, clamped to the
+screen like Player.move, hold the player's current velocity, stand
+still, repeat the player's own recent movement with the periods that
+best explain it (a strafing pattern repeats), or change keys at random.  Each future is weighted by
+how well its rule would have predicted the player's last second.  A plan
+costs the frame its head reaches each future's player (or the horizon
+plus the distance left), averaged over the weighted futures.  The best
+plan's first heading steers the snake, and the plan, shifted by a frame,
+seeds the next frame's batch.
+
+Plans are rolled out in chunks until the next chunk would overrun the
+per-frame budget; the first chunk (last frame's plan and variations of
+it, the greedy chase and a fan of straight runs) always runs.  Planner
+cost and the chosen plan's quality are kept in stats(), shown by hud()
+and printed by report().
+
+Pass a Planner to planc.AISnake to have it steer the snake.
+
+    python planc.py --hard --hard-ms 4
+    python planc_ai.py                # headless: greedy vs planner against strafing players
+"""
+import argparse
+import math
+import time
+from collections import deque
+
+import numpy as np
+
+import planc
+
+HORIZON = 90      # frames looked ahead
+HOLD = 15         # frames each target heading of a plan is held
+TURN_BINS = 2048  # starting angles in the turn table
+PATTERNS = 6      # repeated-movement futures, one per period
+PERIODS = np.arange(20, 241)  # periods (frames) tried for them
+RANDOM_FUTURES = 8
+FUTURES = 2 + PATTERNS + RANDOM_FUTURES  # held, still, patterns, random
+CHUNK = 256       # plans per rolled-out batch
+DIRECTIONS = 16   # straight runs in the first chunk
+STRIDE = 2        # frames between the positions compared when scoring
+CATCH = 14 + 3    # head-to-player distance that ends the game (Player.radius + 2), plus slack for STRIDE
+KEY_CHANGE = 1 / 20  # chance per frame that a random future changes keys
+WINDOW = 60       # frames of the player's history each future rule is checked against
+RANDOM_ERROR = 1.5  # prior error (px/frame) of the random futures, so they always count a little
+D = 0.707 * planc.PLAYER_SPEED
+STEPS = np.array([(0, 0), (planc.PLAYER_SPEED, 0), (-planc.PLAYER_SPEED, 0), (0, planc.PLAYER_SPEED),
+                  (0, -planc.PLAYER_SPEED), (D, D), (D, -D), (-D, D), (-D, -D)])
+
+
+def turn_table(hold=HOLD, bins=TURN_BINS):
+    """Path of a unit-speed head steering toward heading 0 for hold frames,
+    for each of bins starting angles: (bins, hold) offsets and headings."""
+    d = np.exp(1j * np.linspace(-math.pi, math.pi, bins, endpoint=False))
+    path, angle = np.empty((bins, hold), complex), np.empty((bins, hold))
+    p = np.zeros(bins, complex)
+    for t in range(hold):
+        d = d + (1 - d) * planc.TURN_BLEND
+        d /= np.abs(d)
+        p = p + d
+        path[:, t], angle[:, t] = p, np.angle(d)
+    return path, angle
+
+
+TURN_PATH, TURN_ANGLE = turn_table()
+
+
+class Planner:
+    def __init__(self, budget=0.004, plans=None, horizon=HORIZON, seed=None):
+        """budget: seconds of planning per frame; plans: roll out this many
+        plans instead (in whole chunks), whatever the time, for replayable sessions."""
+        self.budget = budget
+        self.plans = plans
+        self.horizon = horizon
+        self.futures = FUTURES
+        self.rng = np.random.default_rng(seed)
+        self.warm = None         # last frame's chosen plan
+        self.last_target = None  # the player's position last frame
+        self.moves = deque(maxlen=WINDOW + int(PERIODS[-1]))  # the player's velocity each frame
+        self.chunk_time = 0.0    # cost of the last chunk, to predict the next (with a 25% margin)
+        r = 12  # Player.radius
+        self.lo, self.hi = np.array([r, r]), np.array([planc.SCREEN_W - r, planc.SCREEN_H - r])
+        self.frames = self.evaluated = self.over_budget = 0  # frames also fixes where segments start
+        self.plan_time = self.catch_total = self.gain_total = 0.0
+        self.times = deque(maxlen=3600)
+        self.last = (0, 0.0, 0.0, 0.0)  # plans, seconds, catch chance, expected frames to catch
+
+    # ---------- PREDICTION ----------
+    def player_futures(self, tx, ty):
+        """(futures, horizon) complex positions of the player, and their weights.
+
+        Futures: keep the current velocity; stand still; repeat the last L
+        frames of movement, for the PATTERNS periods L that best repeat over
+        the last WINDOW frames; keep the velocity for a while and then change
+        keys at random.  A rule's error is how far, in px per frame, it
+        strays from what the player did over the last WINDOW frames."""
+        h = self.horizon
+        v = (tx - self.last_target[0], ty - self.last_target[1]) if self.last_target else (0.0, 0.0)
+        self.last_target = (tx, ty)
+        self.moves.append(v)
+        past = np.array(self.moves)
+        n = len(past)
+        recent = past[-WINDOW:]
+        vel = np.empty((self.futures, h, 2))
+        error = np.full(self.futures, RANDOM_ERROR)
+        vel[0], error[0] = v, np.abs(recent - v).sum(axis=1).mean()
+        vel[1], error[1] = 0.0, np.abs(recent).sum(axis=1).mean()
+        vel[2:2 + PATTERNS], error[2:2 + PATTERNS] = v, np.inf
+        periods = PERIODS[PERIODS + WINDOW <= n]
+        if len(periods):
+            earlier = past[n - WINDOW - periods[:, None] + np.arange(WINDOW)]
+            miss = np.abs(earlier - recent).sum(axis=2).mean(axis=1)
+            chosen = []
+            for i in np.argsort(miss, kind="stable"):
+                if all(abs(periods[i] - c) > 5 for c in chosen):
+                    chosen.append(periods[i])
+                    k = 1 + len(chosen)
+                    vel[k], error[k] = past[n - periods[i]:][np.arange(h) % periods[i]], miss[i]
+                    if len(chosen) == PATTERNS:
+                        break
+        r = RANDOM_FUTURES
+        segment = np.cumsum(self.rng.random((r, h)) < KEY_CHANGE, axis=1)
+        rand = STEPS[self.rng.integers(0, len(STEPS), (r, h + 1))[np.arange(r)[:, None], segment]]
+        rand[segment == 0] = v
+        vel[-r:] = rand
+        pos = np.empty((self.futures, h, 2))
+        p = np.tile((tx, ty), (self.futures, 1)).astype(float)
+        for t in range(h):
+            p += vel[:, t]
+            np.clip(p, self.lo, self.hi, out=p)
+            pos[:, t] = p
+        pos = pos[:, STRIDE - 1::STRIDE]
+        weight = np.exp(-error)
+        return (pos[..., 0] + 1j * pos[..., 1]).astype(np.complex64), weight / weight.sum()
+
+    # ---------- ROLLOUT ----------
+    def segments(self):
+        """Frames in each segment of the plans made this frame."""
+        first = HOLD - self.frames % HOLD
+        rest = max(0, self.horizon - first)
+        return [min(first, self.horizon)] + [HOLD] * (rest // HOLD) + ([rest % HOLD] if rest % HOLD else [])
+
+    def candidates(self, first, best, greedy):
+        """CHUNK plans: half variations of best, half random; the first chunk
+        also holds best itself, the greedy chase and straight runs."""
+        c, k = CHUNK, len(best)
+        plans = self.rng.uniform(-math.pi, math.pi, (c, k))
+        half = c // 2
+        plans[:half] = best + self.rng.normal(0, 0.5, (half, k))
+        if first:
+            plans[0] = best
+            plans[1] = greedy
+            plans[2:2 + DIRECTIONS] = np.linspace(-math.pi, math.pi, DIRECTIONS, endpoint=False)[:, None]
+        return plans
+
+    def rollout(self, plans, head, heading, speed, lengths):
+        """(plans, horizon) head positions, segment by segment from the turn table."""
+        path = np.empty((len(plans), self.horizon), complex)
+        p = np.full(len(plans), head)
+        angle = np.full(len(plans), heading)
+        t = 0
+        for s, n in enumerate(lengths):
+            target = plans[:, s]
+            b = np.rint((angle - target + math.pi) * (TURN_BINS / (2 * math.pi))).astype(np.intp) % TURN_BINS
+            path[:, t:t + n] = p[:, None] + (speed * np.exp(1j * target))[:, None] * TURN_PATH[b, :n]
+            p = path[:, t + n - 1]
+            angle = target + TURN_ANGLE[b, n - 1]
+            t += n
+        return path
+
+    def score(self, plans, head, heading, speed, lengths, futures, weight):
+        """Expected frames to catch, and chance of a catch within the horizon, per plan."""
+        path = self.rollout(plans, head, heading, speed, lengths)
+        gap = np.abs(path[:, None, STRIDE - 1::STRIDE].astype(np.complex64) - futures[None, :, :])
+        close = gap < CATCH
+        caught = close.any(axis=2)
+        cost = np.where(caught, STRIDE * (close.argmax(axis=2) + 1), self.horizon + gap.min(axis=2) / speed)
+        return cost @ weight, caught @ weight
+
+    # ---------- STEERING ----------
+    def steer(self, snake, tx, ty):
+        """Unit heading for the snake this frame."""
+        start = time.perf_counter()
+        futures, weight = self.player_futures(tx, ty)
+        greedy = math.atan2(ty - snake.y, tx - snake.x)
+        lengths = self.segments()
+        if self.warm is None:
+            best = np.full(len(lengths), greedy)
+        else:
+            # a segment ended last frame: drop it and hold the last heading longer
+            best = self.warm[1:] if self.frames % HOLD == 0 else self.warm
+            best = np.resize(np.append(best, best[-1:]), len(lengths))
+        head, heading = complex(snake.x, snake.y), math.atan2(snake.dir_y, snake.dir_x)
+        best_cost, best_catch, greedy_cost = math.inf, 0.0, 0.0
+        n = chunks = 0
+        while True:
+            t = time.perf_counter()
+            plans = self.candidates(chunks == 0, best, greedy)
+            cost, catch = self.score(plans, head, heading, snake.speed, lengths, futures, weight)
+            if chunks == 0:
+                greedy_cost = cost[1]
+            i = int(cost.argmin())
+            if cost[i] < best_cost:
+                best_cost, best_catch, best = cost[i], catch[i], plans[i].copy()
+            n += len(plans)
+            chunks += 1
+            now = time.perf_counter()
+            self.chunk_time = now - t
+            if self.plans is not None:
+                done = n >= self.plans
+            else:
+                done = now + 1.25 * self.chunk_time > start + self.budget
+            if done:
+                break
+        self.warm = best
+        seconds = time.perf_counter() - start
+        self.frames += 1
+        self.evaluated += n
+        self.plan_time += seconds
+        self.times.append(seconds)
+        self.over_budget += self.plans is None and seconds > self.budget
+        self.catch_total += best_catch
+        self.gain_total += greedy_cost - best_cost
+        self.last = (n, seconds, best_catch, best_cost)
+        return math.cos(best[0]), math.sin(best[0])
+
+    # ---------- REPORTING ----------
+    def stats(self):
+        ms = 1000 * np.array(self.times) if self.times else np.zeros(1)
+        frames = max(1, self.frames)
+        return {
+            "frames": self.frames,
+            "plans": self.evaluated,
+            "plans_per_frame": self.evaluated / frames,
+            "rollouts_per_sec": self.evaluated * self.futures / self.plan_time if self.plan_time else 0.0,
+            "mean_ms": 1000 * self.plan_time / frames,
+            "p95_ms": float(np.percentile(ms, 95)),
+            "max_ms": float(ms.max()),
+            "over_budget": self.over_budget,
+            "catch_chance": self.catch_total / frames,
+            "frames_saved_vs_greedy": self.gain_total / frames,
+        }
+
+    def hud(self):
+        n, seconds, catch, cost = self.last
+        return f"{n} plans in {1000 * seconds:.1f} ms  catch {catch:.0%}  ETA {cost:.0f}f"
+
+    def report(self):
+        s = self.stats()
+        budget = f"{self.plans} plans" if self.plans is not None else f"{1000 * self.budget:.1f} ms budget"
+        print(f"Planner: {s['frames']} frames, {s['plans_per_frame']:.0f} plans/frame x {self.futures} futures "
+              f"({s['rollouts_per_sec']:,.0f} rollouts/s); {s['mean_ms']:.2f} ms/frame, p95 {s['p95_ms']:.2f}, "
+              f"max {s['max_ms']:.2f} ({budget}, {s['over_budget']} frames over)")
+        print(f"  chosen plans: {s['catch_chance']:.0%} predicted catch chance, "
+              f"{s['frames_saved_vs_greedy']:.1f} frames sooner than the greedy chase")
+
+
+# ---------- HEADLESS DUEL ----------
+def _toward(player, tx, ty):
+    dx, dy = tx - player.x, ty - player.y
+    return (np.sign(round(dx)) if abs(dx) > 2 else 0), (np.sign(round(dy)) if abs(dy) > 2 else 0)
+
+
+def circler(radius):
+    """Circle the centre at full speed, which the greedy chase never closes on."""
+    def bot(player, snake, frame):
+        a = frame * planc.PLAYER_SPEED / radius
+        return _toward(player, planc.SCREEN_W / 2 + radius * math.cos(a), planc.SCREEN_H / 2 + radius * math.sin(a))
+    return bot
+
+
+def sweep(player, snake, frame):
+    """Strafe left and right across the screen."""
+    return (1 if (frame // 125) % 2 else -1), 0
+
+
+BOTS = {"circle150": circler(150), "circle250": circler(250), "sweep": sweep}
+
+
+def duel(bot, planner, frames, seed):
+    rng = np.random.default_rng(seed)
+    player = planc.Player(*rng.uniform((200, 150), (600, 450)))
+    snake = planc.AISnake(*rng.uniform((20, 20), (120, 120)), planner=planner)
+    for frame in range(frames):
+        dx, dy = bot(player, snake, frame)
+        if dx and dy:
+            dx *= 0.707; dy *= 0.707
+        player.move(dx * planc.PLAYER_SPEED, dy * planc.PLAYER_SPEED)
+        snake.update(player.x, player.y)
+        if snake.collides_with_point(player.x, player.y, radius=player.radius + 2):
+            return frame
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Greedy vs planning snake against scripted players")
+    parser.add_argument("--games", type=int, default=4, help="games per bot and snake")
+    parser.add_argument("--frames", type=int, default=3600, help="frames before a game counts as escaped")
+    parser.add_argument("--hard-ms", type=float, default=4)
+    args = parser.parse_args()
+    planners = []
+    for bot_name, bot in BOTS.items():
+        for label in ("greedy", "planner"):
+            caught = []
+            for g in range(args.games):
+                planner = Planner(args.hard_ms / 1000, seed=g) if label == "planner" else None
+                if planner:
+                    planners.append(planner)
+                caught.append(duel(bot, planner, args.frames, g))
+            hits = [f for f in caught if f is not None]
+            mean = f", mean {sum(hits) / len(hits) / planc.FPS:.1f} s to catch" if hits else ""
+            print(f"{bot_name:<7} {label:<8} caught {len(hits)}/{len(caught)}{mean}")
+    total = Planner(args.hard_ms / 1000)
+    for p in planners:
+        total.frames += p.frames
+        total.evaluated += p.evaluated
+        total.plan_time += p.plan_time
+        total.times.extend(p.times)
+        total.over_budget += p.over_budget
+        total.catch_total += p.catch_total
+        total.gain_total += p.gain_total
+    total.report()
+
+
+if __name__ == "__main__":
+    main()
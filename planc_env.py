@@ -0,0 +1,177 @@
+"""Vectorized planc for training evasion agents against AISnake.
+
+VecEnv steps N independent games at once.  Player movement, the snake's
+steering, its body laid along the head's path, and collision are the same
+rules as planc.Player / planc.AISnake, computed as NumPy operations over
+all games.  Every head moves exactly SNAKE_SPEED per step, so all games
+share one path ring and one table of where each segment falls in it.
+Finished games are reset in place.  Observations, rewards and done flags
+are preallocated arrays that are reused between steps (copy them if you
+need to keep them).
+
+Actions are 0..8: none, then the eight directions of ACTIONS.
+
+    python planc_env.py --envs 4096 --steps 500
+"""
+import argparse
+import time
+
+import numpy as np
+
+import planc
+
+# no-op, the four axis moves and the four diagonals, as (dx, dy)
+ACTIONS = np.array([(0, 0), (1, 0), (-1, 0), (0, 1), (0, -1),
+                    (0.707, 0.707), (0.707, -0.707), (-0.707, 0.707), (-0.707, -0.707)])
+PLAYER_RADIUS = 12
+SEGMENT_SPACING = planc.SEGMENT_SPACING
+HIT_RADIUS = PLAYER_RADIUS + 2
+TURN = planc.TURN_BLEND
+
+
+class VecEnv:
+    def __init__(self, n, length=planc.SNAKE_LENGTH, max_steps=3600, seed=None, random_start=True):
+        self.n = n
+        self.length = length
+        self.max_steps = max_steps
+        self.random_start = random_start
+        self.rng = np.random.default_rng(seed)
+        self.size = np.array([planc.SCREEN_W, planc.SCREEN_H], np.float64)
+
+        self.player = np.empty((n, 2))
+        self.segments = np.empty((n, length, 2))
+        # head positions of the last `ring` steps; segment i lies `back[i]` steps behind
+        back = np.arange(length) * SEGMENT_SPACING / planc.SNAKE_SPEED
+        self.ring = int(np.ceil(back[-1])) + 2
+        self.path = np.empty((n, self.ring, 2))
+        self.cursor = 0  # ring slot of the newest head position
+        self._back0 = np.floor(back).astype(np.int64)
+        self._frac = (back - self._back0)[None, :, None]
+        self.dir = np.empty((n, 2))
+        self.steps = np.zeros(n, np.int64)
+        self.obs_dim = 4 + 2 * length
+        self.obs = np.empty((n, self.obs_dim), np.float32)
+        self.final_obs = np.zeros((n, self.obs_dim), np.float32)
+        self.reward = np.empty(n, np.float32)
+        self.terminated = np.zeros(n, bool)
+        self.truncated = np.zeros(n, bool)
+        self.reset()
+
+    def reset(self, mask=None):
+        idx = np.arange(self.n) if mask is None else np.flatnonzero(mask)
+        if self.random_start:
+            self.player[idx] = self.rng.uniform(PLAYER_RADIUS, self.size - PLAYER_RADIUS, (len(idx), 2))
+        else:
+            self.player[idx] = self.size // 2
+        # a straight path back from the head at (100, 100), as planc.AISnake starts
+        k = (self.cursor - np.arange(self.ring)) % self.ring
+        self.path[np.ix_(idx, k)] = np.stack([100.0 - np.arange(self.ring) * planc.SNAKE_SPEED,
+                                              np.full(self.ring, 100.0)], axis=1)
+        self._sample()
+        self.dir[idx] = (1.0, 0.0)
+        self.steps[idx] = 0
+        self._observe()
+        return self.obs
+
+    def step(self, actions):
+        """Advance every game one frame. Returns (obs, reward, terminated, truncated)."""
+        # player
+        self.player += ACTIONS[actions] * planc.PLAYER_SPEED
+        np.clip(self.player, PLAYER_RADIUS, self.size - PLAYER_RADIUS, out=self.player)
+
+        # snake head steers toward the player
+        head = self.path[:, self.cursor]
+        vec = self.player - head
+        dist = np.hypot(vec[:, 0], vec[:, 1])[:, None] + 1e-6
+        self.dir += (vec / dist - self.dir) * TURN
+        self.dir /= np.hypot(self.dir[:, 0], self.dir[:, 1])[:, None] + 1e-9
+        self.cursor = (self.cursor + 1) % self.ring
+        self.path[:, self.cursor] = head + self.dir * planc.SNAKE_SPEED
+
+        # body: points on the path at fixed arc length behind the head
+        self._sample()
+
+        # collision with any segment
+        rel = self.segments - self.player[:, None, :]
+        hit = ((rel ** 2).sum(axis=2) < HIT_RADIUS * HIT_RADIUS).any(axis=1)
+
+        self.steps += 1
+        np.copyto(self.terminated, hit)
+        np.greater_equal(self.steps, self.max_steps, out=self.truncated)
+        self.truncated &= ~hit
+        self.reward[:] = 10 / planc.FPS
+        self.reward[hit] = -1.0
+
+        done = self.terminated | self.truncated
+        self._observe()
+        if done.any():
+            self.final_obs[done] = self.obs[done]
+            self.reset(done)
+        return self.obs, self.reward, self.terminated, self.truncated
+
+    def _sample(self):
+        i0 = (self.cursor - self._back0) % self.ring
+        i1 = (i0 - 1) % self.ring
+        np.add(self.path[:, i0] * (1 - self._frac), self.path[:, i1] * self._frac, out=self.segments)
+
+    def _observe(self):
+        self.obs[:, 0:2] = self.player / self.size
+        self.obs[:, 2:4] = self.dir
+        self.obs[:, 4:] = (self.segments / self.size).reshape(self.n, -1)
+
+    def render(self, surf, i=0):
+        """Draw game i with planc's look; needs pygame initialised by the caller."""
+        import pygame
+        surf.fill((20, 20, 30))
+        planc.draw_glow_circle(surf, (255, 180, 255), self.player[i], PLAYER_RADIUS, intensity=8)
+        pygame.draw.circle(surf, (180, 255, 255), self.player[i].astype(int), PLAYER_RADIUS)
+        for seg in self.segments[i]:
+            planc.draw_glow_circle(surf, (180, 255, 200), seg, 10, intensity=4)
+            pygame.draw.circle(surf, (180, 255, 200), seg.astype(int), 8)
+
+
+def benchmark(n, steps, seed=0):
+    env = VecEnv(n, seed=seed)
+    rng = np.random.default_rng(seed)
+    actions = rng.integers(0, len(ACTIONS), (steps, n))
+    episodes = 0
+    t = time.perf_counter()
+    for k in range(steps):
+        _, _, term, trunc = env.step(actions[k])
+        episodes += int(term.sum() + trunc.sum())
+    elapsed = time.perf_counter() - t
+    print(f"{n} envs x {steps} steps: {n * steps / elapsed:,.0f} env-steps/s "
+          f"({1000 * elapsed / steps:.2f} ms/step, {episodes} episodes finished)")
+
+
+def watch(n, seed=None):
+    """Random policy on n games, showing the first one."""
+    import pygame
+    pygame.init()
+    screen = pygame.display.set_mode((planc.SCREEN_W, planc.SCREEN_H))
+    pygame.display.set_caption("planc VecEnv")
+    clock = pygame.time.Clock()
+    env = VecEnv(n, seed=seed)
+    rng = np.random.default_rng(seed)
+    actions = rng.integers(0, len(ACTIONS), n)
+    while not any(e.type == pygame.QUIT for e in pygame.event.get()):
+        change = rng.random(n) < 0.05
+        actions[change] = rng.integers(0, len(ACTIONS), change.sum())
+        env.step(actions)
+        env.render(screen)
+        pygame.display.flip()
+        clock.tick(planc.FPS)
+    pygame.quit()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark or watch the vectorized planc environment")
+    parser.add_argument("--envs", type=int, default=4096)
+    parser.add_argument("--steps", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--render", action="store_true", help="watch a random policy instead")
+    args = parser.parse_args()
+    if args.render:
+        watch(args.envs, args.seed)
+    else:
+        benchmark(args.envs, args.steps, args.seed)
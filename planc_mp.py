@@ -0,0 +1,218 @@
+"""planc with the simulation in its own process.
+
+`python planc.py --sim-process` runs planc.World in a child process at a
+fixed FPS ticks per second, however long the window takes to draw and
+flip, and the window no longer waits on the snake's planning.
+
+Ticks are published through one multiprocessing.shared_memory block: a
+control row (latest tick, a stamp per buffer) and two snapshot buffers
+of float64 fields, snake segments and the planner's HUD text.  The
+simulation fills the buffer the window is not reading, stamps it with
+its tick and only then makes that tick the latest, so the window draws
+straight from numpy views of the newest complete buffer, without
+copies, pickling or locks.  A frame is counted as torn if its buffer's
+stamp changed while it was drawn, which takes two ticks during a single
+frame.  Input bits go the other way through a SimpleQueue, sent only
+when they change.
+
+    python planc.py --sim-process --hard
+    python planc_mp.py --stall-ms 40      # a slow window, to watch the tick rate hold
+"""
+import argparse
+import multiprocessing as mp
+import random
+import signal
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+import pygame
+
+import planc
+import rewind
+
+CONTROL = 3  # int64 words: the latest tick and the tick each buffer holds
+LATEST, STAMP = 0, 1
+FIELDS = ("x", "y", "score", "t_shift", "go_time", "game_over", "rewinding", "rewind_seconds", "step_ms")
+HUD_BYTES = 64
+
+
+class SharedWorld:
+    """The double-buffered snapshot block; name attaches to an existing one."""
+
+    def __init__(self, length=planc.SNAKE_LENGTH, name=None):
+        self.words = len(FIELDS) + 2 * length + HUD_BYTES // 8
+        size = 8 * (CONTROL + 2 * self.words)
+        self.shm = shared_memory.SharedMemory(name=name, create=name is None, size=size if name is None else 0)
+        self.control = np.ndarray(CONTROL, np.int64, self.shm.buf)
+        buffers = np.ndarray((2, self.words), np.float64, self.shm.buf, 8 * CONTROL)
+        self.fields = buffers[:, :len(FIELDS)]
+        self.segments = buffers[:, len(FIELDS):len(FIELDS) + 2 * length].reshape(2, length, 2)
+        self.hud = buffers[:, len(FIELDS) + 2 * length:].view(np.uint8)
+        if name is None:
+            self.control[:] = 0
+
+    # ---------- WRITER ----------
+    def publish(self, tick, world, hud, step_ms):
+        b = tick & 1
+        self.control[STAMP + b] = -1
+        self.fields[b] = (world.player.x, world.player.y, world.score, world.t_shift,
+                          world.go_time if world.game_over else 0, world.game_over, world.rewinding,
+                          world.history.seconds if world.rewinding else 0, step_ms)
+        self.segments[b] = world.snake.segments
+        text = hud.encode()[:HUD_BYTES]
+        self.hud[b, :len(text)] = np.frombuffer(text, np.uint8)
+        self.hud[b, len(text):] = 0
+        self.control[STAMP + b] = tick
+        self.control[LATEST] = tick
+
+    # ---------- READER ----------
+    def latest(self):
+        """The newest complete tick (0 before the first) and its buffer."""
+        while True:
+            tick = int(self.control[LATEST])
+            if self.control[STAMP + (tick & 1)] == tick:
+                return tick, tick & 1
+            # the writer moved on to this buffer between the two reads
+
+    def intact(self, tick):
+        """Whether tick's buffer still holds it."""
+        return self.control[STAMP + (tick & 1)] == tick
+
+    def close(self, unlink=False):
+        # the views pin the block's buffer until they go
+        del self.control, self.fields, self.segments, self.hud
+        self.shm.close()
+        if unlink:
+            self.shm.unlink()
+
+
+# ---------- SIMULATION PROCESS ----------
+def simulate(name, inputs, length, rewind_seconds, rewind_mb, hard_ms, hard_plans, seed):
+    signal.signal(signal.SIGINT, signal.SIG_IGN)  # Ctrl+C is the window's; it tells us to stop
+    random.seed(seed)
+    shared = SharedWorld(length, name)
+    history = rewind.RewindBuffer(rewind_seconds, planc.FPS, int(rewind_mb * 2**20)) if rewind_seconds > 0 else None
+    planner = None
+    if hard_ms is not None:
+        import planc_ai
+        planner = planc_ai.Planner(hard_ms / 1000, hard_plans, seed=seed)
+    world = planc.World(length, history, planner)
+    parent = mp.parent_process()
+    period = 1 / planc.FPS
+    bits, tick, late = 0, 0, 0
+    busy = worst = 0.0
+    start = next_tick = time.perf_counter()
+    while True:
+        while not inputs.empty():
+            bits = inputs.get()
+            if bits is None:
+                break
+        if bits is None or tick % planc.FPS == 0 and not parent.is_alive():
+            break
+        t = time.perf_counter()
+        world.step(bits, period)
+        tick += 1
+        step = time.perf_counter() - t
+        busy += step
+        worst = max(worst, step)
+        shared.publish(tick, world, planner.hud() if planner is not None else "", 1000 * step)
+        next_tick += period
+        now = time.perf_counter()
+        if next_tick < now:
+            late += 1
+            next_tick = now  # fell behind: don't try to catch up in a burst
+        else:
+            time.sleep(next_tick - now)
+    elapsed = time.perf_counter() - start
+    print(f"[sim] {tick} ticks, {tick / elapsed:.1f}/s (target {planc.FPS}); step "
+          f"{1000 * busy / max(1, tick):.2f} ms avg / {1000 * worst:.2f} ms worst, {late} late")
+    if history is not None:
+        history.report()
+    if planner is not None:
+        planner.report()
+    shared.close()
+
+
+# ---------- WINDOW PROCESS ----------
+def run(length=planc.SNAKE_LENGTH, rewind_seconds=10, rewind_mb=8, hard_ms=None, hard_plans=None, seed=None,
+        stall_ms=0, seconds=None):
+    """Play with the simulation in a child process.  hard_ms turns on the
+    planner; stall_ms adds up to that much random work to every frame and
+    seconds ends the game, for seeing the tick rate hold under a slow window."""
+    timer, assets = planc.init()
+    ctx = mp.get_context("spawn")  # a fork would copy the window and audio threads
+    shared = SharedWorld(length)
+    inputs = ctx.SimpleQueue()
+    sim = ctx.Process(target=simulate, daemon=True,
+                      args=(shared.shm.name, inputs, length, rewind_seconds, rewind_mb, hard_ms, hard_plans, seed))
+    sim.start()
+    stats = {"frames": 0, "repeats": 0, "skipped": 0, "torn": 0}
+    try:
+        if not planc.finish_loading(timer, assets):
+            return
+        draw(shared, inputs, sim, hard_ms is not None, stats, stall_ms, seconds)
+    finally:
+        inputs.put(None)
+        sim.join(5)
+        shared.close(unlink=True)
+        print(f"[window] {stats['frames']} frames: {stats['repeats']} showed a tick again, "
+              f"{stats['skipped']} ticks never shown, {stats['torn']} torn")
+
+
+def draw(shared, inputs, sim, hud, stats, stall_ms=0, seconds=None):
+    player = planc.Player(0, 0)
+    rng = random.Random()
+    sent = None
+    shown = 0
+    was_over = False
+    start = time.perf_counter()
+    while seconds is None or time.perf_counter() - start < seconds:
+        dt = planc.clock.tick(planc.FPS) / 1000
+        for e in pygame.event.get():
+            if e.type == pygame.QUIT:
+                return
+        if sim.exitcode is not None:
+            # it only stops on its own if it crashed; its traceback is above
+            print(f"Error: the simulation process exited with code {sim.exitcode}")
+            return
+        bits = planc.read_input_bits()
+        if bits != sent:
+            inputs.put(bits)
+            sent = bits
+        tick, b = shared.latest()
+        if not tick:
+            continue
+        x, y, score, t_shift, go_time, over, rewinding, rewind_seconds, _ = shared.fields[b].tolist()
+        player.x, player.y = x, y
+        over_for = t_shift - go_time if over else None
+        planc.draw_world(planc.screen, dt, player, shared.segments[b], score, t_shift,
+                         shared.hud[b].tobytes().rstrip(b"\0").decode() if hud else None,
+                         rewind_seconds if rewinding else None, over_for)
+        stats["frames"] += 1
+        stats["repeats"] += tick == shown
+        stats["skipped"] += max(0, tick - shown - 1)
+        stats["torn"] += not shared.intact(tick)  # nothing reads the buffer after this
+        shown = tick
+        if stall_ms:
+            time.sleep(rng.uniform(0, stall_ms) / 1000)
+        if over and not was_over and planc.sounds:
+            planc.sounds.trigger("game_over", 2); planc.sounds.trigger("over", 2)
+        was_over = over
+        if over_for is not None and over_for > 3:
+            return
+        if planc.sounds: planc.sounds.flush()
+        pygame.display.flip()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reverse Snake with its simulation in a separate process")
+    parser.add_argument("--stall-ms", type=float, default=40, help="random extra time per frame, up to this")
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--hard", action="store_true")
+    args = parser.parse_args()
+    run(hard_ms=4 if args.hard else None, stall_ms=args.stall_ms, seconds=args.seconds)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,390 @@
+"""Networked planc: several players evade the AISnakes on one authoritative server.
+
+The server simulates at a fixed TICK_RATE with planc's own Player and
+AISnake and sends a snapshot every SNAPSHOT_EVERY ticks.  A snapshot is a
+fixed-layout uint16 vector (positions quantized to 1/4 pixel); each client
+gets it delta-compressed against the last snapshot it acknowledged, as a
+changed-word bitmask plus the changed words.  Clients with the same
+baseline share one encoded packet.
+
+    python planc_net.py server
+    python planc_net.py client
+    python planc_net.py bots --count 120 --duration 20
+"""
+import argparse
+import asyncio
+import math
+import random
+import struct
+import time
+
+import numpy as np
+
+import planc
+
+# ---------- PROTOCOL ----------
+PORT = 47800
+TICK_RATE = planc.FPS
+SNAPSHOT_EVERY = 3
+HISTORY = 64
+QUANT = 4
+MAX_PLAYERS = 256
+MAX_SNAKES = 4
+PLAYER_WORDS = 4  # x, y, flags, score
+SNAKE_BASE = 1 + MAX_PLAYERS * PLAYER_WORDS
+WORDS = SNAKE_BASE + MAX_SNAKES * planc.SNAKE_LENGTH * 2
+MASK_BYTES = (WORDS + 7) // 8
+TIMEOUT = 5.0
+RESPAWN = 3.0
+
+FLAG_ACTIVE, FLAG_ALIVE = 1, 2
+
+MSG_JOIN, MSG_INPUT, MSG_LEAVE, MSG_WELCOME, MSG_SNAPSHOT, MSG_FULL = range(1, 7)
+INPUT = struct.Struct("<BBI")      # type, input bits, last acknowledged snapshot
+WELCOME = struct.Struct("<BH")     # type, player slot
+SNAPSHOT = struct.Struct("<BII")   # type, snapshot seq, baseline seq (0 = none)
+
+
+def encode_delta(seq, base_seq, state, base):
+    changed = state != base
+    return (SNAPSHOT.pack(MSG_SNAPSHOT, seq, base_seq) + np.packbits(changed).tobytes()
+            + state[changed].astype("<u2").tobytes())
+
+
+def decode_delta(packet, baselines):
+    """Apply a snapshot packet to its baseline; None if the baseline is gone."""
+    _, seq, base_seq = SNAPSHOT.unpack_from(packet)
+    if base_seq:
+        base = baselines.get(base_seq)
+        if base is None:
+            return seq, None
+    else:
+        base = np.zeros(WORDS, np.uint16)
+    off = SNAPSHOT.size
+    changed = np.unpackbits(np.frombuffer(packet, np.uint8, MASK_BYTES, off), count=WORDS).astype(bool)
+    state = base.copy()
+    state[changed] = np.frombuffer(packet, "<u2", offset=off + MASK_BYTES)
+    return seq, state
+
+
+def unpack_state(state):
+    """Players as {slot: (x, y, flags, score)} and snakes as (n, 2) float arrays."""
+    players = state[1:SNAKE_BASE].reshape(MAX_PLAYERS, PLAYER_WORDS)
+    active = np.flatnonzero(players[:, 2] & FLAG_ACTIVE)
+    out = {int(i): (players[i, 0] / QUANT, players[i, 1] / QUANT, int(players[i, 2]), int(players[i, 3]))
+           for i in active}
+    segs = state[SNAKE_BASE:].reshape(MAX_SNAKES, planc.SNAKE_LENGTH, 2)
+    return out, [segs[i] / QUANT for i in range(int(state[0]))]
+
+
+# ---------- SERVER ----------
+class Slot:
+    def __init__(self, addr, x, y):
+        self.addr = addr
+        self.player = planc.Player(x, y)
+        self.bits = 0
+        self.ack = 0
+        self.alive = True
+        self.score = 0.0
+        self.dead_since = 0.0
+        self.last_seen = time.monotonic()
+
+
+class GameServer(asyncio.DatagramProtocol):
+    def __init__(self, snakes=2, seed=None):
+        self.rng = random.Random(seed)
+        self.slots = [None] * MAX_PLAYERS
+        self.by_addr = {}
+        self.snakes = [planc.AISnake(100 + 600 * (i % 2), 100 + 400 * (i // 2))
+                       for i in range(min(snakes, MAX_SNAKES))]
+        self.history = np.zeros((HISTORY, WORDS), np.uint16)
+        self.seq = 0
+        self.tick = 0
+        self.transport = None
+        self.stats = {"ticks": 0, "busy": 0.0, "worst": 0.0, "packets": 0, "bytes": 0}
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def datagram_received(self, data, addr):
+        if not data:
+            return
+        kind = data[0]
+        slot = self.by_addr.get(addr)
+        if kind == MSG_INPUT and slot is not None and len(data) >= INPUT.size:
+            _, slot.bits, ack = INPUT.unpack_from(data)
+            slot.ack = max(slot.ack, ack)
+            slot.last_seen = time.monotonic()
+        elif kind == MSG_JOIN:
+            if slot is None:
+                slot = self.join(addr)
+            if slot is None:
+                self.transport.sendto(bytes((MSG_FULL,)), addr)
+            else:
+                self.transport.sendto(WELCOME.pack(MSG_WELCOME, self.slots.index(slot)), addr)
+        elif kind == MSG_LEAVE and slot is not None:
+            self.leave(slot)
+
+    def join(self, addr):
+        try:
+            i = self.slots.index(None)
+        except ValueError:
+            return None
+        x, y = self.spawn_point()
+        self.slots[i] = self.by_addr[addr] = Slot(addr, x, y)
+        return self.slots[i]
+
+    def leave(self, slot):
+        self.slots[self.slots.index(slot)] = None
+        del self.by_addr[slot.addr]
+
+    def spawn_point(self):
+        for _ in range(20):
+            x = self.rng.uniform(40, planc.SCREEN_W - 40)
+            y = self.rng.uniform(40, planc.SCREEN_H - 40)
+            if all(math.hypot(s.x - x, s.y - y) > 200 for s in self.snakes):
+                break
+        return x, y
+
+    def step(self, now):
+        live = [s for s in self.slots if s is not None]
+        for slot in live:
+            if now - slot.last_seen > TIMEOUT:
+                self.leave(slot)
+            elif slot.alive:
+                b = slot.bits
+                dx = bool(b & planc.BIT_RIGHT) - bool(b & planc.BIT_LEFT)
+                dy = bool(b & planc.BIT_DOWN) - bool(b & planc.BIT_UP)
+                if dx and dy: dx *= 0.707; dy *= 0.707
+                slot.player.move(dx * planc.PLAYER_SPEED, dy * planc.PLAYER_SPEED)
+                slot.score += 10 / TICK_RATE
+            elif now - slot.dead_since > RESPAWN:
+                slot.player.x, slot.player.y = self.spawn_point()
+                slot.alive, slot.score = True, 0.0
+
+        alive = [s for s in self.slots if s is not None and s.alive]
+        if not alive:
+            return
+        pos = np.array([(s.player.x, s.player.y) for s in alive])
+        for snake in self.snakes:
+            head = (snake.x, snake.y)
+            target = pos[np.argmin(((pos - head) ** 2).sum(axis=1))]
+            snake.update(target[0], target[1])
+        segs = np.concatenate([snake.segments for snake in self.snakes])
+        d2 = ((pos[:, None, :] - segs[None, :, :]) ** 2).sum(axis=2).min(axis=1)
+        radius = alive[0].player.radius + 2
+        for i in np.flatnonzero(d2 < radius * radius):
+            alive[i].alive, alive[i].dead_since = False, now
+
+    def snapshot(self):
+        """Write the current world into the next history row."""
+        self.seq += 1
+        state = self.history[self.seq % HISTORY]
+        state[:] = 0
+        state[0] = len(self.snakes)
+        players = state[1:SNAKE_BASE].reshape(MAX_PLAYERS, PLAYER_WORDS)
+        for i, slot in enumerate(self.slots):
+            if slot is not None:
+                players[i] = (slot.player.x * QUANT, slot.player.y * QUANT,
+                              FLAG_ACTIVE | (FLAG_ALIVE if slot.alive else 0), min(int(slot.score), 0xFFFF))
+        if self.snakes:
+            segs = np.array([snake.segments for snake in self.snakes]) * QUANT
+            state[SNAKE_BASE:SNAKE_BASE + segs.size] = np.clip(segs, 0, 0xFFFF).ravel()
+        return state
+
+    def broadcast(self, state):
+        cache = {}
+        for slot in self.by_addr.values():
+            base_seq = slot.ack if 0 < self.seq - slot.ack < HISTORY else 0
+            packet = cache.get(base_seq)
+            if packet is None:
+                base = self.history[base_seq % HISTORY] if base_seq else np.zeros(WORDS, np.uint16)
+                packet = cache[base_seq] = encode_delta(self.seq, base_seq, state, base)
+            self.transport.sendto(packet, slot.addr)
+            self.stats["packets"] += 1
+            self.stats["bytes"] += len(packet)
+
+    async def run(self, report_every=5.0):
+        loop = asyncio.get_running_loop()
+        period = 1 / TICK_RATE
+        next_tick = last_report = loop.time()
+        while True:
+            t = time.perf_counter()
+            self.step(time.monotonic())
+            self.tick += 1
+            if self.tick % SNAPSHOT_EVERY == 0:
+                self.broadcast(self.snapshot())
+            busy = time.perf_counter() - t
+            self.stats["ticks"] += 1
+            self.stats["busy"] += busy
+            self.stats["worst"] = max(self.stats["worst"], busy)
+
+            now = loop.time()
+            if now - last_report >= report_every:
+                self.report(now - last_report)
+                last_report = now
+            next_tick += period
+            if next_tick < now:
+                next_tick = now  # fell behind: don't try to catch up in a burst
+            await asyncio.sleep(next_tick - now)
+
+    def report(self, elapsed):
+        s = self.stats
+        n = max(1, s["ticks"])
+        print(f"[server] {len(self.by_addr)} clients, {s['ticks'] / elapsed:.1f} ticks/s, "
+              f"tick {1000 * s['busy'] / n:.2f} ms avg / {1000 * s['worst']:.2f} ms worst "
+              f"(budget {1000 / TICK_RATE:.1f} ms), {s['packets'] / elapsed:.0f} pkt/s, "
+              f"{s['bytes'] / max(1, s['packets']):.0f} B/pkt")
+        self.stats = dict.fromkeys(s, 0)
+
+
+async def serve(host, port, snakes, seed=None):
+    loop = asyncio.get_running_loop()
+    server = GameServer(snakes, seed)
+    await loop.create_datagram_endpoint(lambda: server, local_addr=(host, port))
+    print(f"planc server on {host}:{port}, {len(server.snakes)} snakes, {TICK_RATE} Hz")
+    await server.run()
+
+
+# ---------- CLIENTS ----------
+class ClientProtocol(asyncio.DatagramProtocol):
+    """Joins, keeps the decoded snapshot history and acknowledges the newest one."""
+
+    def __init__(self):
+        self.transport = None
+        self.slot = None
+        self.state = None
+        self.ack = 0
+        self.baselines = {}
+        self.stats = {"snapshots": 0, "bytes": 0, "undecodable": 0}
+
+    def connection_made(self, transport):
+        self.transport = transport
+        transport.sendto(bytes((MSG_JOIN,)))
+
+    def datagram_received(self, data, addr):
+        kind = data[0]
+        if kind == MSG_WELCOME:
+            self.slot = WELCOME.unpack_from(data)[1]
+        elif kind == MSG_SNAPSHOT:
+            seq, state = decode_delta(data, self.baselines)
+            if state is None:
+                self.stats["undecodable"] += 1
+                return
+            if seq > self.ack:
+                self.ack, self.state = seq, state
+                # the server deltas only against acks within HISTORY of its newest
+                # snapshot, which is at least ours; lost acks leave older ones behind
+                for old in [k for k in self.baselines if k <= seq - HISTORY]:
+                    del self.baselines[old]
+            if seq > self.ack - HISTORY:
+                self.baselines[seq] = state
+            self.stats["snapshots"] += 1
+            self.stats["bytes"] += len(data)
+        elif kind == MSG_FULL:
+            print("Server is full")
+
+    def send_input(self, bits):
+        if self.slot is None:
+            self.transport.sendto(bytes((MSG_JOIN,)))
+        else:
+            self.transport.sendto(INPUT.pack(MSG_INPUT, bits, self.ack))
+
+    def leave(self):
+        self.transport.sendto(bytes((MSG_LEAVE,)))
+
+
+async def play(host, port):
+    import pygame
+    loop = asyncio.get_running_loop()
+    _, client = await loop.create_datagram_endpoint(ClientProtocol, remote_addr=(host, port))
+    pygame.init()
+    screen = pygame.display.set_mode((planc.SCREEN_W, planc.SCREEN_H))
+    pygame.display.set_caption("Reverse Snake ✨ online")
+    font = pygame.font.SysFont("consolas", 22)
+    t_shift = 0.0
+    try:
+        while True:
+            t = loop.time()
+            for e in pygame.event.get():
+                if e.type == pygame.QUIT:
+                    return
+            client.send_input(planc.read_input_bits())
+            t_shift += 1 / planc.FPS
+            planc.draw_gradient_background(screen, t_shift)
+            if client.state is not None:
+                players, snakes = unpack_state(client.state)
+                for slot, (x, y, flags, score) in players.items():
+                    color = (180, 255, 255) if slot == client.slot else (255, 200, 120)
+                    if not flags & FLAG_ALIVE:
+                        color = (90, 90, 90)
+                    planc.draw_glow_circle(screen, color, (x, y), 12, intensity=4)
+                    pygame.draw.circle(screen, color, (int(x), int(y)), 12)
+                for segs in snakes:
+                    for x, y in segs:
+                        planc.draw_glow_circle(screen, (180, 255, 200), (x, y), 10, intensity=4)
+                        pygame.draw.circle(screen, (180, 255, 200), (int(x), int(y)), 8)
+                mine = players.get(client.slot)
+                if mine:
+                    screen.blit(font.render(f"Score: {mine[3]}  Players: {len(players)}", True,
+                                            (255, 255, 255)), (10, 10))
+            pygame.display.flip()
+            await asyncio.sleep(max(0, 1 / planc.FPS - (loop.time() - t)))
+    finally:
+        client.leave()
+        pygame.quit()
+
+
+async def bots(host, port, count, duration, input_rate=30):
+    """Load generator: count headless clients with random inputs in one event loop."""
+    loop = asyncio.get_running_loop()
+    clients = []
+    for _ in range(count):
+        _, c = await loop.create_datagram_endpoint(ClientProtocol, remote_addr=(host, port))
+        clients.append(c)
+    rng = random.Random()
+    bits = [0] * count
+    start = loop.time()
+    tick = 0
+    while loop.time() - start < duration:
+        for i, c in enumerate(clients):
+            if rng.random() < 0.05:
+                bits[i] = rng.choice((1, 2, 4, 8, 5, 6, 9, 10))
+            c.send_input(bits[i])
+        tick += 1
+        await asyncio.sleep(max(0, start + tick / input_rate - loop.time()))
+    elapsed = loop.time() - start
+    for c in clients:
+        c.leave()
+    joined = sum(c.slot is not None for c in clients)
+    snaps = sum(c.stats["snapshots"] for c in clients)
+    nbytes = sum(c.stats["bytes"] for c in clients)
+    bad = sum(c.stats["undecodable"] for c in clients)
+    expected = TICK_RATE / SNAPSHOT_EVERY
+    print(f"[bots] {joined}/{count} joined, {snaps / elapsed / max(1, joined):.1f} snapshots/s per client "
+          f"(server sends {expected:.0f}), {nbytes / max(1, snaps):.0f} B/snapshot, {bad} undecodable")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Networked Reverse Snake")
+    parser.add_argument("mode", choices=("server", "client", "bots"))
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--snakes", type=int, default=2)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--count", type=int, default=100, help="bots to run")
+    parser.add_argument("--duration", type=float, default=20.0, help="seconds the bots run")
+    args = parser.parse_args()
+    try:
+        if args.mode == "server":
+            asyncio.run(serve(args.host, args.port, args.snakes, args.seed))
+        elif args.mode == "client":
+            asyncio.run(play(args.host, args.port))
+        else:
+            asyncio.run(bots(args.host, args.port, args.count, args.duration))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
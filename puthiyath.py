@@ -6,6 +6,8 @@ import time
 import tkinter as tk
 import threading
 
+import idle
+
 # Define face colors (R, G, B)
 WHITE = (1, 1, 1)
 YELLOW = (1, 1, 0)
@@ -116,9 +118,12 @@ def main():
     glRotatef(global_state["rotation_x"], 1, 0, 0)
     glRotatef(global_state["rotation_y"], 0, 1, 0)
 
-    clock = pygame.time.Clock()
+    loop = idle.IdleLoop(60)
+    held = False
     while global_state["running"]:
-        clock.tick(60)
+        # Sleep until an event, a held arrow key or the next color swap needs a frame
+        time_to_swap = global_state["last_swap_time"] + 10 - time.time()
+        events = loop.events(busy=held, timeout=max(0, time_to_swap))
 
         # Check for color swap
         current_time = time.time()
@@ -126,14 +131,17 @@ def main():
             for cubie in global_state["rubiks_cube"]:
                 cubie.swap_colors()
             global_state["last_swap_time"] = current_time
+            loop.invalidate()
 
-        for event in pygame.event.get():
+        for event in events:
             if event.type == QUIT:
                 global_state["running"] = False
+                loop.report("puthiyath:")
                 pygame.quit()
                 return
 
         keys = pygame.key.get_pressed()
+        held = keys[K_LEFT] or keys[K_RIGHT] or keys[K_UP] or keys[K_DOWN]
         if keys[K_LEFT]:
             global_state["rotation_y"] -= 1
         if keys[K_RIGHT]:
@@ -142,6 +150,10 @@ def main():
             global_state["rotation_x"] -= 1
         if keys[K_DOWN]:
             global_state["rotation_x"] += 1
+        if held:
+            loop.invalidate()
+        if not loop.dirty:
+            continue
 
         glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
         glPushMatrix()
@@ -151,11 +163,13 @@ def main():
             cubie.draw()
         glPopMatrix()
         pygame.display.flip()
+        loop.drawn()
 
 def reset_game():
     global_state["rubiks_cube"] = create_rubiks_cube()
     global_state["start_time"] = time.time()
     global_state["last_swap_time"] = time.time()
+    idle.request_redraw()
 
 def solve_game():
     # This is a placeholder for a solve function
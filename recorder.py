@@ -0,0 +1,268 @@
+"""Gameplay capture for planb and planc.
+
+Frames are copied out of the display surface into a small pool of reusable
+NumPy buffers and handed to a bounded queue.  A writer thread drains the
+queue, quantizes each frame to a fixed 256 colour palette and hands the LZW
+step to a process pool, so the game loop only ever pays for one array copy.
+Files ending in ``.gif`` become animated GIFs, anything else is written as
+headerless rgb24 frames that ffmpeg can read directly.
+
+The same module keeps the per-frame input log used to replay a session
+(optionally headless, faster than real time) into the recorder.
+"""
+import os
+import queue
+import struct
+import threading
+from array import array
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pygame
+
+# ---------- PALETTE ----------
+# 3-3-2 bit RGB: 8 levels of red and green, 4 of blue.
+_levels = np.arange(256)
+PALETTE = np.stack([((_levels >> 5) & 7) * 255 // 7,
+                    ((_levels >> 2) & 7) * 255 // 7,
+                    (_levels & 3) * 255 // 3], axis=1).astype(np.uint8)
+
+
+def quantize(frame):
+    """Map an (h, w, 3) uint8 RGB frame to (h, w) indices into PALETTE."""
+    return (frame[..., 0] & 0xE0) | ((frame[..., 1] >> 3) & 0x1C) | (frame[..., 2] >> 6)
+
+
+# ---------- GIF ENCODING ----------
+def lzw_encode(data, min_code_size=8):
+    """GIF flavoured variable-width LZW of a bytes object."""
+    clear = 1 << min_code_size
+    eoi = clear + 1
+    out = bytearray()
+    bitbuf = nbits = 0
+    code_size = min_code_size + 1
+    next_code = eoi + 1
+    table = {}
+
+    bitbuf |= clear << nbits
+    nbits += code_size
+    prefix = data[0]
+    for byte in data[1:]:
+        key = (prefix << 8) | byte
+        code = table.get(key)
+        if code is not None:
+            prefix = code
+            continue
+        bitbuf |= prefix << nbits
+        nbits += code_size
+        while nbits >= 8:
+            out.append(bitbuf & 0xFF)
+            bitbuf >>= 8
+            nbits -= 8
+        if next_code < 4096:
+            table[key] = next_code
+            next_code += 1
+            if next_code > (1 << code_size) and code_size < 12:
+                code_size += 1
+        else:
+            bitbuf |= clear << nbits
+            nbits += code_size
+            table.clear()
+            next_code = eoi + 1
+            code_size = min_code_size + 1
+        prefix = byte
+
+    bitbuf |= prefix << nbits
+    nbits += code_size
+    # the decoder adds one more entry before it reads the end code
+    if next_code < 4096 and next_code + 1 > (1 << code_size) and code_size < 12:
+        code_size += 1
+    bitbuf |= eoi << nbits
+    nbits += code_size
+    while nbits > 0:
+        out.append(bitbuf & 0xFF)
+        bitbuf >>= 8
+        nbits -= 8
+    return bytes(out)
+
+
+def encode_gif_frame(indices, width, height, delay_cs):
+    """Graphic control extension, image descriptor and LZW data for one frame."""
+    data = lzw_encode(indices)
+    chunks = [struct.pack("<BBBBHBB", 0x21, 0xF9, 4, 0, delay_cs, 0, 0),
+              struct.pack("<BHHHHB", 0x2C, 0, 0, width, height, 0), b"\x08"]
+    for i in range(0, len(data), 255):
+        block = data[i:i + 255]
+        chunks.append(bytes((len(block),)))
+        chunks.append(block)
+    chunks.append(b"\x00")
+    return b"".join(chunks)
+
+
+def gif_header(width, height):
+    return (b"GIF89a" + struct.pack("<HHBBB", width, height, 0xF7, 0, 0) + PALETTE.tobytes()
+            + b"\x21\xFF\x0BNETSCAPE2.0\x03\x01\x00\x00\x00")
+
+
+# ---------- RECORDER ----------
+class FrameRecorder:
+    """Copies display frames into pooled buffers and encodes them off the game loop."""
+
+    def __init__(self, path, size, fps, every=1, scale=1, buffers=8, workers=None, block=False):
+        self.path = path
+        self.every = max(1, every)
+        self.scale = max(1, scale)
+        self.fps = fps / self.every
+        self.block = block
+        self.gif = path.lower().endswith(".gif")
+        self.width, self.height = size
+        self.out_width = len(range(0, self.width, self.scale))
+        self.out_height = len(range(0, self.height, self.scale))
+        self.captured = self.dropped = 0
+        self._tick = 0
+
+        self._free = queue.Queue()
+        for _ in range(buffers):
+            self._free.put(np.empty((self.height, self.width, 3), np.uint8))
+        self._frames = queue.Queue(maxsize=buffers)
+        self._pool = ProcessPoolExecutor(workers) if self.gif else None
+        self._max_pending = 4 * (self._pool._max_workers if self._pool else 1)
+        self._file = open(path, "wb")
+        if self.gif:
+            self._file.write(gif_header(self.out_width, self.out_height))
+        self._writer = threading.Thread(target=self._run, name="recorder", daemon=True)
+        self._writer.start()
+
+    def capture(self, surface):
+        """Grab the current contents of surface; never blocks unless block=True."""
+        self._tick += 1
+        if (self._tick - 1) % self.every:
+            return
+        try:
+            buf = self._free.get(block=self.block)
+        except queue.Empty:
+            self.dropped += 1
+            return
+        pixels = pygame.surfarray.pixels3d(surface)
+        np.copyto(buf, pixels.transpose(1, 0, 2))
+        del pixels  # unlock the surface before the next blit
+        self._frames.put(buf)
+        self.captured += 1
+
+    def _run(self):
+        pending = deque()
+        written = 0
+        while True:
+            buf = self._frames.get()
+            if buf is None:
+                break
+            if self.gif:
+                indices = quantize(buf[::self.scale, ::self.scale]).tobytes()
+                self._free.put(buf)
+                delay = round((written + 1) * 100 / self.fps) - round(written * 100 / self.fps)
+                pending.append(self._pool.submit(encode_gif_frame, indices,
+                                                 self.out_width, self.out_height, delay))
+                while pending and (pending[0].done() or len(pending) > self._max_pending):
+                    self._file.write(pending.popleft().result())
+            else:
+                self._file.write(buf[::self.scale, ::self.scale].tobytes()
+                                 if self.scale > 1 else buf.data)
+                self._free.put(buf)
+            written += 1
+        for fut in pending:
+            self._file.write(fut.result())
+
+    def close(self):
+        self._frames.put(None)
+        self._writer.join()
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._file.write(b"\x3B")
+        self._file.close()
+        print(f"Recorded {self.captured} frames to {self.path} ({self.dropped} dropped)")
+        if not self.gif:
+            print(f"  ffmpeg -f rawvideo -pix_fmt rgb24 -s {self.out_width}x{self.out_height} "
+                  f"-r {self.fps:g} -i {self.path} out.mp4")
+
+
+# ---------- INPUT LOG ----------
+class InputLog:
+    """Seed plus per-frame input bits (and frame times) of one session."""
+
+    MAGIC = b"SNKLOG1\0"
+    HEADER = struct.Struct("<8s8sIHI")
+
+    def __init__(self, game, seed, fps):
+        self.game = game
+        self.seed = seed
+        self.fps = fps
+        self.bits = bytearray()
+        self.dts = array("H")
+
+    def __len__(self):
+        return len(self.bits)
+
+    def append(self, bits, dt_ms=0):
+        self.bits.append(bits)
+        self.dts.append(min(int(dt_ms), 0xFFFF))
+
+    def save(self, path):
+        with open(path, "wb") as f:
+            f.write(self.HEADER.pack(self.MAGIC, self.game.encode(), self.seed,
+                                     self.fps, len(self.bits)))
+            f.write(self.bits)
+            f.write(self.dts.tobytes())
+
+    @classmethod
+    def load(cls, path, expected_game=None):
+        """Read a saved log; ValueError if it is not one, is cut short, or was
+        recorded by a game other than expected_game."""
+        with open(path, "rb") as f:
+            header = f.read(cls.HEADER.size)
+            if len(header) < cls.HEADER.size:
+                raise ValueError(f"{path} is not a session log")
+            magic, game, seed, fps, n = cls.HEADER.unpack(header)
+            if magic != cls.MAGIC:
+                raise ValueError(f"{path} is not a session log")
+            game = game.rstrip(b"\0").decode(errors="replace")
+            if expected_game is not None and game != expected_game:
+                raise ValueError(f"{path} is a {game} session, not {expected_game}")
+            log = cls(game, seed, fps)
+            log.bits = bytearray(f.read(n))
+            dts = f.read(2 * n)
+            if len(log.bits) != n or len(dts) != 2 * n:
+                raise ValueError(f"{path} is cut short")
+            log.dts.frombytes(dts)
+        return log
+
+
+def uint32(text):
+    """argparse type for --seed, which session logs store in 32 bits."""
+    value = int(text)
+    if not 0 <= value < 2**32:
+        raise ValueError(text)
+    return value
+
+
+def add_arguments(parser):
+    """Recording and replay options shared by planb and planc."""
+    parser.add_argument("--record", metavar="FILE",
+                        help="capture gameplay to FILE (.gif, anything else is raw rgb24)")
+    parser.add_argument("--record-every", type=int, default=1, metavar="N",
+                        help="capture every Nth frame")
+    parser.add_argument("--record-scale", type=int, default=1, metavar="N",
+                        help="downscale captured frames by N")
+    parser.add_argument("--save-session", metavar="FILE", help="write the input log to FILE")
+    parser.add_argument("--replay", metavar="FILE", help="drive the game from a saved input log")
+    parser.add_argument("--headless", action="store_true",
+                        help="with --replay, render offscreen as fast as possible")
+    parser.add_argument("--seed", type=uint32, default=None)
+
+
+def setup_headless(args):
+    if args.headless:
+        if not args.replay:
+            raise SystemExit("--headless needs --replay")
+        os.environ["SDL_VIDEODRIVER"] = "dummy"
+        os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
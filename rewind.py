@@ -0,0 +1,69 @@
+"""Rewind history for planc.
+
+Every frame the player, the snake's heading and path mark, and the score
+are written into one row of a ring buffer that is allocated once up front,
+so recording and rewinding never allocate.  The snake's body is not copied:
+its path keeps enough extra history that restoring the mark brings the
+body back, so a row's size does not depend on the snake's length.  The ring
+holds `seconds` of frames, or fewer if that would exceed `max_bytes`.
+"""
+import time
+
+import numpy as np
+
+# row layout
+PX, PY, PULSE, DIR_X, DIR_Y, SCORE, CLOCK, MARK = range(8)
+WIDTH = 8
+
+
+class RewindBuffer:
+    def __init__(self, seconds=10, fps=60, max_bytes=8 << 20):
+        self.width = WIDTH
+        # float64 so the path mark (a frame count) stays exact
+        row_bytes = self.width * np.dtype(np.float64).itemsize
+        self.capacity = max(1, min(int(seconds * fps), max_bytes // row_bytes))
+        self.fps = fps
+        self.buf = np.zeros((self.capacity, self.width), np.float64)
+        self.head = 0   # next row to write
+        self.count = 0  # rows of valid history
+        self.capture_time = 0.0
+        self.captures = 0
+
+    @property
+    def nbytes(self):
+        return self.buf.nbytes
+
+    @property
+    def seconds(self):
+        return self.count / self.fps
+
+    def capture(self, player, snake, score, clock):
+        t = time.perf_counter()
+        row = self.buf[self.head]
+        row[:] = (player.x, player.y, player.pulse_time, snake.dir_x, snake.dir_y, score, clock, snake.mark())
+        self.head = (self.head + 1) % self.capacity
+        self.count = min(self.count + 1, self.capacity)
+        self.capture_time += time.perf_counter() - t
+        self.captures += 1
+
+    def rewind(self, player, snake, steps=1):
+        """Step back `steps` frames and restore that state. Returns (score, clock) or None."""
+        if self.count == 0:
+            return None
+        # drop the newest rows but always keep the oldest one to resume from
+        steps = min(steps, self.count - 1)
+        self.count -= steps
+        self.head = (self.head - steps) % self.capacity
+        row = self.buf[(self.head - 1) % self.capacity]
+        player.x, player.y, player.pulse_time = float(row[PX]), float(row[PY]), float(row[PULSE])
+        snake.dir_x, snake.dir_y = float(row[DIR_X]), float(row[DIR_Y])
+        snake.restore(int(row[MARK]))
+        return float(row[SCORE]), float(row[CLOCK])
+
+    def describe(self):
+        return (f"Rewind: {self.capacity} frames ({self.capacity / self.fps:.1f} s) x "
+                f"{self.width * 8} B = {self.nbytes / 1024:.0f} KB")
+
+    def report(self):
+        per = 1e6 * self.capture_time / max(1, self.captures)
+        print(f"{self.describe()}, capture {per:.1f} us/frame over {self.captures} frames")
@@ -4,6 +4,8 @@ from OpenGL.GL import *
 from OpenGL.GLU import *
 import math
 
+import idle
+
 # Define colors (R, G, B)
 WHITE = (1, 1, 1)
 YELLOW = (1, 1, 0)
@@ -88,19 +90,21 @@ def main():
 
     rubiks_cube = create_rubiks_cube()
 
-    clock = pygame.time.Clock()
+    loop = idle.IdleLoop(60)
     rotation_x = 0
     rotation_y = 0
+    held = False
 
     running = True
     while running:
-        clock.tick(60)
-        for event in pygame.event.get():
+        # Only tick at 60 FPS while an arrow key is held; otherwise sleep until an event
+        for event in loop.events(busy=held):
             if event.type == pygame.QUIT:
                 running = False
 
         # Keyboard input
         keys = pygame.key.get_pressed()
+        held = keys[pygame.K_LEFT] or keys[pygame.K_RIGHT] or keys[pygame.K_UP] or keys[pygame.K_DOWN]
         if keys[pygame.K_LEFT]:
             rotation_y -= 1
         if keys[pygame.K_RIGHT]:
@@ -109,6 +113,10 @@ def main():
             rotation_x -= 1
         if keys[pygame.K_DOWN]:
             rotation_x += 1
+        if held:
+            loop.invalidate()
+        if not loop.dirty:
+            continue
 
         glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
         glPushMatrix()
@@ -120,7 +128,9 @@ def main():
 
         glPopMatrix()
         pygame.display.flip()
+        loop.drawn()
 
+    loop.report("rubix:")
     pygame.quit()
 
 
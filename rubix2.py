@@ -1,48 +1,21 @@
+import argparse
+import os
+import random
 import pygame
 from pygame.locals import *
 from OpenGL.GL import *
 from OpenGL.GLU import *
 import time
-import random
+from collections import deque
 
-# Define colors for faces
-WHITE = (1, 1, 1)    # Up
-YELLOW = (1, 1, 0)   # Down
-RED = (1, 0, 0)      # Front
-ORANGE = (1, 0.5, 0) # Back
-BLUE = (0, 0, 1)     # Left
-GREEN = (0, 1, 0)    # Right
-BLACK = (0, 0, 0)
-
-face_indices = {'U':0, 'D':1, 'F':2, 'B':3, 'L':4, 'R':5}
-positions = [-1.05, 0, 1.05]
-
-colors_list = [WHITE, YELLOW, RED, ORANGE, BLUE, GREEN]
-
-class Cubie:
-    def __init__(self, x_idx, y_idx, z_idx):
-        self.x_idx = x_idx
-        self.y_idx = y_idx
-        self.z_idx = z_idx
-        self.size = 0.98
-        self.colors = [BLACK]*6
-        self.set_initial_colors()
-        self.update_position()
-
-    def set_initial_colors(self):
-        self.colors = [BLACK]*6
-        if self.y_idx == 2: self.colors[face_indices['U']] = WHITE
-        if self.y_idx == 0: self.colors[face_indices['D']] = YELLOW
-        if self.z_idx == 2: self.colors[face_indices['F']] = RED
-        if self.z_idx == 0: self.colors[face_indices['B']] = ORANGE
-        if self.x_idx == 0: self.colors[face_indices['L']] = BLUE
-        if self.x_idx == 2: self.colors[face_indices['R']] = GREEN
-
-    def update_position(self):
-        self.x = positions[self.x_idx]
-        self.y = positions[self.y_idx]
-        self.z = positions[self.z_idx]
+import cube_core
+import cube_history
+import cube_pick
+import idle
+import latency
+from cube_core import BLACK, MOVES
 
+class Cubie(cube_core.Cubie):
     def draw(self):
         s = self.size / 2
         vertices = [
@@ -85,22 +58,14 @@ class Cubie:
                 glVertex3fv(vertices[vertex])
         glEnd()
 
-class RubiksCube:
-    def __init__(self):
-        # 3D list of cubies indexed by x_idx, y_idx, z_idx (0 to 2)
-        self.cube = [[[Cubie(x,y,z) for z in range(3)] for y in range(3)] for x in range(3)]
-        self.animating = False
-        self.animation_axis = None
-        self.animation_layer = None
-        self.animation_direction = 1
-        self.animation_angle = 0
-        self.animation_speed = 5
-        self.animation_cubies = []
+class RubiksCube(cube_core.RubiksCube):
+    cubie_class = Cubie
 
     def draw(self):
-        for x in range(3):
-            for y in range(3):
-                for z in range(3):
+        n = self.n
+        for x in range(n):
+            for y in range(n):
+                for z in range(n):
                     cubie = self.cube[x][y][z]
                     if self.animating and cubie in self.animation_cubies:
                         glPushMatrix()
@@ -118,155 +83,48 @@ class RubiksCube:
                     else:
                         cubie.draw()
 
-    def start_rotation(self, axis, layer, clockwise=True):
-        if self.animating:
-            return
-        self.animating = True
-        self.animation_axis = axis
-        self.animation_layer = layer
-        self.animation_direction = 1 if clockwise else -1
-        self.animation_angle = 0
-        self.animation_cubies = []
-        for x in range(3):
-            for y in range(3):
-                for z in range(3):
-                    cubie = self.cube[x][y][z]
-                    pos = {'x':x,'y':y,'z':z}[axis]
-                    if pos == layer:
-                        self.animation_cubies.append(cubie)
+LAYERS = [
+    ("U", "Up layer"), ("M", "Middle Y layer"), ("D", "Down layer"),
+    ("L", "Left layer"), ("E", "Middle X layer"), ("R", "Right layer"),
+    ("F", "Front layer"), ("S", "Middle Z layer"), ("B", "Back layer"),
+]
+
+JUMP = 100  # moves skipped by Page Up / Page Down
+RACE = pygame.USEREVENT + 2  # a race message, posted by cube_race's reader thread
+INSETS = 3  # opponents' cubes drawn down the right edge in a race
+
+def post_race(msg, at):
+    if pygame.display.get_init():
+        pygame.event.post(pygame.event.Event(RACE, msg=msg, at=at))
+
+def inset_rect(slot, display):
+    """Where an opponent's cube goes, as (x, y from the top, w, h)."""
+    w, h = display[0] // 4, display[1] // 4
+    return display[0] - w - 10, 10 + slot * (h + 10), w, h
+
+def draw_inset(cube, slot, display, rotation_x, rotation_y):
+    """An opponent's cube in its own small viewport, seen like the player's."""
+    x, top, w, h = inset_rect(slot, display)
+    y = display[1] - top - h
+    glEnable(GL_SCISSOR_TEST)
+    glScissor(x, y, w, h)
+    glClearColor(0.12, 0.12, 0.15, 1)
+    glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
+    glClearColor(0, 0, 0, 0)
+    glDisable(GL_SCISSOR_TEST)
+    glViewport(x, y, w, h)
+    glPushMatrix()
+    glLoadIdentity()
+    gluPerspective(45, w/h, 0.1, 50)
+    glTranslatef(0, 0, -15)
+    glRotatef(20, 2, 1, 0)
+    glRotatef(rotation_x, 1, 0, 0)
+    glRotatef(rotation_y, 0, 1, 0)
+    cube.draw()
+    glPopMatrix()
+    glViewport(0, 0, *display)
 
-    def update_animation(self):
-        if not self.animating:
-            return
-        self.animation_angle += self.animation_speed
-        if self.animation_angle >= 90:
-            self.animation_angle = 90
-            self.animating = False
-            self.finish_rotation()
-
-    def finish_rotation(self):
-        axis = self.animation_axis
-        layer = self.animation_layer
-        direction = self.animation_direction
-
-        # Extract layer cubies into 2D matrix for rotation
-        matrix = [[None]*3 for _ in range(3)]
-        for x in range(3):
-            for y in range(3):
-                for z in range(3):
-                    cubie = self.cube[x][y][z]
-                    pos = {'x':x,'y':y,'z':z}[axis]
-                    if pos == layer:
-                        if axis == 'x':
-                            matrix[y][2-z] = cubie
-                        elif axis == 'y':
-                            matrix[2-z][x] = cubie
-                        else:
-                            matrix[y][x] = cubie
-
-        # Rotate the matrix clockwise or anticlockwise by 90 degrees
-        if direction == 1:
-            matrix = [list(reversed(col)) for col in zip(*matrix)]
-        else:
-            matrix = list(zip(*matrix[::-1]))
-            matrix = [list(row) for row in matrix]
-
-        # Update cubie indices and positions based on rotation
-        for i in range(3):
-            for j in range(3):
-                cubie = matrix[i][j]
-                if axis == 'x':
-                    cubie.x_idx = layer
-                    cubie.y_idx = i
-                    cubie.z_idx = 2 - j
-                elif axis == 'y':
-                    cubie.x_idx = j
-                    cubie.y_idx = layer
-                    cubie.z_idx = 2 - i
-                else:
-                    cubie.x_idx = j
-                    cubie.y_idx = i
-                    cubie.z_idx = layer
-                cubie.update_position()
-                self.rotate_cubie_colors(cubie, axis, direction)
-
-        # Rebuild cube structure with updated cubies
-        new_cube = [[[None]*3 for _ in range(3)] for _ in range(3)]
-        for x in range(3):
-            for y in range(3):
-                for z in range(3):
-                    for ox in range(3):
-                        for oy in range(3):
-                            for oz in range(3):
-                                cubie = self.cube[ox][oy][oz]
-                                if (cubie.x_idx, cubie.y_idx, cubie.z_idx) == (x,y,z):
-                                    new_cube[x][y][z] = cubie
-        self.cube = new_cube
-
-    def rotate_cubie_colors(self, cubie, axis, direction):
-        c = cubie.colors[:]
-        if axis == 'x':
-            if direction == 1:
-                cubie.colors[0] = c[3]
-                cubie.colors[3] = c[1]
-                cubie.colors[1] = c[2]
-                cubie.colors[2] = c[0]
-                cubie.colors[4] = c[4]
-                cubie.colors[5] = c[5]
-            else:
-                cubie.colors[0] = c[2]
-                cubie.colors[2] = c[1]
-                cubie.colors[1] = c[3]
-                cubie.colors[3] = c[0]
-                cubie.colors[4] = c[4]
-                cubie.colors[5] = c[5]
-        elif axis == 'y':
-            if direction == 1:
-                cubie.colors[2] = c[4]
-                cubie.colors[5] = c[2]
-                cubie.colors[3] = c[5]
-                cubie.colors[4] = c[3]
-                cubie.colors[0] = c[0]
-                cubie.colors[1] = c[1]
-            else:
-                cubie.colors[2] = c[5]
-                cubie.colors[5] = c[3]
-                cubie.colors[3] = c[4]
-                cubie.colors[4] = c[2]
-                cubie.colors[0] = c[0]
-                cubie.colors[1] = c[1]
-        elif axis == 'z':
-            if direction == 1:
-                cubie.colors[0] = c[4]
-                cubie.colors[5] = c[0]
-                cubie.colors[1] = c[5]
-                cubie.colors[4] = c[1]
-                cubie.colors[2] = c[2]
-                cubie.colors[3] = c[3]
-            else:
-                cubie.colors[0] = c[5]
-                cubie.colors[5] = c[1]
-                cubie.colors[1] = c[4]
-                cubie.colors[4] = c[0]
-                cubie.colors[2] = c[2]
-                cubie.colors[3] = c[3]
-
-    def randomize_colors(self):
-        # Randomly reassign face colors for all cubies (for color change effect)
-        for x in range(3):
-            for y in range(3):
-                for z in range(3):
-                    cubie = self.cube[x][y][z]
-                    # Only assign colors to faces that have color (non-black) originally
-                    new_colors = []
-                    for c in cubie.colors:
-                        if c == BLACK:
-                            new_colors.append(BLACK)
-                        else:
-                            new_colors.append(random.choice(colors_list))
-                    cubie.colors = new_colors
-
-def main():
+def main(size=3, history_path=None, race=None):
     pygame.init()
     display = (900, 700)
     pygame.display.set_mode(display, DOUBLEBUF | OPENGL)
@@ -276,421 +134,321 @@ def main():
     glTranslatef(0, 0, -15)
     glRotatef(20, 2, 1, 0)
 
-    cube = RubiksCube()
+    cube = RubiksCube(size)
+    moves = MOVES
+    solver = None  # the 2x2x2 distance table, mapped on the first solve
+    if size == 2:
+        import cube2
+        moves = cube2.MOVES
+    history = cube_history.MoveHistory(moves, size)
+    if history_path and os.path.exists(history_path):
+        try:
+            history.load(history_path)
+        except (OSError, ValueError) as e:
+            # keep the file: saving the empty history on exit would overwrite it
+            print(f"Warning: could not load the history ({e}); starting with an empty one, not saved")
+            history_path = None
+        else:
+            cube.set_state(history.state())
+            print(f"History: {len(history)} moves loaded from {history_path}, at move {history.pos}")
+
+    # race state (--race): our player number, the start time, and per opponent
+    # a mirrored cube turned by the moves they send
+    client = None
+    me = started = None
+    finished = False
+    turns = 0
+    rivals, rival_turns, results = {}, {}, {}  # results: player -> seconds, or None if they left
+    rival_waits = []  # seconds from a rival's turn arriving to the loop taking it
+    names = list(moves)
+    codes = {name: i for i, name in enumerate(names)}
+    solved = cube.state()
+    if race:
+        import cube_race
+        host, _, port = race.partition(":")
+        try:
+            client = cube_race.RaceClient(host, int(port or cube_race.PORT), post_race)
+        except OSError as e:
+            print(f"Race: cannot reach a race server on {race}: {e.strerror or e}")
+            pygame.quit()
+            return
+        print(f"Race: waiting for the other players on {race}")
 
-    clock = pygame.time.Clock()
+    loop = idle.IdleLoop(60)
+    tracer = latency.LatencyTracer("rubix2")
+    # turns typed while a layer is still turning start when it finishes;
+    # long enough for a whole 2x2x2 solution (at most 14 quarter turns)
+    queued = deque(maxlen=16)
 
     rotation_x = 0
     rotation_y = 0
 
     mouse_down = False
     last_pos = None
+    # a drag that starts on a sticker turns a layer; elsewhere it rotates the view
+    picker = cube_pick.Picker(size)
+    move_names = {turn: name for name, turn in moves.items()}
+    grab = None
 
     last_color_change = time.time()
+    shown_caption = None
 
     print("Controls:")
-    print("Mouse drag to rotate cube view")
-    print("U/u: Up layer CW/CCW")
-    print("M/m: Middle Y layer CW/CCW")
-    print("D/d: Down layer CW/CCW")
-    print("L/l: Left layer CW/CCW")
-    print("E/e: Middle X layer CW/CCW")
-    print("R/r: Right layer CW/CCW")
-    print("F/f: Front layer CW/CCW")
-    print("S/s: Middle Z layer CW/CCW")
-    print("B/b: Back layer CW/CCW")
+    print("Mouse drag on a sticker to turn its layer, elsewhere to rotate the view")
+    for key, layer in LAYERS:
+        if key in moves:
+            print(f"{key}/{key.lower()}: {layer} CW/CCW")
+    print("Space: scramble")
+    if size == 2:
+        print("Enter: solve in the fewest quarter turns")
+    print("Ctrl+Z / Left: undo, Ctrl+Y / Right: redo")
+    print(f"Home / End: first / last move, Page Up / Page Down: {JUMP} moves back / forward")
+    if history_path:
+        print(f"Ctrl+S: save the history to {history_path} (also saved on exit)")
+    if client:
+        print("Race: your turns go to the other players; scrambling, solving and jumping are off")
+
+    def play(name):
+        """Queue a turn the player made; in a race, send it and watch for the solve."""
+        nonlocal turns, finished
+        queued.append(name)
+        tracer.poll("turn")
+        if client is None:
+            return
+        client.send_move(codes[name])
+        turns += 1
+        state = history.state()
+        if turns % cube_race.CHECK_EVERY == 0:
+            client.send_check(turns, cube_race.state_crc(state))
+        if tuple(state) == solved:
+            finished = True
+            ms = int(1000 * (time.perf_counter() - started))
+            client.send_done(turns, ms)
+            results[me] = ms / 1000
+            print(f"Race: you solved it in {ms / 1000:.2f} s, {turns} turns")
+
+    def race_caption():
+        if started is None:
+            return "rubix2 race  waiting for players"
+        parts = [f"rubix2 race  {time.perf_counter() - started:.1f} s" if not finished else "rubix2 race",
+                 f"you: {f'{results[me]:.2f} s' if finished else f'{turns} turns'}"]
+        for p in sorted(rivals):
+            result = results.get(p, "")
+            parts.append(f"P{p + 1}: " + ("left" if result is None else f"{result:.2f} s" if result
+                                          else f"{rival_turns[p]} turns"))
+        return "  ".join(parts)
+
+    def jump(target):
+        """Go straight to a move of the history, dropping any turns still to animate."""
+        history.seek(target)
+        queued.clear()
+        cube.animating = False
+        cube.set_state(history.state())
+        tracer.apply("turn")
+        loop.invalidate()
 
     running = True
     while running:
-        clock.tick(60)
-        for event in pygame.event.get():
+        # Tick at 60 FPS only while a layer turn is animating; otherwise sleep
+        # until an event or the next color change (the 2x2x2 keeps its colors,
+        # or it could not be solved, and neither does a race); a race wakes
+        # ten times a second for its clock
+        racing = client is not None and started is not None and not finished
+        turning = client is None or racing
+        if racing:
+            timeout = 0.1
+        elif size == 3 and client is None:
+            timeout = max(0, last_color_change + 10 - time.time())
+        else:
+            timeout = None
+        for event in loop.events(busy=cube.animating or bool(queued), timeout=timeout):
             if event.type == pygame.QUIT:
                 running = False
 
+            elif event.type == RACE:
+                loop.invalidate()
+                msg = event.msg
+                if msg is None:
+                    if client is not None:
+                        print("Race: the server closed the connection")
+                    client = None
+                elif msg[0] == cube_race.MSG_START:
+                    _, me, players, race_size, seed = msg
+                    if race_size != size:
+                        print(f"Race: this race is on the {race_size}x{race_size}x{race_size} cube; "
+                              f"join it with --size {race_size}")
+                        running = False
+                        continue
+                    mixed = cube_race.scramble(seed, names)
+                    queued.clear()
+                    cube.animating = False
+                    cube.set_state(solved)
+                    for name in mixed:
+                        cube.apply_move(*moves[name])
+                    history = cube_history.MoveHistory(moves, size, cube.state())
+                    for p in range(players):
+                        if p != me:
+                            rivals[p] = RubiksCube(size)
+                            rivals[p].set_state(cube.state())
+                            rival_turns[p] = 0
+                    started = time.perf_counter()
+                    print(f"Race: go! You are player {me + 1} of {players}")
+                elif msg[0] == cube_race.MSG_MOVE:
+                    _, p, code = msg
+                    rivals[p].apply_move(*moves[names[code]])
+                    rival_turns[p] += 1
+                    rival_waits.append(time.perf_counter() - event.at)
+                    tracer.poll("rival", now=event.at)
+                    tracer.apply("rival")
+                elif msg[0] == cube_race.MSG_CHECK:
+                    _, p, n, crc = msg
+                    if n != rival_turns[p] or crc != cube_race.state_crc(rivals[p].state()):
+                        print(f"Race: player {p + 1}'s cube is out of step after {n} turns")
+                elif msg[0] == cube_race.MSG_DONE:
+                    _, p, n, ms = msg
+                    results[p] = ms / 1000
+                    print(f"Race: player {p + 1} solved it in {ms / 1000:.2f} s, {n} turns")
+                elif msg[0] == cube_race.MSG_LEFT:
+                    results.setdefault(msg[1], None)
+                    print(f"Race: player {msg[1] + 1} left")
+
             elif event.type == pygame.MOUSEBUTTONDOWN:
                 if event.button == 1:
                     mouse_down = True
                     last_pos = pygame.mouse.get_pos()
+                    picker.set_view(cube_pick.view_matrix(rotation_x, rotation_y, display), display,
+                                    key=(rotation_x, rotation_y))
+                    grab = picker.pick(*event.pos)
+                    for slot in range(min(len(rivals), INSETS)):
+                        x, y, w, h = inset_rect(slot, display)
+                        if x <= event.pos[0] < x + w and y <= event.pos[1] < y + h:
+                            grab = None  # the opponent's cube is in front
 
             elif event.type == pygame.MOUSEBUTTONUP:
                 if event.button == 1:
                     mouse_down = False
 
             elif event.type == pygame.MOUSEMOTION:
-                if mouse_down:
+                if mouse_down and grab:
+                    turn = picker.turn(grab, *event.pos)
+                    if turn and len(queued) < queued.maxlen and turning:
+                        history.push(move_names[turn])
+                        play(move_names[turn])
+                        grab = False  # one turn per drag
+                elif mouse_down and grab is None:
                     x, y = pygame.mouse.get_pos()
                     dx = x - last_pos[0]
                     dy = y - last_pos[1]
                     rotation_y += dx * 0.5
                     rotation_x += dy * 0.5
                     last_pos = (x, y)
+                    tracer.poll("drag")
+                    tracer.apply("drag")
+                    loop.invalidate()
 
             elif event.type == pygame.KEYDOWN:
-                if not cube.animating:
-                    char = event.unicode
-                    if char == 'u':
-                        cube.start_rotation('y', 2, clockwise=False)
-                    elif char == 'U':
-                        cube.start_rotation('y', 2, clockwise=True)
-                    elif char == 'm':
-                        cube.start_rotation('y', 1, clockwise=False)
-                    elif char == 'M':
-                        cube.start_rotation('y', 1, clockwise=True)
-                    elif char == 'd':
-                        cube.start_rotation('y', 0, clockwise=False)
-                    elif char == 'D':
-                        cube.start_rotation('y', 0, clockwise=True)
-                    elif char == 'l':
-                        cube.start_rotation('x', 0, clockwise=False)
-                    elif char == 'L':
-                        cube.start_rotation('x', 0, clockwise=True)
-                    elif char == 'e':
-                        cube.start_rotation('x', 1, clockwise=False)
-                    elif char == 'E':
-                        cube.start_rotation('x', 1, clockwise=True)
-                    elif char == 'r':
-                        cube.start_rotation('x', 2, clockwise=False)
-                    elif char == 'R':
-                        cube.start_rotation('x', 2, clockwise=True)
-                    elif char == 'f':
-                        cube.start_rotation('z', 2, clockwise=False)
-                    elif char == 'F':
-                        cube.start_rotation('z', 2, clockwise=True)
-                    elif char == 's':
-                        cube.start_rotation('z', 1, clockwise=False)
-                    elif char == 'S':
-                        cube.start_rotation('z', 1, clockwise=True)
-                    elif char == 'b':
-                        cube.start_rotation('z', 0, clockwise=False)
-                    elif char == 'B':
-                        cube.start_rotation('z', 0, clockwise=True)
-
-        # Change colors every 10 seconds
-        if time.time() - last_color_change > 10:
+                ctrl = event.mod & pygame.KMOD_CTRL
+                full = len(queued) == queued.maxlen or not turning
+                if event.unicode in moves:
+                    if not full:
+                        history.push(event.unicode)
+                        play(event.unicode)
+                elif event.key == pygame.K_LEFT or ctrl and event.key == pygame.K_z:
+                    name = None if full else history.undo()
+                    if name:
+                        play(name)
+                elif event.key == pygame.K_RIGHT or ctrl and event.key == pygame.K_y:
+                    name = None if full else history.redo()
+                    if name:
+                        play(name)
+                elif client is not None:
+                    pass  # no scrambles, solves or jumps in a race
+                elif event.key in (pygame.K_HOME, pygame.K_END, pygame.K_PAGEUP, pygame.K_PAGEDOWN):
+                    jump({pygame.K_HOME: 0, pygame.K_END: len(history),
+                          pygame.K_PAGEUP: history.pos - JUMP, pygame.K_PAGEDOWN: history.pos + JUMP}[event.key])
+                elif ctrl and event.key == pygame.K_s and history_path:
+                    history.save(history_path)
+                    print(f"History: {len(history)} moves saved to {history_path}")
+                elif event.key == pygame.K_SPACE and not (cube.animating or queued):
+                    for name in random.choices(list(moves), k=25):
+                        cube.apply_move(*moves[name])
+                        history.push(name)
+                    loop.invalidate()
+                elif event.key == pygame.K_RETURN and size == 2 and not (cube.animating or queued):
+                    if solver is None:
+                        solver = cube2.Solver()
+                    t = time.perf_counter()
+                    solution = solver.solve(cube)
+                    if solution is None:
+                        print("Solve: the stickers are not a reachable position")
+                    else:
+                        print(f"Solve: {' '.join(solution) or 'already solved'} "
+                              f"({len(solution)} turns, found in {1e6 * (time.perf_counter() - t):.0f} us)")
+                        queued.extend(solution)
+                        for name in solution:
+                            history.push(name)
+
+        if queued and not cube.animating:
+            cube.start_rotation(*moves[queued.popleft()])
+            tracer.apply("turn", "an animation", count=1)
+
+        # Change colors every 10 seconds, between turns so the history sees the
+        # stickers where it expects them
+        if size == 3 and client is None and not results and time.time() - last_color_change > 10 \
+                and not (cube.animating or queued):
             last_color_change = time.time()
             cube.randomize_colors()
+            history.recolor(cube.state())
+            loop.invalidate()
+        caption = race_caption() if client is not None or results else f"rubix2  move {history.pos}/{len(history)}"
+        if caption != shown_caption:
+            pygame.display.set_caption(caption)
+            shown_caption = caption
+        if cube.animating:
+            loop.invalidate()
+        if not loop.dirty:
+            continue
 
         glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
         glPushMatrix()
-        glRotateHere's the full updated code with:
-
-- Proper Rubik's cube layer rotation (positions and colors updated),
-- Every 10 seconds, all visible colored faces randomly change colors,
-- Smooth animation of rotations,
-- Mouse drag to rotate view,
-- Key controls for all layers including middle layers.
-
-```python
-import pygame
-from pygame.locals import *
-from OpenGL.GL import *
-from OpenGL.GLU import *
-import time
-import random
-
-# Colors
-WHITE = (1, 1, 1)
-YELLOW = (1, 1, 0)
-RED = (1, 0, 0)
-ORANGE = (1, 0.5, 0)
-BLUE = (0, 0, 1)
-GREEN = (0, 1, 0)
-BLACK = (0, 0, 0)
-
-face_indices = {'U':0, 'D':1, 'F':2, 'B':3, 'L':4, 'R':5}
-positions = [-1.05, 0, 1.05]
-colors_list = [WHITE, YELLOW, RED, ORANGE, BLUE, GREEN]
-
-class Cubie:
-    def __init__(self, x_idx, y_idx, z_idx):
-        self.x_idx = x_idx
-        self.y_idx = y_idx
-        self.z_idx = z_idx
-        self.size = 0.98
-        self.colors = [BLACK]*6
-        self.set_initial_colors()
-        self.update_position()
-
-    def set_initial_colors(self):
-        self.colors = [BLACK]*6
-        if self.y_idx == 2: self.colors[face_indices['U']] = WHITE
-        if self.y_idx == 0: self.colors[face_indices['D']] = YELLOW
-        if self.z_idx == 2: self.colors[face_indices['F']] = RED
-        if self.z_idx == 0: self.colors[face_indices['B']] = ORANGE
-        if self.x_idx == 0: self.colors[face_indices['L']] = BLUE
-        if self.x_idx == 2: self.colors[face_indices['R']] = GREEN
-
-    def update_position(self):
-        self.x = positions[self.x_idx]
-        self.y = positions[self.y_idx]
-        self.z = positions[self.z_idx]
-
-    def draw(self):
-        s = self.size / 2
-        vertices = [
-            (self.x - s, self.y - s, self.z - s),
-            (self.x + s, self.y - s, self.z - s),
-            (self.x + s, self.y + s, self.z - s),
-            (self.x - s, self.y + s, self.z - s),
-            (self.x - s, self.y - s, self.z + s),
-            (self.x + s, self.y - s, self.z + s),
-            (self.x + s, self.y + s, self.z + s),
-            (self.x - s, self.y + s, self.z + s),
-        ]
-
-        edges = [
-            (0, 1), (1, 2), (2, 3), (3, 0),
-            (4, 5), (5, 6), (6, 7), (7, 4),
-            (0, 4), (1, 5), (2, 6), (3, 7)
-        ]
-
-        faces = [
-            (3, 2, 6, 7),  # Up
-            (0, 1, 5, 4),  # Down
-            (4, 5, 6, 7),  # Front
-            (0, 1, 2, 3),  # Back
-            (0, 3, 7, 4),  # Left
-            (1, 2, 6, 5),  # Right
-        ]
-
-        glBegin(GL_QUADS)
-        for i, face in enumerate(faces):
-            glColor3fv(self.colors[i])
-            for vertex in face:
-                glVertex3fv(vertices[vertex])
-        glEnd()
-
-        glColor3fv(BLACK)
-        glBegin(GL_LINES)
-        for edge in edges:
-            for vertex in edge:
-                glVertex3fv(vertices[vertex])
-        glEnd()
-
-class RubiksCube:
-    def __init__(self):
-        self.cube = [[[Cubie(x,y,z) for z in range(3)] for y in range(3)] for x in range(3)]
-        self.animating = False
-        self.animation_axis = None
-        self.animation_layer = None
-        self.animation_direction = 1
-        self.animation_angle = 0
-        self.animation_speed = 5
-        self.animation_cubies = []
-
-    def draw(self):
-        for x in range(3):
-            for y in range(3):
-                for z in range(3):
-                    cubie = self.cube[x][y][z]
-                    if self.animating and cubie in self.animation_cubies:
-                        glPushMatrix()
-                        glTranslatef(cubie.x, cubie.y, cubie.z)
-                        angle = self.animation_angle * self.animation_direction
-                        if self.animation_axis == 'x':
-                            glRotatef(angle, 1, 0, 0)
-                        elif self.animation_axis == 'y':
-                            glRotatef(angle, 0, 1, 0)
-                        elif self.animation_axis == 'z':
-                            glRotatef(angle, 0, 0, 1)
-                        glTranslatef(-cubie.x, -cubie.y, -cubie.z)
-                        cubie.draw()
-                        glPopMatrix()
-                    else:
-                        cubie.draw()
-
-    def start_rotation(self, axis, layer, clockwise=True):
-        if self.animating:
-            return
-        self.animating = True
-        self.animation_axis = axis
-        self.animation_layer = layer
-        self.animation_direction = 1 if clockwise else -1
-        self.animation_angle = 0
-        self.animation_cubies = []
-        for x in range(3):
-            for y in range(3):
-                for z in range(3):
-                    cubie = self.cube[x][y][z]
-                    pos = {'x':x,'y':y,'z':z}[axis]
-                    if pos == layer:
-                        self.animation_cubies.append(cubie)
-
-    def update_animation(self):
-        if not self.animating:
-            return
-        self.animation_angle += self.animation_speed
-        if self.animation_angle >= 90:
-            self.animation_angle = 90
-            self.animating = False
-            self.finish_rotation()
-
-    def finish_rotation(self):
-        axis = self.animation_axis
-        layer = self.animation_layer
-        direction = self.animation_direction
-
-        matrix = [[None]*3 for _ in range(3)]
-        for x in range(3):
-            for y in range(3):
-                for z in range(3):
-                    cubie = self.cube[x][y][z]
-                    pos = {'x':x,'y':y,'z':z}[axis]
-                    if pos == layer:
-                        if axis == 'x':
-                            matrix[y][2-z] = cubie
-                        elif axis == 'y':
-                            matrix[2-z][x] = cubie
-                        else:
-                            matrix[y][x] = cubie
-
-        if direction == 1:
-            matrix = [list(reversed(col)) for col in zip(*matrix)]
-        else:
-            matrix = list(zip(*matrix[::-1]))
-            matrix = [list(row) for row in matrix]
-
-        for i in range(3):
-            for j in range(3):
-                cubie = matrix[i][j]
-                if axis == 'x':
-                    cubie.x_idx = layer
-                    cubie.y_idx = i
-                    cubie.z_idx = 2 - j
-                elif axis == 'y':
-                    cubie.x_idx = j
-                    cubie.y_idx = layer
-                    cubie.z_idx = 2 - i
-                else:
-                    cubie.x_idx = j
-                    cubie.y_idx = i
-                    cubie.z_idx = layer
-                cubie.update_position()
-                self.rotate_cubie_colors(cubie, axis, direction)
-
-        new_cube = [[[None]*3 for _ in range(3)] for _ in range(3)]
-        for x in range(3):
-            for y in range(3):
-                for z in range(3):
-                    for ox in range(3):
-                        for oy in range(3):
-                            for oz in range(3):
-                                cubie = self.cube[ox][oy][oz]
-                                if (cubie.x_idx, cubie.y_idx, cubie.z_idx) == (x,y,z):
-                                    new_cube[x][y][z] = cubie
-        self.cube = new_cube
-
-    def rotate_cubie_colors(self, cubie, axis, direction):
-        c = cubie.colors[:]
-        if axis == 'x':
-            if direction == 1:
-                cubie.colors[0] = c[3]
-                cubie.colors[3] = c[1]
-                cubie.colors[1] = c[2]
-                cubie.colors[2] = c[0]
-                cubie.colors[4] = c[4]
-                cubie.colors[5] = c[5]
-            else:
-                cubie.colors[0] = c[2]
-                cubie.colors[2] = c[1]
-                cubie.colors[1] = c[3]
-                cubie.colors[3] = c[0]
-                cubie.colors[4] = c[4]
-                cubie.colors[5] = c[5]
-        elif axis == 'y':
-            if direction == 1:
-                cubie.colors[2] = c[4]
-                cubie.colors[5] = c[2]
-                cubie.colors[3] = c[5]
-                cubie.colors[4] = c[3]
-                cubie.colors[0] = c[0]
-                cubie.colors[1] = c[1]
-            else:
-                cubie.colors[2] = c[5]
-                cubie.colors[5] = c[3]
-                cubie.colors[3] = c[4]
-                cubie.colors[4] = c[2]
-                cubie.colors[0] = c[0]
-                cubie.colors[1] = c[1]
-        elif axis == 'z':
-            if direction == 1:
-                cubie.colors[0] = c[4]
-                cubie.colors[5] = c[0]
-                cubie.colors[1] = c[5]
-                cubie.colors[4] = c[1]
-                cubie.colors[2] = c[2]
-                cubie.colors[3] = c[3]
-            else:
-                cubie.colors[0] = c[5]
-                cubie.colors[5] = c[1]
-                cubie.colors[1] = c[4]
-                cubie.colors[4] = c[0]
-                cubie.colors[2] = c[2]
-                cubie.colors[3] = c[3]
-
-    def randomize_colors(self):
-        for x in range(3):
-            for y in range(3):
-                for z in range(3):
-                    cubie = self.cube[x][y][z]
-                    new_colors = []
-                    for c in cubie.colors:
-                        if c == BLACK:
-                            new_colors.append(BLACK)
-                        else:
-                            new_colors.append(random.choice(colors_list))
-                    cubie.colors = new_colors
-
-def main():
-    pygame.init()
-    display = (900, 700)
-    pygame.display.set_mode(display, DOUBLEBUF | OPENGL)
-    glEnable(GL_DEPTH_TEST)
-
-    gluPerspective(45, display[0]/display[1], 0.1, 50)
-    glTranslatef(0, 0, -15)
-    glRotatef(20, 2, 1, 0)
-
-    cube = RubiksCube()
-
-    clock = pygame.time.Clock()
-
-    rotation_x = 0
-    rotation_y = 0
-
-    mouse_down = False
-    last_pos = None
-
-    last_color_change = time.time()
-
-    print("Controls:")
-    print("Mouse drag to rotate cube view")
-    print("U/u: Up layer CW/CCW")
-    print("M/m: Middle Y layer CW/CCW")
-    print("D/d: Down layer CW/CCW")
-    print("L/l: Left layer CW/CCW")
-    print("E/e: Middle X layer CW/CCW")
-    print("R/r: Right layer CW/CCW")
-    print("F/f: Front layer CW/CCW")
-    print("S/s: Middle Z layer CW/CCW")
-    print("B/b: Back layer CW/CCW")
-
-    running = True
-    while running:
-        clock.tick(60)
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                running = False
-
-            elif event.type == pygame.MOUSEBUTTONDOWN:
-                if event.button == 1:
-                    mouse_down = True
-                    last_pos = pygame.mouse.get_pos()
-
-            elif event.type == pygame.MOUSEBUTTONUP:
-                if event.button == 1:
-                    mouse_down = False
-
-            elif event.type == pygame.MOUSEMOTION:
-                if mouse_down:
-                    x, y = pygame.mouse.get_pos()
+        glRotatef(rotation_x, 1, 0, 0)
+        glRotatef(rotation_y, 0, 1, 0)
+        cube.update_animation()
+        cube.draw()
+        glPopMatrix()
+        for slot, p in enumerate(sorted(rivals)[:INSETS]):
+            draw_inset(rivals[p], slot, display, rotation_x, rotation_y)
+        pygame.display.flip()
+        tracer.present()
+        loop.drawn()
+
+    if client is not None:
+        client.close()
+    loop.report("rubix2:")
+    tracer.report()
+    if rival_waits:
+        waits = sorted(rival_waits)
+        print(f"Race: {len(waits)} opponent turns reached the loop {1000 * waits[len(waits) // 2]:.2f} ms "
+              f"p50 / {1000 * waits[-1]:.2f} ms max after arriving (a frame is {1000 / loop.fps:.1f} ms)")
+    if history_path:
+        history.save(history_path)
+        print(f"History: {len(history)} moves saved to {history_path}")
+    pygame.quit()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rubik's cube viewer")
+    parser.add_argument("--wall", type=int, metavar="N",
+                        help="gallery mode: a wall of N independent cubes")
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--size", type=int, choices=(2, 3), default=3,
+                        help="2 for the 2x2x2 cube, which Enter solves optimally")
+    parser.add_argument("--history", metavar="FILE",
+                        help="move history to continue from (if it exists) and save on exit")
+    parser.add_argument("--race", metavar="HOST[:PORT]",
+                        help="join a scramble race on a cube_race.py server")
+    args = parser.parse_args()
+    if args.wall:
+        import cube_wall
+        cube_wall.run(args.wall, args.seed)
+    else:
+        main(args.size, args.history, args.race)
@@ -0,0 +1,154 @@
+"""Sound effects for the snake games.
+
+SfxBank decodes every effect once, up front, into int16 buffers in the
+mixer's own rate and channel layout, so playback never converts anything.
+ChannelPool plays them on a fixed set of reserved mixer channels: a new
+sound takes a free channel, else steals the lowest-priority (then oldest)
+voice, else is dropped.  Triggers are coalesced per frame, so an effect
+fired many times in one frame costs one voice.
+"""
+import wave
+
+import numpy as np
+import pygame
+
+import assetcache
+
+
+def read_wav(path):
+    """Decode a PCM WAV file to (frames, channels) float32 in [-1, 1] and its rate."""
+    with wave.open(path, "rb") as w:
+        channels, width, rate = w.getnchannels(), w.getsampwidth(), w.getframerate()
+        raw = w.readframes(w.getnframes())
+    if width == 1:
+        data = (np.frombuffer(raw, np.uint8).astype(np.float32) - 128) / 128
+    elif width == 2:
+        data = np.frombuffer(raw, "<i2").astype(np.float32) / 32768
+    elif width == 3:
+        b = np.frombuffer(raw, np.uint8).reshape(-1, 3).astype(np.int32)
+        data = ((b[:, 0] | (b[:, 1] << 8) | (b[:, 2] << 16)) << 8 >> 8).astype(np.float32) / 8388608
+    elif width == 4:
+        data = np.frombuffer(raw, "<i4").astype(np.float32) / 2147483648
+    else:
+        raise ValueError(f"{path}: unsupported sample width {width}")
+    return data.reshape(-1, channels), rate
+
+
+def to_mixer_format(samples, rate):
+    """Resample and remix float samples to the mixer's format as int16."""
+    mix_rate, _, mix_channels = pygame.mixer.get_init()
+    if samples.ndim == 1:
+        samples = samples[:, None]
+    if rate != mix_rate:
+        n = int(round(len(samples) * mix_rate / rate))
+        src = np.arange(n) * (rate / mix_rate)
+        samples = np.stack([np.interp(src, np.arange(len(samples)), samples[:, c])
+                            for c in range(samples.shape[1])], axis=1)
+    if samples.shape[1] != mix_channels:
+        samples = np.repeat(samples.mean(axis=1, keepdims=True), mix_channels, axis=1)
+    return np.ascontiguousarray(np.clip(samples * 32767, -32768, 32767).astype(np.int16))
+
+
+class SfxBank:
+    """Named effects, each decoded once into an int16 buffer and a Sound."""
+
+    def __init__(self):
+        self.buffers = {}
+        self.sounds = {}
+
+    def add_samples(self, name, samples, rate, volume=1.0):
+        self.add_buffer(name, to_mixer_format(np.asarray(samples, np.float32), rate), volume)
+
+    def add_wav(self, name, path, volume=1.0):
+        """Decoded once into the asset cache; later starts map the int16 buffer."""
+        self.add_buffer(name, assetcache.samples(path, lambda p: to_mixer_format(*read_wav(p))), volume)
+
+    def add_buffer(self, name, buf, volume=1.0):
+        """buf is int16 (frames, channels) already in the mixer's format."""
+        snd = pygame.mixer.Sound(buffer=buf)
+        snd.set_volume(volume)
+        self.buffers[name] = buf
+        self.sounds[name] = snd
+
+    def __contains__(self, name):
+        return name in self.sounds
+
+    @property
+    def nbytes(self):
+        return sum(buf.nbytes for buf in self.buffers.values())
+
+
+class ChannelPool:
+    """A fixed set of reserved mixer channels with priority voice stealing."""
+
+    def __init__(self, bank, voices=4):
+        self.bank = bank
+        total = max(pygame.mixer.get_num_channels(), voices)
+        pygame.mixer.set_num_channels(total)
+        # reserved channels are never handed out by Sound.play()
+        pygame.mixer.set_reserved(voices)
+        self.channels = [pygame.mixer.Channel(i) for i in range(voices)]
+        self.priority = [0] * voices
+        self.started = [0] * voices
+        self.pending = {}
+        self.stats = {"triggered": 0, "coalesced": 0, "played": 0, "stolen": 0, "dropped": 0}
+        self._serial = 0
+
+    def trigger(self, name, priority=0):
+        """Ask for name to be played at the next flush()."""
+        self.stats["triggered"] += 1
+        if name not in self.bank:
+            return
+        if name in self.pending:
+            self.stats["coalesced"] += 1
+            priority = max(priority, self.pending[name])
+        self.pending[name] = priority
+
+    def flush(self):
+        """Play this frame's triggers, highest priority first; call once per frame."""
+        if not self.pending:
+            return
+        for name, priority in sorted(self.pending.items(), key=lambda kv: -kv[1]):
+            self._play(name, priority)
+        self.pending.clear()
+
+    def _play(self, name, priority):
+        victim = None
+        for i, ch in enumerate(self.channels):
+            if not ch.get_busy():
+                victim = i
+                break
+            if self.priority[i] <= priority and (
+                    victim is None or (self.priority[i], self.started[i])
+                    < (self.priority[victim], self.started[victim])):
+                victim = i
+        if victim is None:
+            self.stats["dropped"] += 1
+            return
+        if self.channels[victim].get_busy():
+            self.stats["stolen"] += 1
+        self._serial += 1
+        self.channels[victim].play(self.bank.sounds[name])
+        self.priority[victim] = priority
+        self.started[victim] = self._serial
+        self.stats["played"] += 1
+
+
+def load(effects, voices=4):
+    """Build a bank and pool from {name: (source, volume)}, where source is a
+    path, (samples, rate), or a function returning (samples, rate) - called
+    here, so synthesis runs on the loader's thread.
+
+    Returns None when the mixer is unavailable, so callers can skip audio.
+    """
+    if not pygame.mixer.get_init():
+        return None
+    bank = SfxBank()
+    for name, (source, volume) in effects.items():
+        if isinstance(source, str):
+            bank.add_wav(name, source, volume)
+        elif callable(source):
+            bank.add_samples(name, *source(), volume=volume)
+        else:
+            bank.add_samples(name, *source, volume=volume)
+    return ChannelPool(bank, voices)